@@ -1,9 +1,35 @@
-from flask import Flask, jsonify
+import sys
+import time
+
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
-from app.routes import nlp_bp, frame_analyze_bp, emo_feedback_bp, act_feedback_bp
+from app.routes import BLUEPRINT_GROUPS, enabled_groups, load_blueprint
+from app.utils.log_utils import setup_logging
+from app.utils.metrics import current_endpoint, request_seconds, requests_total
+
+
+def loaded_models():
+    """
+    지금 프로세스에 로드된 모델 (모델은 처음 쓸 때 로드)
+    확인하려고 모듈을 새로 import 하지 않는다
+    """
+    def read(module_name, check):
+        module = sys.modules.get(module_name)
+        return check(module) if module is not None else False
+
+    return {
+        "kiwi": read("app.utils.nlp_utils", lambda m: m.kiwi_loaded()),
+        "emotion_model": read("app.utils.emotion_analysis", lambda m: m.emotion_model_loaded()),
+        "mediapipe_graphs": read("app.utils.action_analysis", lambda m: m.model_pool.created) or 0,
+    }
+
 
-def create_app():
+def create_app(blueprints=None):
+    """blueprints: 켤 기능 그룹 ("nlp,feedback" 등), 없으면 SOSWEET_BLUEPRINTS 설정 사용"""
+    setup_logging()
     app = Flask(__name__)
+    groups = enabled_groups(blueprints)
+    app.config['SOSWEET_BLUEPRINTS'] = groups
     
     CORS(app, 
          #supports_credentials=True,
@@ -24,11 +50,36 @@ def create_app():
             "status": "healthy",
             "message": "SoSweet API Server is running"
         }), 200
+
+    # Readiness: 켜진 기능과 로드된 모델 확인
+    @app.route('/ready')
+    def readiness_check():
+        return jsonify({
+            "status": "ready",
+            "blueprints": groups,
+            "models": loaded_models(),
+        }), 200
     
-    app.register_blueprint(nlp_bp)
-    app.register_blueprint(frame_analyze_bp)
-    app.register_blueprint(emo_feedback_bp)
-    app.register_blueprint(act_feedback_bp)
+    # 설정으로 켠 기능의 블루프린트만 import / 등록
+    for group in groups:
+        for name in BLUEPRINT_GROUPS[group]:
+            app.register_blueprint(load_blueprint(name))
+
+    # 요청별 엔드포인트 (단계 시간 라벨) / 전체 지연 시간 기록
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        current_endpoint.set(request.url_rule.rule if request.url_rule is not None else "unmatched")
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get("request_start")
+        if start is not None:
+            endpoint = current_endpoint.get()
+            status = str(response.status_code)
+            request_seconds.observe(time.perf_counter() - start, endpoint, request.method, status)
+            requests_total.inc(endpoint, request.method, status)
+        return response
     
     
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
@@ -1,11 +1,54 @@
-from .konlpy import nlp_bp  # 대화 분석 블루프린트 가져오기
-from .frame_analyze import frame_analyze_bp
-from .emotion_feedback import emo_feedback_bp
-from .action_feedback import act_feedback_bp
+import os
+import importlib
+
+# 블루프린트 이름 -> 정의된 모듈 (모듈은 필요할 때만 import 해서 쓰지 않는 모델 의존성을 로드하지 않음)
+_BLUEPRINT_MODULES = {
+    "nlp_bp": ".konlpy",  # 대화 분석 블루프린트
+    "frame_analyze_bp": ".frame_analyze",
+    "frame_stream_bp": ".frame_stream",
+    "emo_feedback_bp": ".emotion_feedback",
+    "act_feedback_bp": ".action_feedback",
+    "metrics_bp": ".metrics",
+}
+
+# 설정(SOSWEET_BLUEPRINTS)에서 쓰는 기능 단위 이름 -> 블루프린트
+BLUEPRINT_GROUPS = {
+    "nlp": ["nlp_bp"],
+    "frame": ["frame_analyze_bp"],
+    "stream": ["frame_stream_bp"],
+    "feedback": ["emo_feedback_bp", "act_feedback_bp"],
+    "metrics": ["metrics_bp"],
+}
+
+# 예) SOSWEET_BLUEPRINTS=nlp,metrics -> NLP 전용 서비스 (기본값은 전부)
+ENABLED_GROUPS = os.environ.get("SOSWEET_BLUEPRINTS", ",".join(BLUEPRINT_GROUPS))
+
+
+def enabled_groups(value=None):
+    groups = [g.strip() for g in (value if value is not None else ENABLED_GROUPS).split(",") if g.strip()]
+    unknown = [g for g in groups if g not in BLUEPRINT_GROUPS]
+    if unknown:
+        raise ValueError(f"알 수 없는 블루프린트 그룹: {unknown} (가능: {list(BLUEPRINT_GROUPS)})")
+    return groups
+
+
+def load_blueprint(name):
+    module = importlib.import_module(_BLUEPRINT_MODULES[name], __name__)
+    return getattr(module, name)
+
+
+def __getattr__(name):
+    # from app.routes import nlp_bp 처럼 쓰던 코드도 그대로 동작 (이때 해당 모듈만 import)
+    if name in _BLUEPRINT_MODULES:
+        return load_blueprint(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "nlp_bp", 
     "frame_analyze_bp", 
+    "frame_stream_bp",
     "emo_feedback_bp", 
     "act_feedback_bp",
+    "metrics_bp",
     ]
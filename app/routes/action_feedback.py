@@ -1,14 +1,15 @@
 from flask import Blueprint, request, jsonify
-import os
 import json
+import logging
+from app.utils.json_utils import load_latest_action
 
 act_feedback_bp = Blueprint('action_feedback', __name__)
+logger = logging.getLogger(__name__)
 
 @act_feedback_bp.route('/api/feedback/actioninfo', methods=['POST'])
 def get_action_feedback():
     """
-    analysis_data/actions/{room_id}_{user_id}.json 파일에서
-    마지막(가장 최근) 데이터의 counters 부분을 꺼내서 반환
+    (room_id, user_id) 의 마지막(가장 최근) 데이터의 counters 부분을 꺼내서 반환
     """
     data = request.get_json()
     room_id = data.get('room_id')
@@ -17,28 +18,19 @@ def get_action_feedback():
     if not room_id or not user_id:
         return jsonify({"message": "필수 데이터(room_id, user_id)가 누락되었습니다."}), 400
 
-    # 파일 경로: analysis_data/actions/room123_userABC.json
-    actions_dir = "analysis_data/actions"
-    filename = f"{room_id}_{user_id}.json"
-    file_path = os.path.join(actions_dir, filename)
-
-    if not os.path.exists(file_path):
-        return jsonify({"error": "해당 액션 데이터가 존재하지 않습니다."}), 404
-
+    # 가장 최근 레코드: 메모리 -> analysis_data/actions/room123_userABC.latest.snapshot.json
+    # (전체 기록 파일은 파싱하지 않음)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            action_data = json.load(f)  # list of dict
+        latest_entry = load_latest_action(room_id, user_id)
     except json.JSONDecodeError:
         return jsonify({"error": "액션 데이터 파일이 손상되었습니다."}), 500
 
-    if not action_data:
-        return jsonify({"error": "액션 데이터가 비어있습니다."}), 404
+    if latest_entry is None:
+        return jsonify({"error": "해당 액션 데이터가 존재하지 않습니다."}), 404
 
-    # 마지막(가장 최근) entry
-    latest_entry = action_data[-1]
     counters = latest_entry.get("counters", {})
     
-    print(f"counters 를 확인하세용!!!!!!!!!!!!!!! {counters}")
+    logger.debug("counters 를 확인하세용 %s", counters)
 
     # 원하는 counter만 뽑아서 보내도 되고, 전체 counters 그대로 보내도 됨
     # 여기서는 전체를 반환 예시
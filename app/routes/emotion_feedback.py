@@ -1,15 +1,13 @@
-from flask import Blueprint, request, jsonify
-import json
-import os
-from app.utils.feedback_utils import calculate_emo_result, convert_to_korean
-from app.utils.action_analysis import ActionAnalyzer
+import logging
 
-# 전역 인스턴스(싱글톤처럼) 생성
-action_analyzer = ActionAnalyzer()
+from flask import Blueprint, request, jsonify
+from app.utils.json_utils import load_emotion_summary
+from app.utils.feedback_utils import calculate_emo_result_from_aggregate, convert_to_korean
+from app.utils.frame_pipeline import run_task
+from app.utils.inference_pool import InferenceUnavailable
 
 emo_feedback_bp = Blueprint('emotion_feedback', __name__)
-
-DATA_PATH = "./analysis_data/emotions"
+logger = logging.getLogger(__name__)
 
 @emo_feedback_bp.route('/api/feedback/faceinfo', methods=['POST', 'OPTIONS'])
 def get_emo_feedback():
@@ -30,23 +28,22 @@ def get_emo_feedback():
     if not room_id or not user_id:
         return jsonify({"message": "필수 데이터가 누락되었습니다."}), 400
     
-    # 필요한 경우 여기서 큐 초기화
-    action_analyzer.reset_all_queues()
+    # 면접 종료 시점이므로 해당 세션의 큐만 초기화 (워커가 응답하지 않아도 피드백은 돌려줌)
+    try:
+        run_task("reset", room_id, user_id)
+    except InferenceUnavailable as e:
+        logger.warning("세션 초기화 실패: %s", e)
 
-    # 파일 경로 설정하기
-    file_path = os.path.join(DATA_PATH, room_id, f"{user_id}.json")
+    # 저장 시점에 갱신해 둔 세션 감정 누적값 (전체 기록을 다시 읽지 않음)
+    emotion_summary = load_emotion_summary(room_id, user_id)
     
-    # JSON 파일 없을 경우
-    if not os.path.exists(file_path):
+    # 기록이 없을 경우
+    if emotion_summary is None:
         return jsonify({"error": "해당 데이터가 존재하지 않습니다"}), 404
     
-    # JSON 파일 읽기
-    with open(file_path, 'r', encoding='utf-8') as file:
-        emotion_data = json.load(file)
-    
     # 필요 데이터만 추출해오기
-    emo_sorted_scores, emo_top_3 = calculate_emo_result(emotion_data)
-    print(f"필요 데이터가 잘 추출되어왔나요? {emo_sorted_scores} 과 Top 3 감정은 {emo_top_3}")
+    emo_sorted_scores, emo_top_3 = calculate_emo_result_from_aggregate(emotion_summary)
+    logger.debug("필요 데이터가 잘 추출되어왔나요? %s 과 Top 3 감정은 %s", emo_sorted_scores, emo_top_3)
     
     # 각각 한글로 변환
     converted_sorted_scores = {convert_to_korean(k): v for k, v in emo_sorted_scores.items()}
@@ -57,7 +54,7 @@ def get_emo_feedback():
     #     "top_3_emotions": converted_top_3
     # }
     
-    print(f"정렬된 전체 감정 점수: {converted_sorted_scores}")
+    logger.debug("정렬된 전체 감정 점수: %s", converted_sorted_scores)
     # print(f"Top 3 감정: {combined_emo_result['top_3_emotions']}")
     
     return jsonify({
@@ -0,0 +1,157 @@
+from flask import Blueprint, request, jsonify, Response
+from simple_websocket import Server, ConnectionClosed
+from app.utils.frame_utils import prepare_frame
+from app.routes.frame_analyze import process_human_frame
+from app.utils.metrics import timed, current_endpoint, frames_total
+
+import json
+import logging
+import threading
+
+frame_stream_bp = Blueprint('frame_stream', __name__)
+logger = logging.getLogger(__name__)
+
+# 한 메시지(프레임)의 최대 크기
+MAX_MESSAGE_SIZE = 10 * 1024 * 1024
+
+
+class LatestFrameInbox:
+    """
+    세션별 크기 1 inbox
+    분석기가 바쁜 동안 들어온 프레임은 가장 최근 것 하나만 남기고 버린다 (backpressure)
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0  # 분석되지 못하고 버려진 프레임 수
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+                frames_total.inc(current_endpoint.get(), "dropped")
+            self._item = item
+            self._cond.notify()
+
+    def get(self):
+        """다음 프레임을 기다렸다가 꺼냄 (닫히면 None)"""
+        with self._cond:
+            while self._item is None and not self._closed:
+                self._cond.wait()
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+
+# 연결 중인 스트림의 inbox (활성 세션 수 게이지용)
+active_streams = set()
+_active_streams_lock = threading.Lock()
+
+
+def parse_stream_message(message):
+    """
+    스트림 메시지 -> (timestamp, frame)
+    - 텍스트 : {"timestamp": ..., "frame": data_url}
+    - 바이너리 : 8바이트 big-endian timestamp + 인코딩된 이미지(JPEG/WebP)
+    """
+    if isinstance(message, str):
+        data = json.loads(message)
+        return data.get('timestamp'), data.get('frame')
+
+    if len(message) <= 8:
+        return None, None
+    return int.from_bytes(message[:8], "big"), memoryview(message)[8:]
+
+
+def _analyze_stream(ws, inbox, room_id, user_id, endpoint):
+    """inbox 에서 최신 프레임을 꺼내 분석하고, HTTP 와 같은 payload 를 돌려보냄"""
+    # 새 스레드는 요청 컨텍스트를 물려받지 않으므로 단계 시간이 이 엔드포인트로 기록되도록 설정
+    current_endpoint.set(endpoint)
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+
+        timestamp, frame = item
+        try:
+            decoded_frame_bgr = prepare_frame(frame)
+            payload = process_human_frame(room_id, user_id, timestamp, decoded_frame_bgr)
+        except Exception as e:
+            logger.warning("[stream] 프레임 분석 오류: %s", e)
+            payload = {"timestamp": timestamp, "error": f"서버 오류: {str(e)}"}
+        payload["dropped_frames"] = inbox.dropped
+
+        try:
+            with timed("serialize"):
+                message = json.dumps(payload)
+            ws.send(message)
+        except ConnectionClosed:
+            break
+
+
+@frame_stream_bp.route('/api/human/stream', websocket=True)
+def frame_stream():
+    """
+    면접 세션 하나에 대한 WebSocket 스트림
+    ws://.../api/human/stream?room_id=...&user_id=...
+    프레임을 받는 족족 분석하지 않고, 분석 중에 들어온 프레임은 최신 것만 남겨서
+    실시간 피드백이 밀리지 않도록 한다
+    """
+    room_id = request.args.get('room_id')
+    user_id = request.args.get('user_id')
+
+    if not room_id or not user_id:
+        return jsonify({"message": "필수 데이터(room_id, user_id)가 누락되었습니다."}), 400
+
+    try:
+        ws = Server(request.environ, max_message_size=MAX_MESSAGE_SIZE)
+    except Exception:
+        return jsonify({"message": "WebSocket 요청이 아닙니다."}), 400
+
+    inbox = LatestFrameInbox()
+    analyzer = threading.Thread(
+        target=_analyze_stream, args=(ws, inbox, room_id, user_id, current_endpoint.get()), daemon=True
+    )
+    analyzer.start()
+    with _active_streams_lock:
+        active_streams.add(inbox)
+
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                continue
+            try:
+                timestamp, frame = parse_stream_message(message)
+            except (ValueError, TypeError):
+                continue  # 잘못된 메시지는 무시
+            if not frame or not timestamp:
+                continue
+            inbox.put((timestamp, frame))
+    except ConnectionClosed:
+        pass
+    finally:
+        with _active_streams_lock:
+            active_streams.discard(inbox)
+        inbox.close()
+        analyzer.join()
+        try:
+            ws.close()
+        except ConnectionClosed:
+            pass
+
+    # 연결은 이미 WebSocket 으로 처리했으므로 WSGI 서버에 일반 응답을 보내지 않도록 함
+    class WebSocketResponse(Response):
+        def __call__(self, *args, **kwargs):
+            if ws.mode == 'gunicorn':
+                raise StopIteration()
+            elif ws.mode == 'werkzeug':
+                raise ConnectionError()
+            return []
+
+    return WebSocketResponse()
@@ -0,0 +1,34 @@
+import sys
+
+from flask import Blueprint, Response
+from app.utils.metrics import render_prometheus, queue_depth, active_sessions
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _loaded(module_name, read):
+    # 이미 로드된 모듈만 읽음 (꺼져 있는 기능의 모델 의존성을 /metrics 때문에 로드하지 않도록)
+    module = sys.modules.get(module_name)
+    return read(module) if module is not None else None
+
+
+def _inference_queue_depth(module):
+    pool = module.current_inference_pool()
+    return pool.queue_depth() if pool is not None else 0
+
+
+# 수집 시점에 읽는 게이지
+# 추론 워커 풀을 쓰면 동작 세션 / 감정 배치 큐는 워커 프로세스에 있으므로 이 프로세스 값은 0 에 가깝다
+queue_depth.set_function(lambda: _loaded("app.utils.inference_pool", _inference_queue_depth), "inference")
+queue_depth.set_function(lambda: _loaded("app.utils.emotion_analysis", lambda m: m.emotion_queue_depth()), "emotion_batch")
+queue_depth.set_function(lambda: _loaded("app.utils.frame_pipeline", lambda m: m.stage_queue_depth()), "emotion_stage")
+queue_depth.set_function(lambda: _loaded("app.utils.json_utils", lambda m: m.persist_queue_depth()), "persist")
+active_sessions.set_function(lambda: _loaded("app.utils.session_registry", lambda m: len(m.action_sessions)), "action")
+active_sessions.set_function(lambda: _loaded("app.utils.nlp_utils", lambda m: len(m.transcript_sessions)), "transcript")
+active_sessions.set_function(lambda: _loaded("app.routes.frame_stream", lambda m: len(m.active_streams)), "stream")
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 텍스트 형식의 단계별 지연 시간 히스토그램 / 카운터 / 게이지"""
+    return Response(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,26 +1,133 @@
-import mediapipe as mp
 import cv2
 import numpy as np
+import os
 import time
-import heapq
-from collections import namedtuple
+import queue
+import logging
+import operator
+import itertools
+import threading
+from contextlib import contextmanager
 
+from app.utils.metrics import timed
+from app.utils.frame_utils import PreparedFrame
 
-# NormalizedLandmark 정의
-NormalizedLandmark = namedtuple("NormalizedLandmark", ["x", "y", "z"])
+logger = logging.getLogger(__name__)
 
-class ActionAnalyzer:
-    def __init__(self):
-        # 기본 초기화
-        # 우선순위 큐
-        self.hand_movement_heap = []
-        self.side_movement_heap = []
-        self.eye_touch_heap = []
 
-        # 좌우 움직임 baseline
-        self.side_movement_baseline_3d = None  # 좌우 흔들림(baseline) 기준값을 전역으로 저장할 변수
-        self.last_baseline_time = time.time()  # 마지막 baseline 기준 시간 설정
-        self.rebaseline_interval = 15  # 15초마다 baseline 갱신
+# 모델별 입력 해상도 (width, height)
+POSE_INPUT_SIZE = (640, 480)
+HAND_FACE_INPUT_SIZE = (320, 180)
+
+# 눈 만지기 cascade: Pose 손목 / 검지가 눈·코에서 이 거리(정규화 x, y) 안에 있을 때만 FaceMesh + Hands 실행
+# 최종 판정 거리(is_hand_near_eye, 0.1)보다 넉넉하게 잡아서 Pose 오차로 놓치지 않도록 함 (0 이하면 항상 실행)
+EYE_GATE_DISTANCE = float(os.environ.get("SOSWEET_EYE_GATE_DISTANCE", "0.25"))
+POSE_FACE_POINTS = [0, 2, 5]  # 코, 왼쪽 눈, 오른쪽 눈
+POSE_HAND_POINTS = [15, 16, 19, 20]  # 왼쪽 / 오른쪽 손목, 왼쪽 / 오른쪽 검지
+
+
+# 랜드마크 개수 / 감지기가 쓰는 랜드마크 번호
+POSE_POINTS = 33
+FACE_POINTS = 468  # FaceMesh 기본 468점 (iris 포함 478점이면 앞 468점만 사용)
+HAND_POINTS = 21
+EYE_POINTS = [[33, 133, 159, 145], [362, 263, 386, 374]]  # 왼쪽 / 오른쪽 눈 주요 랜드마크
+FINGER_TIP_POINTS = [8, 12, 16]  # 검지, 중지, 약지 끝
+SIDE_MOVE_WEIGHTS = np.array([1.5, 0.0, 0.3], dtype=np.float32)  # 어깨 중심 이동 거리의 x, y, z 가중치
+
+_XYZ = operator.attrgetter("x", "y", "z")
+_NO_FACES = np.empty((0, FACE_POINTS, 3), dtype=np.float32)
+_NO_HANDS = np.empty((0, HAND_POINTS, 3), dtype=np.float32)
+
+
+def landmarks_to_array(landmarks, count=None):
+    """MediaPipe 랜드마크 목록 -> (N, 3) float32 배열 (x, y, z), count 를 주면 앞 count 개만"""
+    if count is not None:
+        landmarks = landmarks[:count]
+    # 중간 튜플 리스트 없이 x, y, z 를 바로 배열에 채움
+    values = itertools.chain.from_iterable(map(_XYZ, landmarks))
+    return np.fromiter(values, dtype=np.float32, count=3 * len(landmarks)).reshape(-1, 3)
+
+
+def _stack_landmarks(multi_landmarks, count, empty):
+    # 점 개수가 모자란(잘린) 결과는 버리고 (개수, count, 3) 로 쌓음
+    arrays = [landmarks_to_array(lms.landmark, count) for lms in multi_landmarks or () if len(lms.landmark) >= count]
+    return np.stack(arrays) if arrays else empty
+
+
+def pose_to_array(pose_landmarks):
+    """Pose 랜드마크 목록 -> (33, 3), 없거나 모자라면 None"""
+    if pose_landmarks is None or len(pose_landmarks) < POSE_POINTS:
+        return None
+    return landmarks_to_array(pose_landmarks, POSE_POINTS)
+
+
+def faces_to_array(face_results):
+    """FaceMesh 결과 -> (얼굴 수, 468, 3)"""
+    faces = face_results.multi_face_landmarks if face_results is not None else None
+    return _stack_landmarks(faces, FACE_POINTS, _NO_FACES)
+
+
+def hands_to_array(hand_results):
+    """Hands 결과 -> (손 수, 21, 3)"""
+    hands = hand_results.multi_hand_landmarks if hand_results is not None else None
+    return _stack_landmarks(hands, HAND_POINTS, _NO_HANDS)
+
+
+def eye_centers(faces):
+    """(..., FACE_POINTS, 3) -> (..., 2, 3) 왼쪽 / 오른쪽 눈 중심"""
+    return faces[..., EYE_POINTS, :].mean(axis=-2)
+
+
+def finger_centers(hands):
+    """(..., HAND_POINTS, 3) -> (..., 3) 검지 / 중지 / 약지 끝 중심"""
+    return hands[..., FINGER_TIP_POINTS, :].mean(axis=-2)
+
+
+class FramePerception:
+    """
+    한 프레임에 대한 인식 결과 (프레임당 한 번만 계산)
+    MediaPipe 결과는 한 번만 연속된 float32 배열로 바꿔두고, 손/몸/눈 감지기가 모두 이 배열을 공유해서 읽는다
+    - pose  : (33, 3) Pose 랜드마크 (없으면 None)
+    - faces : (얼굴 수, 468, 3) FaceMesh 랜드마크
+    - hands : (손 수, 21, 3) Hands 랜드마크
+    """
+    __slots__ = ("pose", "faces", "hands")
+
+    def __init__(self, pose=None, faces=None, hands=None):
+        self.pose = pose
+        self.faces = faces if faces is not None else _NO_FACES
+        self.hands = hands if hands is not None else _NO_HANDS
+
+    @classmethod
+    def from_results(cls, pose_landmarks, face_results=None, hand_results=None):
+        """MediaPipe 결과 (pose landmark 목록 / FaceMesh / Hands 결과) -> FramePerception"""
+        return cls(pose_to_array(pose_landmarks), faces_to_array(face_results), hands_to_array(hand_results))
+
+
+def hand_near_face(pose, max_distance=EYE_GATE_DISTANCE):
+    """
+    cascade 1단계: 이미 계산된 Pose 랜드마크 (33, 3) 만으로 손이 눈 근처일 가능성이 있는지 판단
+    Pose 가 없으면 판단할 수 없으므로 True (FaceMesh + Hands 실행)
+    """
+    if max_distance <= 0 or pose is None:
+        return True
+
+    # (손 점 4, 얼굴 점 3) 쌍의 x, y 거리 제곱을 한 번에 계산
+    offsets = pose[POSE_HAND_POINTS, None, :2] - pose[None, POSE_FACE_POINTS, :2]
+    return bool(((offsets ** 2).sum(axis=-1) < max_distance ** 2).any())
+
+
+class ActionModels:
+    """
+    MediaPipe 그래프(Pose / FaceMesh / Hands) 묶음
+    세션 상태는 들고 있지 않으므로 여러 세션이 풀(ActionModelPool)을 통해 공유한다
+    mediapipe 는 처음 그래프를 만들 때 import (동작 분석을 쓰지 않는 서비스는 로드하지 않음)
+    """
+    def __init__(self, eye_gate_distance=EYE_GATE_DISTANCE):
+        import mediapipe as mp
+
+        # FaceMesh + Hands 를 실행할 Pose 손-얼굴 거리 (hand_near_face)
+        self.eye_gate_distance = eye_gate_distance
 
         # MediaPipe Pose 모델 초기화
         self.mp_pose = mp.solutions.pose
@@ -47,211 +154,345 @@ class ActionAnalyzer:
             min_detection_confidence=0.4
         )
 
-        self.rebaseline_interval = 15  # 15초마다 baseline 갱신
-        self.current_time = time.time()
-        self.frame_counter = 0  # 프레임 카운터 추가
-
-    def reset_all_queues(self):
-        self.hand_movement_heap.clear()
-        self.side_movement_heap.clear()
-        self.eye_touch_heap.clear()
-        self.side_movement_baseline_3d = None
-        self.last_baseline_time = time.time()
-
 
     # 공통 유틸
     def get_landmarks(self, frame_bgr):
         """
-        BGR 프레임을 입력으로 받아 처리
+        BGR 프레임(또는 PreparedFrame)을 입력으로 받아 처리
         """
-        if frame_bgr is None or frame_bgr.size == 0:
+        frame = PreparedFrame.wrap(frame_bgr)
+        if frame is None or frame.source.size == 0:
             return None
 
         try:
-            # 입력 이미지 크기 표준화 (640x480)
-            frame_bgr = cv2.resize(frame_bgr, (640, 480), interpolation=cv2.INTER_LINEAR)
-            
-            if frame_bgr.dtype != np.uint8:
-                frame_bgr = frame_bgr.astype(np.uint8)
-
-            frame_bgr = np.ascontiguousarray(frame_bgr)
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            # 입력 이미지 크기 표준화 (640x480), 이미 640x480이면 다시 resize 하지 않음
+            frame_rgb = frame.get(POSE_INPUT_SIZE, "rgb")
             
-            results = self.pose.process(frame_rgb)
+            with timed("pose"):
+                results = self.pose.process(frame_rgb)
             if results.pose_landmarks is not None and len(results.pose_landmarks.landmark) > 0:
                 return results.pose_landmarks.landmark
             return None
         except Exception as e:
-            print(f"Landmark 처리 중 오류: {str(e)}")
+            logger.warning("Landmark 처리 중 오류: %s", e)
             return None
 
 
     def get_hand_and_face_results(self, frame_bgr):
         """
-        BGR 프레임을 처리하여 face_mesh와 hands 결과를 반환
+        BGR 프레임(또는 PreparedFrame)을 처리하여 face_mesh와 hands 결과를 반환
         """
-        if frame_bgr is None or frame_bgr.size == 0:
+        frame = PreparedFrame.wrap(frame_bgr)
+        if frame is None or frame.source.size == 0:
             return None, None
 
         try:
             # 입력 이미지 크기 표준화 (160x120 -> 320x180)
-            frame_bgr = cv2.resize(frame_bgr, (320, 180), interpolation=cv2.INTER_LINEAR)
-            
-            if frame_bgr.dtype != np.uint8:
-                frame_bgr = frame_bgr.astype(np.uint8)
+            frame_rgb = frame.get(HAND_FACE_INPUT_SIZE, "rgb")
 
-            frame_bgr = np.ascontiguousarray(frame_bgr)
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-
-            face_results = self.face_mesh.process(frame_rgb)
-            hand_results = self.hands.process(frame_rgb)
+            with timed("face_mesh"):
+                face_results = self.face_mesh.process(frame_rgb)
+            with timed("hands"):
+                hand_results = self.hands.process(frame_rgb)
             
             return face_results, hand_results
         except Exception as e:
-            print(f"Hand/Face 처리 중 오류: {str(e)}")
+            logger.warning("Hand/Face 처리 중 오류: %s", e)
             return None, None
 
 
+    def perceive(self, frame_bgr):
+        """
+        프레임당 한 번만 호출: Pose 1회, (손이 얼굴 근처일 때만) FaceMesh+Hands 1회
+        해상도별 RGB 입력은 PreparedFrame 에서 한 번씩만 만들어지고 (감정 분석과 공유),
+        결과는 FramePerception 으로 묶어서 모든 감지기에 전달
+        """
+        frame = PreparedFrame.wrap(frame_bgr)
+        if frame is None or frame.source.size == 0:
+            return None
+
+        # 랜드마크는 여기서 한 번만 배열로 변환
+        pose = pose_to_array(self.get_landmarks(frame))
+        faces = hands = None
+        if hand_near_face(pose, self.eye_gate_distance):
+            face_results, hand_results = self.get_hand_and_face_results(frame)
+            faces, hands = faces_to_array(face_results), hands_to_array(hand_results)
+        # 손이 얼굴에서 멀면 눈 만지기일 수 없으므로 FaceMesh / Hands 는 건너뜀 (faces / hands 는 빈 배열)
+        return FramePerception(pose, faces, hands)
+
+
+class ActionModelPool:
+    """
+    ActionModels 인스턴스 풀
+    - MediaPipe 그래프는 스레드 안전하지 않으므로 한 번에 한 요청만 빌려 쓴다
+    - 필요할 때만 max_size 까지 생성 (프로세스당 그래프 세트 수 제한)
+    """
+    def __init__(self, max_size=2):
+        self.max_size = max(1, max_size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        """지금까지 만든 그래프 세트 수 (0 이면 MediaPipe 미로드)"""
+        with self._lock:
+            return self._created
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return ActionModels()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # 모두 사용 중이면 반납될 때까지 대기
+        return self._idle.get()
+
+    @contextmanager
+    def acquire(self):
+        models = self._checkout()
+        try:
+            yield models
+        finally:
+            self._idle.put(models)
+
+    def perceive(self, frame_bgr):
+        with self.acquire() as models:
+            return models.perceive(frame_bgr)
+
+
+# 프로세스 전체에서 공유하는 모델 풀
+model_pool = ActionModelPool(max_size=int(os.environ.get("SOSWEET_MODEL_POOL_SIZE", "2")))
+
+
+class LandmarkHistory:
+    """
+    세션별 랜드마크 시계열을 담는 고정 크기 링 버퍼
+    프레임 픽셀 대신 프레임당 수백 바이트의 float32 랜드마크만 보관한다
+    - pose        : (capacity, 33, 3) Pose 랜드마크 x, y, z
+    - eye_centers : (capacity, 2, 3) FaceMesh 왼쪽/오른쪽 눈 중심
+    - finger_tips : (capacity, 2, 3) 손별 검지/중지/약지 끝 중심 (최대 2손)
+    - timestamps  : 클라이언트 timestamp (조회 키)
+    """
+    def __init__(self, capacity=20):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.pose = np.zeros((capacity, POSE_POINTS, 3), dtype=np.float32)
+        self.has_pose = np.zeros(capacity, dtype=bool)
+        self.eye_centers = np.zeros((capacity, 2, 3), dtype=np.float32)
+        self.has_face = np.zeros(capacity, dtype=bool)
+        self.finger_tips = np.zeros((capacity, 2, 3), dtype=np.float32)
+        self.hand_count = np.zeros(capacity, dtype=np.int8)
+        self.count = 0  # 지금까지 넣은 프레임 수
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+        self.has_pose[:] = False
+        self.has_face[:] = False
+        self.hand_count[:] = 0
+
+    def push(self, timestamp, perception):
+        """이번 프레임의 인식 결과를 배열로 변환해 가장 오래된 칸에 덮어씀"""
+        i = self.count % self.capacity
+        try:
+            self.timestamps[i] = float(timestamp)
+        except (TypeError, ValueError):
+            self.timestamps[i] = np.nan
+
+        # perception 은 이미 배열이므로 복사 / 슬라이스 평균만 한다
+        self.has_pose[i] = perception.pose is not None
+        if self.has_pose[i]:
+            self.pose[i] = perception.pose
+
+        self.has_face[i] = len(perception.faces) > 0
+        if self.has_face[i]:
+            self.eye_centers[i] = eye_centers(perception.faces[0])
+
+        hands = perception.hands[:2]
+        self.hand_count[i] = len(hands)
+        self.finger_tips[i, :len(hands)] = finger_centers(hands)
+
+        self.count += 1
+        return i
+
+    def indices(self):
+        """보관 중인 칸 번호 (오래된 것 -> 최신 순)"""
+        n = len(self)
+        start = self.count - n
+        return [(start + k) % self.capacity for k in range(n)]
+
+    def latest(self):
+        return (self.count - 1) % self.capacity if self.count else None
+
+    def find(self, timestamp):
+        """클라이언트 timestamp 로 칸 번호 조회 (없으면 None)"""
+        try:
+            timestamp = float(timestamp)
+        except (TypeError, ValueError):
+            return None
+        matches = [i for i in self.indices() if self.timestamps[i] == timestamp]
+        return matches[-1] if matches else None
+
+
+class ActionAnalyzer:
+    """
+    세션(room_id, user_id) 단위의 시간적 상태만 보관하는 가벼운 분석기
+    모델 추론은 공유 풀(model_pool)에 맡긴다
+    """
+    # 랜드마크 히스토리에 보관하는 최대 프레임 수
+    max_queue_size = 20
+
+    def __init__(self, models=None, clock=time.time):
+        # 모델을 직접 넘기지 않으면 공유 풀을 사용
+        self.models = models
+        # baseline 갱신 주기에 쓰는 시계 (오프라인 재분석은 프레임 시간을 넘긴다)
+        self.clock = clock
+
+        # 기본 초기화
+        # 프레임별 랜드마크 링 버퍼 (세 감지기가 공유)
+        self.history = LandmarkHistory(self.max_queue_size)
+        self._last_recorded = None  # 이미 히스토리에 넣은 (perception, timestamp) (프레임당 한 번만 기록)
+
+        # 좌우 움직임 baseline
+        self.side_movement_baseline_3d = None  # 좌우 흔들림(baseline) 기준값을 저장할 변수
+        self.last_baseline_time = self.clock()  # 마지막 baseline 기준 시간 설정
+        self.rebaseline_interval = 15  # 15초마다 baseline 갱신
+
+        self.current_time = self.clock()
+        self.frame_counter = 0  # 프레임 카운터 추가
+
+    def reset_all_queues(self):
+        self.history.clear()
+        self._last_recorded = None
+        self.side_movement_baseline_3d = None
+        self.last_baseline_time = self.clock()
+
+
+    def perceive(self, frame_bgr):
+        """프레임 인식 결과 계산 (전용 모델이 없으면 공유 풀에서 빌려 사용)"""
+        if self.models is not None:
+            return self.models.perceive(frame_bgr)
+        return model_pool.perceive(frame_bgr)
+
+
+    def record(self, timestamp, perception):
+        """
+        이번 프레임을 히스토리에 한 번만 기록하고 보관 중인 프레임 수를 반환
+        세 감지기가 같은 perception 으로 호출해도 중복 기록되지 않는다
+        """
+        # 변화 없는 프레임은 이전 perception 을 재사용하므로 timestamp 까지 같이 비교
+        if self._last_recorded is None or self._last_recorded[0] is not perception \
+                or self._last_recorded[1] != timestamp:
+            self.frame_counter += 1
+            self.history.push(timestamp, perception)
+            self._last_recorded = (perception, timestamp)
+        return len(self.history)
+
+
     @staticmethod
     def get_midpoint_y(landmarks):
-        # landmarks는 MediaPipe의 NormalizedLandmark 객체 리스트로,
-        # None 대신 빈 리스트나 잘못된 인덱스로 인한 IndexError를 발생시킴
+        # landmarks는 (33, 3) Pose 랜드마크 배열
         if landmarks is None or len(landmarks) < 13:
                 return None
         
-        # 9,10 => 입술  / 11,12 => 어깨
-        mouth_y = (landmarks[9].y + landmarks[10].y) / 2
-        shoulder_y = (landmarks[11].y + landmarks[12].y) / 2
-        return (mouth_y + shoulder_y) / 2
+        # 9,10 => 입술  / 11,12 => 어깨, 입 중심과 어깨 중심의 중간 = 네 점 y 평균
+        return float(landmarks[9:13, 1].mean())
 
 
     def calculate_threshold(self, landmarks):
-        left_shoulder = landmarks[11]
-        right_shoulder = landmarks[12]
-        shoulder_width = np.sqrt((left_shoulder.x - right_shoulder.x) ** 2 +
-                            (left_shoulder.y - right_shoulder.y) ** 2)
-        return 0.1 * shoulder_width  # 어깨 너비의 10%를 임계값으로 설정 (거리 멀거나 가까운 사용자에 대해 임계값 동적으로 조정)
+        shoulder_width = np.linalg.norm(landmarks[11, :2] - landmarks[12, :2])
+        return 0.1 * float(shoulder_width)  # 어깨 너비의 10%를 임계값으로 설정 (거리 멀거나 가까운 사용자에 대해 임계값 동적으로 조정)
 
 
-    # 얼굴 - 손 감지 공통 함수
+    # 얼굴 - 손 감지 공통 함수 (마지막 축이 x, y, z 인 배열끼리 broadcast 해서 한 번에 계산)
     def euclidean_distance(self, point1, point2):
-        return np.sqrt((point1.x - point2.x) ** 2 + (point1.y - point2.y) ** 2 + (point1.z - point2.z) ** 2)
+        return np.linalg.norm(point1 - point2, axis=-1)
 
 
     #########################################################################################################
 
-    def analyze_hand_movement(self, frame_bgr):
+    def analyze_hand_movement(self, perception):
         # 손이 중간선 위로 올라가 산만한 행동을 감지
-        pose_landmarks = self.get_landmarks(frame_bgr)
-        if pose_landmarks is None or len(pose_landmarks) < 17:
+        pose = perception.pose
+        if pose is None:
             return None
 
         # 입 중심과 어깨 중심의 중간값 계산
-        midpoint_y = self.get_midpoint_y(pose_landmarks)
+        midpoint_y = self.get_midpoint_y(pose)
         if midpoint_y is None:
             return None # 랜드마크 제대로 추출 안되면 종료하기
         
-        if len(pose_landmarks) < 17:
-            return None
-        
-        # 손목의 y 좌표
-        left_hand_y = pose_landmarks[15].y  # 왼쪽 손목
-        right_hand_y = pose_landmarks[16].y  # 오른쪽 손목
-
-        # 손목이 중간값보다 위에 있는지 확인
-        if left_hand_y < midpoint_y or right_hand_y < midpoint_y:
+        # 손목(15: 왼쪽, 16: 오른쪽)이 중간값보다 위에 있는지 확인
+        if pose[15:17, 1].min() < midpoint_y:
             return "[손_CHECK] 손이 너무 산만합니다!"
         return None
 
 
-    def process_frame(self, frame_bgr):
-        """공통 프레임 전처리 함수"""
-        if frame_bgr is None or frame_bgr.size == 0:
-            return None
-            
-        try:
-            frame_bgr = cv2.resize(frame_bgr, (640, 480), interpolation=cv2.INTER_LINEAR)
-            return np.ascontiguousarray(frame_bgr)
-        except Exception as e:
-            print(f"프레임 처리 중 오류: {str(e)}")
-            return None
-
-
-    def analyze_hand_movement_with_priority_queue(self, frame_bgr, timestamp):
-        """우선순위 큐를 사용하여 손 움직임 분석"""
+    def analyze_hand_movement_with_priority_queue(self, frame_bgr, timestamp, perception=None):
+        """랜드마크 히스토리를 사용하여 손 움직임 분석"""
         try:
-            processed_frame = self.process_frame(frame_bgr)
-            if processed_frame is None:
+            # 공유 인식 결과가 없으면 여기서 한 번 계산
+            if perception is None:
+                perception = self.perceive(frame_bgr)
+            if perception is None:
                 return None, None
                 
-            # 프레임 카운터를 키로 사용
-            self.frame_counter += 1
-            heapq.heappush(self.hand_movement_heap, (self.frame_counter, processed_frame))
-            
-            while len(self.hand_movement_heap) > 20:
-                heapq.heappop(self.hand_movement_heap)
-            
-            if len(self.hand_movement_heap) < 2:
+            # 랜드마크 히스토리에 기록 (프레임 픽셀은 보관하지 않음)
+            if self.record(timestamp, perception) < 2:
                 return None, None
 
-            # 가장 최근 프레임 분석
-            _, latest_frame = self.hand_movement_heap[-1]
-            message = self.analyze_hand_movement(latest_frame)
+            # 가장 최근 프레임(= 이번 프레임)의 인식 결과로 분석
+            message = self.analyze_hand_movement(perception)
             return (message, timestamp) if message else (None, None)
             
         except Exception as e:
-            print(f"Hand movement 분석 중 오류: {str(e)}")
+            logger.warning("Hand movement 분석 중 오류: %s", e)
             return None, None
 
 
     #  몸 좌우 흔들기
-    def analyze_side_movement(self, frame_bgr):
-        landmarks = self.get_landmarks(frame_bgr)
+    def analyze_side_movement(self, perception):
+        landmarks = perception.pose
 
         if landmarks is None:
             return None
-        
-        if len(landmarks) < 13:
-            return None
 
-        # 어깨 좌표
-        left_shoulder = landmarks[11]
-        right_shoulder = landmarks[12]
-        
-        # 평균 x, y, z
-        midpoint_x = (left_shoulder.x + right_shoulder.x) / 2
-        midpoint_y = (left_shoulder.y + right_shoulder.y) / 2
-        midpoint_z = (left_shoulder.z + right_shoulder.z) / 2  # 3D 좌표
-        
-        # left_shoulder_x, right_shoulder_x = landmarks[11].x, landmarks[12].x
-        # midpoint_x = (left_shoulder_x + right_shoulder_x) / 2  # 중앙 좌표 계산
+        # 어깨(11, 12) 중심 x, y, z (3D 좌표)
+        midpoint = landmarks[11:13].mean(axis=0)
 
         # baseline 없으면 세팅
         if self.side_movement_baseline_3d is None:
-            self.side_movement_baseline_3d = (midpoint_x, midpoint_y, midpoint_z)
-            self.last_baseline_time = time.time()
+            self.side_movement_baseline_3d = midpoint
+            self.last_baseline_time = self.clock()
             return None
         
         # 주기적으로 baseline 다시 잡기 (예: 30초마다)
-        if (time.time() - self.last_baseline_time) > self.rebaseline_interval:  # time.time() 직접 호출로 매번 시간 갱신함
-            self.side_movement_baseline_3d = (midpoint_x, midpoint_y, midpoint_z)
-            self.last_baseline_time = time.time()
+        if (self.clock() - self.last_baseline_time) > self.rebaseline_interval:  # clock() 직접 호출로 매번 시간 갱신함
+            self.side_movement_baseline_3d = midpoint
+            self.last_baseline_time = self.clock()
             return None
         
-        # 좌우(앞뒤) 이동 거리 계산
-        base_x, base_y, base_z = self.side_movement_baseline_3d      
-
         # x,z 좌표 차이로 "좌우 흔들림" 판단 (z좌표는 카메라에 대한 상대적인 값임)
         # (y축은 상하이므로, 좌우 흔들림은 x+z만 고려하는 예시이다!!)
-        # move_dist = np.sqrt((midpoint_x - base_x)**2 + (midpoint_z - base_z)**2)
-
-        # x축 움직임에 더 큰 가중치를 부여했음!!! 개선사항
-        x_weight = 1.5
-        z_weight = 0.3
-        move_dist = np.sqrt(
-            x_weight * (midpoint_x - base_x)**2 + 
-            z_weight * (midpoint_z - base_z)**2
-        )
+        # x축 움직임에 더 큰 가중치를 부여했음!!! 개선사항 (x: 1.5, y: 0, z: 0.3)
+        move_dist = float(np.sqrt(SIDE_MOVE_WEIGHTS @ (midpoint - self.side_movement_baseline_3d) ** 2))
 
         # threshold는 실험적으로 조정
         # mediapipe의 x,z가 -1 ~ 1 범위라면 0.05는 약 5% 이동한 것
@@ -262,141 +503,82 @@ class ActionAnalyzer:
         return None
 
 
-    def analyze_side_movement_with_priority_queue(self, frame_bgr, timestamp):
-        """우선순위 큐를 사용하여 좌우 움직임 분석"""
+    def analyze_side_movement_with_priority_queue(self, frame_bgr, timestamp, perception=None):
+        """랜드마크 히스토리를 사용하여 좌우 움직임 분석"""
         try:
-            processed_frame = self.process_frame(frame_bgr)
-            if processed_frame is None:
+            # 공유 인식 결과가 없으면 여기서 한 번 계산
+            if perception is None:
+                perception = self.perceive(frame_bgr)
+            if perception is None:
                 return None, None
                 
-            self.frame_counter += 1
-            heapq.heappush(self.side_movement_heap, (self.frame_counter, processed_frame))
-            
-            while len(self.side_movement_heap) > 20:
-                heapq.heappop(self.side_movement_heap)
-            
-            if len(self.side_movement_heap) < 2:
+            # 랜드마크 히스토리에 기록 (프레임 픽셀은 보관하지 않음)
+            if self.record(timestamp, perception) < 2:
                 return None, None
 
-            _, latest_frame = self.side_movement_heap[-1]
-            message = self.analyze_side_movement(latest_frame)
+            # 가장 최근 프레임(= 이번 프레임)의 인식 결과로 분석
+            message = self.analyze_side_movement(perception)
             return (message, timestamp) if message else (None, None)
             
         except Exception as e:
-            print(f"Side movement 분석 중 오류: {str(e)}")
+            logger.warning("Side movement 분석 중 오류: %s", e)
             return None, None
 
 
     # 눈과 손의 거리 확인 함수
     def is_hand_near_eye(self, face_landmarks, hand_landmarks):
-        # Face mesh는 468개 점 (정확히는 478점일 수도 있음), 안전하게 400 이상 체크
-        if len(face_landmarks) < 468 or len(hand_landmarks) < 21:  # 대략 468개가 풀 페이스
+        """
+        face_landmarks : (468, 3) 얼굴 한 개, hand_landmarks : (21, 3) 손 한 개 또는 (손 수, 21, 3)
+        모든 손 x 두 눈 거리를 한 번에 계산해서 하나라도 가까우면 True
+        """
+        if len(face_landmarks) < FACE_POINTS or hand_landmarks.shape[-2] < HAND_POINTS:
             return False
 
-        left_eye_points = [33, 133, 159, 145]  # 왼쪽 눈 주요 랜드마크
-        right_eye_points = [362, 263, 386, 374]  # 오른쪽 눈 주요 랜드마크
+        eyes = eye_centers(face_landmarks)  # (2, 3)
+        fingers = finger_centers(hand_landmarks).reshape(-1, 1, 3)  # (손 수, 1, 3)
+        distances = self.euclidean_distance(eyes, fingers)  # (손 수, 2)
 
-        # 검지, 중지, 약지 tips (인덱스: 8, 12, 16)
-        # 최대 21개(0~20) => 이하 체크
-        if len(hand_landmarks) < 17:
-            return False
-        
-        index_finger_tips = [hand_landmarks[8], hand_landmarks[12], hand_landmarks[16]]  # 검지, 중지, 약지
-        
-        
-        # 평균 좌표 계산하여 눈 영역 생성
-        def get_eye_center(eye_idxs):
-            valid_points = [face_landmarks[i] for i in eye_idxs]
-            if valid_points is None:  # 유효한 점이 없다면 None 반환
-                return None
-            avg_x = np.mean([point.x for point in valid_points])
-            avg_y = np.mean([point.y for point in valid_points])
-            avg_z = np.mean([point.z for point in valid_points])
-            return NormalizedLandmark(x=avg_x, y=avg_y, z=avg_z)
-        
-        left_eye_center = get_eye_center(left_eye_points)
-        right_eye_center = get_eye_center(right_eye_points)
-        
-        if left_eye_center is None or right_eye_center is None:
-            print("[오류] 얼굴 랜드마크 정보 부족")
-            return False
-        
-        # 손가락 끝 중앙 좌표 계산
-        valid_finger_points = [lm for lm in index_finger_tips if lm is not None]
-        if not valid_finger_points:
-            print("[오류] 손가락 랜드마크 정보 부족")
-            return False
-        
-        # 손가락 끝 중앙 좌표 계산
-        avg_x = np.mean([lm.x for lm in valid_finger_points])
-        avg_y = np.mean([lm.y for lm in valid_finger_points])
-        avg_z = np.mean([lm.z for lm in valid_finger_points])
-        finger_center = NormalizedLandmark(x=avg_x, y=avg_y, z=avg_z)
-        
-        # 두 눈 중 하나라도 손가락 끝이 가까우면 True 반환
-        left_distance = self.euclidean_distance(left_eye_center, finger_center)
-        right_distance = self.euclidean_distance(right_eye_center, finger_center)
-        
         # 거리 임계값 설정 (조정 가능)
         threshold_distance = 0.1
         
-        if left_distance < threshold_distance or right_distance < threshold_distance:
-            print(f"[CHECK] 눈 근처 거리: {left_distance:.4f}, {right_distance:.4f}")
+        if (distances < threshold_distance).any():
+            logger.debug("[CHECK] 눈 근처 거리: %s", np.round(distances, 4).tolist())
             return True # 손이 눈 근처임을 나타냄
         return False
 
 
     # 눈 만지기 행동 분석 함수
-    def analyze_eye_touch(self, frame_bgr):
-        if frame_bgr is None or frame_bgr.size == 0:
-            return None
-        
+    def analyze_eye_touch(self, perception):
         try:
-            # 입력 이미지 크기 표준화 (160x120 -> 320x180)
-            frame_bgr = cv2.resize(frame_bgr, (320, 180), interpolation=cv2.INTER_LINEAR)
-            
-            if frame_bgr.dtype != np.uint8:
-                frame_bgr = frame_bgr.astype(np.uint8)
-            
-            frame_bgr = np.ascontiguousarray(frame_bgr)
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            
-            face_results = self.face_mesh.process(frame_rgb)
-            hand_results = self.hands.process(frame_rgb)                           
-            
-            if not face_results.multi_face_landmarks or not hand_results.multi_hand_landmarks:
+            if not len(perception.faces) or not len(perception.hands):
                 return None
 
-            for face_lms in face_results.multi_face_landmarks:
-                for hand_lms in hand_results.multi_hand_landmarks:
-                    if self.is_hand_near_eye(face_lms.landmark, hand_lms.landmark):
-                        return "[눈_CHECK] 눈을 만지고 있습니다!!!!!"
+            for face in perception.faces:
+                if self.is_hand_near_eye(face, perception.hands):
+                    return "[눈_CHECK] 눈을 만지고 있습니다!!!!!"
             return None
         except Exception as e:
-            print(f"Eye touch 분석 중 오류: {str(e)}")
+            logger.warning("Eye touch 분석 중 오류: %s", e)
             return None
 
 
-    def analyze_eye_touch_with_priority_queue(self, frame_bgr, timestamp):
-        """우선순위 큐를 사용하여 눈 터치 동작 분석"""
+    def analyze_eye_touch_with_priority_queue(self, frame_bgr, timestamp, perception=None):
+        """랜드마크 히스토리를 사용하여 눈 터치 동작 분석"""
         try:
-            processed_frame = self.process_frame(frame_bgr)
-            if processed_frame is None:
+            # 공유 인식 결과가 없으면 여기서 한 번 계산
+            if perception is None:
+                perception = self.perceive(frame_bgr)
+            if perception is None:
                 return None, None
                 
-            self.frame_counter += 1
-            heapq.heappush(self.eye_touch_heap, (self.frame_counter, processed_frame))
-            
-            while len(self.eye_touch_heap) > 20:
-                heapq.heappop(self.eye_touch_heap)
-
-            if len(self.eye_touch_heap) < 2:
+            # 랜드마크 히스토리에 기록 (프레임 픽셀은 보관하지 않음)
+            if self.record(timestamp, perception) < 2:
                 return None, None
 
-            _, latest_frame = self.eye_touch_heap[-1]
-            message = self.analyze_eye_touch(latest_frame)
+            # 가장 최근 프레임(= 이번 프레임)의 인식 결과로 분석
+            message = self.analyze_eye_touch(perception)
             return (message, timestamp) if message else (None, None)
             
         except Exception as e:
-            print(f"Eye touch 분석 중 오류: {str(e)}")
+            logger.warning("Eye touch 분석 중 오류: %s", e)
             return None, None
\ No newline at end of file
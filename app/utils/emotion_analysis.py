@@ -1,10 +1,108 @@
-from deepface import DeepFace
+import os
+import logging
+import threading
 
-def analyze_emotion(frame):
+import cv2
+import numpy as np
+
+from app.utils.emotion_backends import get_backend
+from app.utils.emotion_batcher import EmotionBatcher
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# 감정 라벨 순서 (DeepFace Emotion.labels, 모델 출력 순서와 동일 / 내보낸 onnx, tflite 모델도 같은 순서)
+# 감정 모델은 처음 감정 분석할 때 로드 (감정 분석을 쓰지 않는 서비스는 로드하지 않음, 백엔드는 emotion_backends)
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# 여러 요청의 얼굴을 모아서 한 번에 추론할 때의 최대 배치 크기 / 최대 대기 시간
+EMOTION_BATCH_SIZE = int(os.environ.get("SOSWEET_EMOTION_BATCH_SIZE", "16"))
+EMOTION_BATCH_WAIT_MS = float(os.environ.get("SOSWEET_EMOTION_BATCH_WAIT_MS", "5"))
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def _predict_emotion_batch(face_batch):
+    """(N, 48, 48) 흑백 얼굴 -> (N, 7) 감정 확률 (현재 백엔드의 감정 모델을 배치로 실행)"""
+    return get_backend().predict(face_batch)
+
+
+def emotion_model_loaded():
+    """감정 모델이 로드됐으면 백엔드 이름, 아니면 False"""
+    backend = get_backend()
+    return backend.name if backend.loaded else False
+
+
+def get_emotion_batcher():
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmotionBatcher(
+                    _predict_emotion_batch,
+                    max_batch_size=EMOTION_BATCH_SIZE,
+                    max_wait_ms=EMOTION_BATCH_WAIT_MS,
+                )
+    return _batcher
+
+
+def emotion_queue_depth():
+    """배치 대기 중인 얼굴 수 (배처가 아직 없으면 0)"""
+    return _batcher.queue_depth() if _batcher is not None else 0
+
+
+def detect_face(frame):
+    """현재 백엔드의 얼굴 검출 -> (224x224 얼굴, 정규화 박스 (x0, y0, x1, y1), confidence)"""
+    return get_backend().detect_face(frame)
+
+
+def crop_face(frame, box):
+    """추적 중인 정규화 박스 영역만 잘라 224x224 입력으로 만든다 (검출기 생략)"""
+    return get_backend().crop_face(frame, box)
+
+
+def preprocess_face(face_img):
+    """224x224 얼굴 -> 감정 모델 입력(48x48 흑백), DeepFace Emotion.predict 와 동일"""
+    img_gray = cv2.cvtColor(face_img[0], cv2.COLOR_BGR2GRAY)
+    return cv2.resize(img_gray, (48, 48))
+
+
+def build_emotion_scores(emotion_predictions):
+    # 확률 벡터 -> 감정별 백분율 점수
+    sum_of_predictions = emotion_predictions.sum()
+    return {
+        label: float(100 * emotion_predictions[i] / sum_of_predictions)
+        for i, label in enumerate(EMOTION_LABELS)
+    }
+
+
+def find_face(frame, tracker=None):
+    """
+    세션 추적기가 박스를 갖고 있으면 그 영역만 자르고,
+    아니면 전체 프레임에서 얼굴 검출 후 추적기에 반영
+    """
+    if tracker is not None:
+        box = tracker.tracked_box()
+        if box is not None:
+            face_img = crop_face(frame, box)
+            if face_img is not None:
+                return face_img
+
+    face_img, box, confidence = detect_face(frame)
+    if tracker is not None:
+        tracker.update(box, confidence)
+    return face_img
+
+
+def analyze_emotion(frame, tracker=None):
     try:
-        # 감정 분석
-        analysis = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False)
-        emotion_scores = analysis[0]['emotion']
+        # 감정 분석 (얼굴 검출/추적은 요청별로, 감정 분류는 동시 요청들과 묶어서 배치로)
+        with timed("face_detect"):
+            face_input = preprocess_face(find_face(frame, tracker))
+        with timed(get_backend().name):
+            emotion_predictions = np.asarray(get_emotion_batcher().predict(face_input))
+        emotion_scores = build_emotion_scores(emotion_predictions)
 
         # Dominant 감정 계산
         dominant_emotion = max(emotion_scores, key=emotion_scores.get)
@@ -17,9 +115,9 @@ def analyze_emotion(frame):
         }
 
     except Exception as e:
-        print(f"Error during emotion analysis: {e}")
+        logger.warning("Error during emotion analysis: %s", e)
         return {
             "dominant_emotion": "error",
             "percentage": 0,
             "emotion_scores": {}
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,302 @@
+import os
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 감정 분류 백엔드 (SOSWEET_EMOTION_BACKEND)
+# - deepface : DeepFace 감정 모델 (TensorFlow / Keras), 얼굴 검출도 DeepFace opencv 검출기 + 눈 정렬
+# - onnx     : 같은 모델을 ONNX 로 내보낸 파일을 onnxruntime 으로 실행 (TensorFlow 를 로드하지 않음)
+# - tflite   : 같은 모델을 TFLite 로 내보낸 파일을 tflite_runtime 으로 실행
+# onnx / tflite 의 얼굴 검출은 DeepFace opencv 검출기와 같은 Haar cascade 를 cv2 로 직접 돌린다 (눈 정렬 없음)
+# 모델 파일은 python -m app.utils.emotion_export 로 만든다
+EMOTION_BACKEND = os.environ.get("SOSWEET_EMOTION_BACKEND", "deepface").lower()
+# 내보낸 모델 파일 경로 (없으면 SOSWEET_EMOTION_MODEL_DIR 아래 emotion[.int8].onnx / .tflite)
+EMOTION_MODEL_PATH = os.environ.get("SOSWEET_EMOTION_MODEL", "")
+EMOTION_MODEL_DIR = os.environ.get(
+    "SOSWEET_EMOTION_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models"),
+)
+# 1 이면 int8 양자화한 모델 파일 사용
+EMOTION_INT8 = os.environ.get("SOSWEET_EMOTION_INT8", "0") == "1"
+# onnx / tflite 추론 스레드 수 (워커를 여러 개 띄우는 서버에서는 1 이 기본)
+EMOTION_THREADS = int(os.environ.get("SOSWEET_EMOTION_THREADS", "1"))
+
+# 감정 모델 입력 (48x48 흑백) / 얼굴 크롭 크기 (DeepFace 전처리와 동일)
+EMOTION_INPUT_SIZE = (48, 48)
+FACE_TARGET_SIZE = (224, 224)
+
+MODEL_EXTENSIONS = {"onnx": ".onnx", "tflite": ".tflite"}
+
+
+def default_model_path(backend_name, int8=False):
+    """내보낸 감정 모델 파일의 기본 위치 (emotion_export 와 백엔드가 같이 사용)"""
+    suffix = ".int8" if int8 else ""
+    return os.path.join(EMOTION_MODEL_DIR, f"emotion{suffix}{MODEL_EXTENSIONS[backend_name]}")
+
+
+def resize_face(img, target_size=FACE_TARGET_SIZE):
+    """
+    얼굴 크롭 -> 비율 유지 리사이즈 + 가운데 패딩 (1, 224, 224, 3) float32
+    deepface.modules.preprocessing.resize_image 와 같은 계산을 TensorFlow 없이
+    """
+    factor = min(target_size[0] / img.shape[0], target_size[1] / img.shape[1])
+    img = cv2.resize(img, (int(img.shape[1] * factor), int(img.shape[0] * factor)))
+
+    diff_0 = target_size[0] - img.shape[0]
+    diff_1 = target_size[1] - img.shape[1]
+    img = np.pad(
+        img,
+        ((diff_0 // 2, diff_0 - diff_0 // 2), (diff_1 // 2, diff_1 - diff_1 // 2), (0, 0)),
+        "constant",
+    )
+    if img.shape[0:2] != target_size:
+        img = cv2.resize(img, target_size)
+
+    img = np.expand_dims(img.astype(np.float32), axis=0)
+    if img.max() > 1:
+        img = img / 255.0
+    return img
+
+
+class DeepFaceBackend:
+    """DeepFace 감정 모델 / 얼굴 검출 (기본값)"""
+    name = "deepface"
+
+    def __init__(self):
+        self.model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def load(self):
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    from deepface import DeepFace
+
+                    self.model = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+        return self.model
+
+    def predict(self, face_batch):
+        """(N, 48, 48) 흑백 얼굴 -> (N, 7) 감정 확률"""
+        return self.load().model.predict(face_batch, verbose=0)
+
+    def detect_face(self, frame):
+        """
+        DeepFace.analyze 와 같은 방식으로 첫 번째 얼굴을 찾아 224x224 입력으로 만든다
+        (enforce_detection=False 이므로 얼굴이 없으면 프레임 전체가 얼굴로 들어옴)
+        반환: (224x224 얼굴, 정규화 박스 (x0, y0, x1, y1), confidence)
+        """
+        from deepface.modules import detection, preprocessing
+
+        img_objs = detection.extract_faces(
+            img_path=frame,
+            detector_backend="opencv",
+            enforce_detection=False,
+            grayscale=False,
+            align=True,
+            expand_percentage=0,
+            anti_spoofing=False,
+        )
+
+        height, width = frame.shape[:2]
+        for img_obj in img_objs:
+            img_content = img_obj["face"]
+            if img_content.shape[0] == 0 or img_content.shape[1] == 0:
+                continue
+            # rgb to bgr 후 224x224 로 맞춤 (DeepFace 내부 전처리와 동일)
+            img_content = img_content[:, :, ::-1]
+            face_img = preprocessing.resize_image(img=img_content, target_size=FACE_TARGET_SIZE)
+
+            area = img_obj["facial_area"]
+            box = (
+                area["x"] / width,
+                area["y"] / height,
+                (area["x"] + area["w"]) / width,
+                (area["y"] + area["h"]) / height,
+            )
+            return face_img, box, img_obj.get("confidence") or 0.0
+
+        raise ValueError("감정 분석할 얼굴 영역이 없습니다.")
+
+    def crop_face(self, frame, box):
+        """추적 중인 정규화 박스 영역만 잘라 224x224 입력으로 만든다 (검출기 생략)"""
+        from deepface.modules import preprocessing
+
+        height, width = frame.shape[:2]
+        x0, y0 = max(0, int(box[0] * width)), max(0, int(box[1] * height))
+        x1, y1 = min(width, int(box[2] * width)), min(height, int(box[3] * height))
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        face = frame[y0:y1, x0:x1] / 255  # extract_faces 와 같은 [0, 1] 정규화
+        return preprocessing.resize_image(img=face, target_size=FACE_TARGET_SIZE)
+
+
+class LiteBackend(ABC):
+    """
+    내보낸 감정 모델 파일을 가벼운 CPU 런타임으로 실행하는 백엔드 공통 부분
+    - 얼굴 검출은 cv2 Haar cascade (DeepFace opencv 검출기와 같은 cascade / 파라미터, 눈 정렬은 생략)
+    - 모델 입력은 (N, 48, 48, 1) float32, 출력은 DeepFace 와 같은 순서의 (N, 7) 확률
+    """
+    name = None
+
+    def __init__(self, model_path=None, int8=EMOTION_INT8, num_threads=EMOTION_THREADS):
+        self.model_path = model_path or EMOTION_MODEL_PATH or default_model_path(self.name, int8)
+        self.num_threads = max(1, num_threads)
+        self.model = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # CascadeClassifier 는 스레드마다 따로
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def load(self):
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    if not os.path.exists(self.model_path):
+                        raise FileNotFoundError(
+                            f"감정 모델 파일이 없습니다: {self.model_path} "
+                            f"(python -m app.utils.emotion_export --format {self.name} 로 생성)"
+                        )
+                    self.model = self._load_model(self.model_path)
+                    logger.info("감정 모델 로드 완료 (%s: %s)", self.name, self.model_path)
+        return self.model
+
+    def predict(self, face_batch):
+        """(N, 48, 48) 흑백 얼굴 -> (N, 7) 감정 확률"""
+        model = self.load()
+        inputs = np.ascontiguousarray(face_batch, dtype=np.float32).reshape(-1, *EMOTION_INPUT_SIZE, 1)
+        return self._run(model, inputs)
+
+    @abstractmethod
+    def _load_model(self, model_path):
+        """모델 파일 -> 런타임 모델 객체"""
+
+    @abstractmethod
+    def _run(self, model, inputs):
+        """(N, 48, 48, 1) float32 입력 -> (N, 7) 감정 확률"""
+
+    def _cascade(self):
+        cascade = getattr(self._local, "cascade", None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+            self._local.cascade = cascade
+        return cascade
+
+    def detect_face(self, frame):
+        """
+        Haar cascade 로 첫 번째 얼굴을 찾아 224x224 입력으로 만든다
+        얼굴이 없으면 DeepFace(enforce_detection=False) 처럼 프레임 전체를 confidence 0 으로 사용
+        반환: (224x224 얼굴, 정규화 박스 (x0, y0, x1, y1), confidence)
+        """
+        height, width = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces, _, weights = self._cascade().detectMultiScale3(gray, 1.1, 10, outputRejectLevels=True)
+
+        x0, y0, x1, y1, confidence = 0, 0, width, height, 0.0
+        if len(faces):
+            x, y, w, h = (int(v) for v in faces[0])
+            x0, y0, x1, y1 = x, y, x + w, y + h
+            # Haar level weight 를 0~1 로 (추적기 FACE_MIN_CONFIDENCE 비교용)
+            confidence = float(np.clip(np.ravel(weights)[0] / 10.0, 0.0, 1.0))
+
+        face_img = resize_face(frame[y0:y1, x0:x1] / 255)
+        return face_img, (x0 / width, y0 / height, x1 / width, y1 / height), confidence
+
+    def crop_face(self, frame, box):
+        """추적 중인 정규화 박스 영역만 잘라 224x224 입력으로 만든다 (검출기 생략)"""
+        height, width = frame.shape[:2]
+        x0, y0 = max(0, int(box[0] * width)), max(0, int(box[1] * height))
+        x1, y1 = min(width, int(box[2] * width)), min(height, int(box[3] * height))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return resize_face(frame[y0:y1, x0:x1] / 255)
+
+
+class OnnxBackend(LiteBackend):
+    """ONNX Runtime (CPU) 로 감정 모델 실행"""
+    name = "onnx"
+
+    def _load_model(self, model_path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_name = session.get_inputs()[0].name
+        return session
+
+    def _run(self, session, inputs):
+        return session.run(None, {self._input_name: inputs})[0]
+
+
+class TFLiteBackend(LiteBackend):
+    """TFLite 인터프리터로 감정 모델 실행 (tflite_runtime / ai_edge_litert, 없으면 tensorflow.lite)"""
+    name = "tflite"
+
+    def _load_model(self, model_path):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            try:
+                from ai_edge_litert.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+
+        interpreter = Interpreter(model_path=model_path, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        self._input_index = interpreter.get_input_details()[0]["index"]
+        self._output_index = interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+        self._run_lock = threading.Lock()
+        return interpreter
+
+    def _run(self, interpreter, inputs):
+        # 인터프리터는 스레드 안전하지 않고, 배치 크기가 바뀔 때만 텐서를 다시 할당
+        with self._run_lock:
+            if inputs.shape[0] != self._batch_size:
+                interpreter.resize_tensor_input(self._input_index, inputs.shape)
+                interpreter.allocate_tensors()
+                self._batch_size = inputs.shape[0]
+            interpreter.set_tensor(self._input_index, inputs)
+            interpreter.invoke()
+            return interpreter.get_tensor(self._output_index).copy()
+
+
+BACKENDS = {
+    "deepface": DeepFaceBackend,
+    "onnx": OnnxBackend,
+    "tflite": TFLiteBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 감정 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
+
+
+def get_backend():
+    """SOSWEET_EMOTION_BACKEND 로 고른 프로세스 공용 백엔드 (모델은 처음 추론할 때 로드)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(EMOTION_BACKEND)
+    return _backend
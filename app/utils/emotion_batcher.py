@@ -0,0 +1,61 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class EmotionBatcher:
+    """
+    여러 요청의 얼굴 입력을 잠깐(max_wait_ms) 모았다가 감정 모델을 한 번에 돌리는 단계
+    - 배치 크기가 max_batch_size 에 도달하거나 대기 시간이 지나면 바로 실행
+    - 결과(감정별 확률 벡터)는 각 요청의 Future 로 돌려준다
+    """
+    def __init__(self, predict_batch, max_batch_size=16, max_wait_ms=5):
+        self.predict_batch = predict_batch  # (N, ...) 입력 -> (N, 감정 수) 확률
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, face_input):
+        future = Future()
+        self._queue.put((face_input, future))
+        return future
+
+    def predict(self, face_input, timeout=None):
+        """얼굴 입력 1개에 대한 확률 벡터 (배치에 묻어서 계산될 때까지 대기)"""
+        return self.submit(face_input).result(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        # 첫 요청은 올 때까지 기다리고, 이후는 마감 시간까지만 모은다
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+            try:
+                inputs = np.stack([face_input for face_input, _ in batch])
+                predictions = self.predict_batch(inputs)
+                for future, prediction in zip(futures, predictions):
+                    future.set_result(prediction)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
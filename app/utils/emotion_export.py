@@ -0,0 +1,84 @@
+import os
+import argparse
+
+from app.utils.emotion_backends import EMOTION_INPUT_SIZE, default_model_path
+
+# DeepFace 감정 모델(Keras)을 onnx / tflite 백엔드가 읽는 모델 파일로 내보내는 CLI
+# (TensorFlow / deepface 와 변환 도구는 내보낼 때만 필요하고, 서버는 onnxruntime / tflite_runtime 만 있으면 됨)
+#
+# 사용법:
+#   python -m app.utils.emotion_export --format onnx            # models/emotion.onnx (tf2onnx 필요)
+#   python -m app.utils.emotion_export --format onnx --int8     # models/emotion.int8.onnx (+ fp32 파일)
+#   python -m app.utils.emotion_export --format tflite --int8   # models/emotion.int8.tflite
+#
+# int8 은 가중치만 int8 로 저장하고 활성값은 실행 중에 양자화하는 방식 (보정 데이터 불필요)
+# 내보낸 뒤 python -m benchmarks.emotion_parity --backend onnx 로 DeepFace 와 결과를 비교할 것
+
+
+def load_keras_model():
+    from deepface import DeepFace
+
+    return DeepFace.build_model(model_name="Emotion", task="facial_attribute").model
+
+
+def export_onnx(model, output_path, opset=13):
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = [tf.TensorSpec((None, *EMOTION_INPUT_SIZE, 1), tf.float32, name="face")]
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=output_path)
+
+
+def quantize_onnx(fp32_path, int8_path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+
+def export_tflite(model, output_path, int8=False):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def export(fmt, int8=False, output_path=None):
+    """감정 모델을 fmt(onnx / tflite)로 내보내고 만든 파일 경로 반환"""
+    output_path = output_path or default_model_path(fmt, int8)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    model = load_keras_model()
+
+    if fmt == "onnx":
+        fp32_path = default_model_path("onnx") if int8 else output_path
+        if int8 and output_path == fp32_path:
+            raise ValueError("int8 모델 경로가 fp32 모델 경로와 같습니다")
+        export_onnx(model, fp32_path)
+        if int8:
+            quantize_onnx(fp32_path, output_path)
+    elif fmt == "tflite":
+        export_tflite(model, output_path, int8)
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+
+    return output_path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="DeepFace 감정 모델을 onnx / tflite 파일로 내보내기")
+    parser.add_argument("--format", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--int8", action="store_true", help="가중치 int8 양자화")
+    parser.add_argument("--output", default=None, help="출력 파일 (기본: SOSWEET_EMOTION_MODEL_DIR/emotion[.int8].<형식>)")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    output_path = export(args.format, args.int8, args.output)
+    print(f"내보내기 완료: {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB)")
+    return output_path
+
+
+if __name__ == "__main__":
+    run(parse_args())
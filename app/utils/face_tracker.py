@@ -0,0 +1,78 @@
+import os
+import threading
+
+import numpy as np
+
+# 추적 중인 얼굴 박스를 재사용하다가 몇 프레임마다 전체 검출을 다시 돌릴지
+FACE_REDETECT_INTERVAL = int(os.environ.get("SOSWEET_FACE_REDETECT_INTERVAL", "10"))
+# 검출 confidence 가 이보다 낮으면 박스를 재사용하지 않음
+FACE_MIN_CONFIDENCE = float(os.environ.get("SOSWEET_FACE_MIN_CONFIDENCE", "0"))
+# FaceMesh 얼굴 영역과의 겹침(IoU)이 이보다 낮아지면 다시 검출
+FACE_MIN_IOU = float(os.environ.get("SOSWEET_FACE_MIN_IOU", "0.3"))
+
+
+def box_iou(a, b):
+    """정규화 박스 (x0, y0, x1, y1) 두 개의 IoU"""
+    ix0, iy0 = max(a[0], b[0]), max(a[1], b[1])
+    ix1, iy1 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix1 - ix0) * max(0.0, iy1 - iy0)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def face_box_from_landmarks(landmarks):
+    """FaceMesh 랜드마크 배열 (N, 3) (정규화 좌표) -> 정규화 박스"""
+    x0, y0 = np.min(landmarks[:, :2], axis=0)
+    x1, y1 = np.max(landmarks[:, :2], axis=0)
+    return (float(x0), float(y0), float(x1), float(y1))
+
+
+class FaceTracker:
+    """
+    세션별 얼굴 박스 추적 캐시
+    - 마지막으로 검출된 얼굴 박스를 재사용해서 그 영역만 잘라 감정 분류
+    - N 프레임마다, 또는 confidence / FaceMesh 와의 겹침이 떨어지면 전체 검출을 다시 수행
+    박스는 해상도와 무관하도록 정규화 좌표 (x0, y0, x1, y1) 로 보관
+    """
+    def __init__(self, redetect_interval=FACE_REDETECT_INTERVAL,
+                 min_confidence=FACE_MIN_CONFIDENCE, min_iou=FACE_MIN_IOU):
+        self.redetect_interval = redetect_interval
+        self.min_confidence = min_confidence
+        self.min_iou = min_iou
+        self.box = None
+        self.confidence = 0.0
+        self.frames_since_detect = 0
+        self.hint_box = None  # 최근 FaceMesh 얼굴 영역
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.box = None
+            self.confidence = 0.0
+            self.frames_since_detect = 0
+            self.hint_box = None
+
+    def set_hint(self, hint_box):
+        with self._lock:
+            self.hint_box = hint_box
+
+    def tracked_box(self):
+        """재사용 가능한 박스가 있으면 반환하고 프레임 수를 센다, 없으면 None (전체 검출 필요)"""
+        with self._lock:
+            if self.box is None:
+                return None
+            if self.frames_since_detect >= self.redetect_interval:
+                return None
+            if self.confidence <= self.min_confidence:
+                return None
+            if self.hint_box is not None and box_iou(self.box, self.hint_box) < self.min_iou:
+                return None
+            self.frames_since_detect += 1
+            return self.box
+
+    def update(self, box, confidence):
+        """전체 검출 결과 반영 (얼굴을 못 찾았으면 box=None)"""
+        with self._lock:
+            self.box = box
+            self.confidence = confidence
+            self.frames_since_detect = 0
@@ -11,14 +11,18 @@ def calculate_emo_result(emotion_data):
         for emotion, score in emotion_scores.items():
             emotion_counter[emotion] += score
     
+    return summarize_emo_scores(emotion_counter)
+
+
+def summarize_emo_scores(emotion_sums):
     # 전체 합계를 구해서 100% 기준으로 변환
-    total_score = sum(emotion_counter.values())
+    total_score = sum(emotion_sums.values())
     if total_score == 0:
         return {}, {}
     
     # 100% 기준으로 정규화하고 소수점 없이 반올림
     normalized_scores = {
-        emotion: round((score / total_score) * 100, 0) for emotion, score in emotion_counter.items()
+        emotion: round((score / total_score) * 100, 0) for emotion, score in emotion_sums.items()
     }
     
     # 점수 내림차순으로 정렬
@@ -30,6 +34,42 @@ def calculate_emo_result(emotion_data):
     return sorted_emotion_scores, top_3_emotions
 
 
+# 세션 감정 누적값 (저장 시점에 갱신 -> 피드백 요청 시 전체 기록을 다시 읽지 않음)
+def new_emo_aggregate():
+    return {
+        "score_sums": {},       # 감정별 점수 합
+        "frame_count": 0,       # 저장된 프레임 수
+        "dominant_counts": {},  # dominant 감정 히스토그램
+    }
+
+
+def update_emo_aggregate(aggregate, entry):
+    score_sums = aggregate["score_sums"]
+    for emotion, score in entry.get("emotion_scores", {}).items():
+        score_sums[emotion] = score_sums.get(emotion, 0) + score
+
+    aggregate["frame_count"] += 1
+
+    dominant_emotion = entry.get("dominant_emotion")
+    if dominant_emotion is not None:
+        dominant_counts = aggregate["dominant_counts"]
+        dominant_counts[dominant_emotion] = dominant_counts.get(dominant_emotion, 0) + 1
+    return aggregate
+
+
+def build_emo_aggregate(emotion_data):
+    """기존 기록 전체로 누적값을 처음부터 계산 (스냅샷이 없을 때 한 번만 사용)"""
+    aggregate = new_emo_aggregate()
+    for entry in emotion_data:
+        update_emo_aggregate(aggregate, entry)
+    return aggregate
+
+
+def calculate_emo_result_from_aggregate(aggregate):
+    # calculate_emo_result 와 같은 결과를 누적값만으로 계산
+    return summarize_emo_scores(aggregate["score_sums"])
+
+
 # 반환 시점에 변환
 def convert_to_korean(dominant_emotion):
     emotion_kor = {
@@ -0,0 +1,313 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from app.utils.frame_utils import PreparedFrame
+from app.utils.emotion_analysis import analyze_emotion
+from app.utils.session_registry import action_sessions
+from app.utils.face_tracker import face_box_from_landmarks
+from app.utils.inference_pool import get_inference_pool, InferenceUnavailable
+from app.utils.metrics import timed, record_timings, frames_total, current_endpoint, stage_errors_total
+
+logger = logging.getLogger(__name__)
+
+# 워커 풀 사용 시 한 프레임을 기다리는 최대 시간(초)
+INFERENCE_TIMEOUT = float(os.environ.get("SOSWEET_INFERENCE_TIMEOUT", "30"))
+
+# 사람 프레임의 감정 분석(DeepFace)을 동작 분석(MediaPipe)과 동시에 돌리는 스레드 수 (0 이면 순서대로 실행)
+# 두 런타임 모두 추론 중에는 GIL 을 놓으므로 프레임 지연이 두 단계의 합이 아니라 긴 쪽에 가까워진다
+STAGE_WORKERS = int(os.environ.get("SOSWEET_STAGE_WORKERS", "4"))
+# 감정 단계 결과를 기다리는 최대 시간(초), 넘으면 감정만 실패로 처리하고 동작 결과는 그대로 반환
+EMOTION_STAGE_TIMEOUT = float(os.environ.get("SOSWEET_EMOTION_STAGE_TIMEOUT", "10"))
+
+# 단계가 실패했을 때 대신 돌려주는 결과 (emotion_analysis 의 실패 결과와 같은 모양)
+EMOTION_FAILED = {"dominant_emotion": "error", "percentage": 0, "emotion_scores": {}}
+NO_ACTIONS = {"is_hand": 0, "is_side": 0, "is_eye": 0}
+
+_stage_executor = None
+_stage_executor_lock = threading.Lock()
+_stage_pending = 0  # 실행을 기다리는 감정 단계 수 (/metrics 큐 길이)
+
+# 행동별 메시지 발송 임계치 (누적 감지 횟수)
+HAND_MESSAGE_THRESHOLD = 2
+SIDE_MESSAGE_THRESHOLD = 5
+EYE_MESSAGE_THRESHOLD = 4
+
+
+def update_action_counters(counters, hand_movement_result, side_movement_result, eye_touch_result):
+    """
+    이번 프레임 감지 결과로 카운터를 갱신하고,
+    이번 프레임에서 임계치를 넘겼는지 (0 또는 1) 를 반환
+    """
+    is_actions = {
+        "is_hand": 0,
+        "is_side": 0,
+        "is_eye": 0,
+    }
+
+    # 1) 손 움직임
+    if hand_movement_result:
+        counters["hand_count"] += 1
+        logger.debug("[손_CHECK]손 산만함 1회 감지")
+
+        # 조건 설정) 임계치 누적 시 -> 메시지 발송 & 카운트 리셋
+        if counters["hand_count"] >= HAND_MESSAGE_THRESHOLD:
+            counters["hand_message_count"] += 1
+            # 이번 프레임에서 임계치 도달했으므로, 반환값 1
+            is_actions["is_hand"] = 1
+            # 카운터 리셋
+            counters["hand_count"] = 0
+
+    # 2) 몸 좌우 흔들기
+    if side_movement_result:
+        counters["side_move_count"] += 1
+        logger.debug("[몸흔들었음_CHECK] 몸 좌우로 흔들기 1회 감지")
+
+        if counters["side_move_count"] >= SIDE_MESSAGE_THRESHOLD:
+            counters["side_move_message_count"] += 1
+            is_actions["is_side"] = 1
+            counters["side_move_count"] = 0
+
+    # 3) 눈 만지기
+    if eye_touch_result:
+        counters["eye_touch_count"] += 1
+        logger.debug("[눈 만졌음_CHECK] 눈 손으로 만지기 1회 감지")
+
+        if counters["eye_touch_count"] >= EYE_MESSAGE_THRESHOLD:
+            counters["eye_touch_message_count"] += 1
+            is_actions["is_eye"] = 1
+            counters["eye_touch_count"] = 0
+
+    return is_actions
+
+
+def analyze_frame_emotion(frame_bgr, session=None):
+    """감정 분석 (emotion_analysis 는 RGB를 원함), 세션이 있으면 얼굴 박스 추적 캐시 사용"""
+    frame_rgb = PreparedFrame.wrap(frame_bgr).get(color="rgb")
+    tracker = session.face_tracker if session is not None else None
+    return analyze_emotion(frame_rgb, tracker)
+
+
+def analyze_frame_actions(session, frame_bgr, timestamp, perception=None):
+    """
+    세션 상태로 동작 분석 후 (is_actions, counters 스냅샷) 반환
+    timestamp는 클라이언트에서 넘어온 논리적 시간 (1씩 증가하는 값)
+    perception 을 넘기면 (변화 없는 프레임) 추론 없이 그 결과로 감지기만 돌린다
+    """
+    action_analyzer = session.analyzer
+    if perception is None:
+        # Pose / FaceMesh / Hands 는 프레임당 한 번만 돌리고 결과를 세 감지기가 공유
+        perception = action_analyzer.perceive(frame_bgr)
+        session.last_perception = perception
+
+        # FaceMesh 가 찾은 얼굴 영역은 다음 프레임 감정 분석의 얼굴 추적 검증에 사용
+        if perception is not None and len(perception.faces):
+            session.face_tracker.set_hint(face_box_from_landmarks(perception.faces[0]))
+
+    with session.lock:
+        session.frame_counter += 1  # 프레임 카운터 증가
+        # 손
+        hand_movement_result, _ = action_analyzer.analyze_hand_movement_with_priority_queue(
+            frame_bgr, timestamp, perception
+        )
+        # 몸
+        side_movement_result, _ = action_analyzer.analyze_side_movement_with_priority_queue(
+            frame_bgr, timestamp, perception
+        )
+        # 눈
+        eye_touch_result, _ = action_analyzer.analyze_eye_touch_with_priority_queue(
+            frame_bgr, timestamp, perception
+        )
+
+        is_actions = update_action_counters(
+            session.counters, hand_movement_result, side_movement_result, eye_touch_result
+        )
+        counters = dict(session.counters)
+
+    return is_actions, counters
+
+
+def get_stage_executor():
+    """감정 단계를 돌리는 프로세스 공용 스레드 풀 (처음 쓸 때 생성, STAGE_WORKERS 가 0 이면 None)"""
+    global _stage_executor
+    if STAGE_WORKERS <= 0:
+        return None
+    if _stage_executor is None:
+        with _stage_executor_lock:
+            if _stage_executor is None:
+                _stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="sosweet-stage")
+    return _stage_executor
+
+
+def stage_queue_depth():
+    """스레드를 기다리는 감정 단계 수"""
+    return _stage_pending
+
+
+def _add_pending(amount):
+    global _stage_pending
+    with _stage_executor_lock:
+        _stage_pending += amount
+
+
+def _emotion_stage(frame_bgr, session, queued=False):
+    if queued:
+        _add_pending(-1)
+    with timed("emotion"):
+        return analyze_frame_emotion(frame_bgr, session)
+
+
+def _action_stage(session, frame_bgr, timestamp):
+    try:
+        with timed("action"):
+            return analyze_frame_actions(session, frame_bgr, timestamp)
+    except Exception as e:
+        # 동작 분석이 실패해도 감정 결과는 돌려주도록 이번 프레임은 감지 없음으로 처리
+        logger.warning("동작 분석 실패: %s", e)
+        with session.lock:
+            return dict(NO_ACTIONS), dict(session.counters)
+
+
+def _join_emotion(future, submitted_at):
+    # 시간 제한은 동작 분석을 기다린 시간까지 포함해서 제출 시점부터 잰다
+    remaining = max(0.0, EMOTION_STAGE_TIMEOUT - (time.monotonic() - submitted_at))
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        # 늦게 끝나는 결과는 버림 (세션의 얼굴 추적 상태만 갱신됨), 아직 시작 전이면 취소
+        if future.cancel():
+            _add_pending(-1)
+        stage_errors_total.inc(current_endpoint.get(), "emotion")
+        logger.warning("감정 분석 시간 초과 (%.1f초)", EMOTION_STAGE_TIMEOUT)
+    except Exception as e:
+        logger.warning("감정 분석 실패: %s", e)
+    return dict(EMOTION_FAILED)
+
+
+def analyze_frame_stages(session, frame_bgr, timestamp):
+    """
+    감정 / 동작 분석을 동시에 실행하고 (emotion_result, is_actions, counters) 반환
+    감정은 스레드 풀에서, 동작은 호출 스레드에서 돌리고 단계별로 실패 / 시간 초과를 처리한다
+    (한 단계가 실패해도 다른 단계 결과는 그대로 반환)
+    """
+    executor = get_stage_executor()
+    if executor is None:
+        future = None
+    else:
+        # 단계 시간이 같은 엔드포인트 / 워커의 capture_timings 로 기록되도록 컨텍스트를 복사해서 실행
+        _add_pending(1)
+        submitted_at = time.monotonic()
+        try:
+            future = executor.submit(contextvars.copy_context().run, _emotion_stage, frame_bgr, session, True)
+        except RuntimeError:  # 종료 중인 풀
+            _add_pending(-1)
+            future = None
+
+    is_actions, counters = _action_stage(session, frame_bgr, timestamp)
+
+    if future is not None:
+        emotion_result = _join_emotion(future, submitted_at)
+    else:
+        try:
+            emotion_result = _emotion_stage(frame_bgr, session)
+        except Exception as e:
+            logger.warning("감정 분석 실패: %s", e)
+            emotion_result = dict(EMOTION_FAILED)
+    return emotion_result, is_actions, counters
+
+
+def analyze_human_frame(room_id, user_id, timestamp, frame_bgr):
+    """사람 면접자 프레임 1장 분석 (감정 + 동작)"""
+    session = action_sessions.get((room_id, user_id))
+    # 움직임 비교 / 감정 / Pose / FaceMesh+Hands 가 해상도별 버퍼를 공유
+    frame_bgr = PreparedFrame.wrap(frame_bgr)
+
+    # 마지막 분석 프레임과 거의 같으면 감정 / 랜드마크는 재사용하고 카운터만 진행
+    reused = session.can_reuse(frame_bgr)
+    if reused:
+        emotion_result = session.last_emotion
+        is_actions, counters = analyze_frame_actions(
+            session, frame_bgr, timestamp, session.last_perception
+        )
+    else:
+        emotion_result, is_actions, counters = analyze_frame_stages(session, frame_bgr, timestamp)
+        session.remember_emotion(emotion_result)
+
+    return {
+        "emotion": emotion_result,
+        "actions": is_actions,
+        "counters": counters,
+        "reused": reused,
+    }
+
+
+def analyze_ai_frame(room_id, user_id, timestamp, frame_bgr):
+    """AI 면접관 화면 프레임 1장 분석 (감정만)"""
+    session = action_sessions.get((room_id, user_id))
+    frame_bgr = PreparedFrame.wrap(frame_bgr)
+    if session.can_reuse(frame_bgr):
+        return {"emotion": session.last_emotion, "reused": True}
+
+    emotion_result = analyze_frame_emotion(frame_bgr, session)
+    session.remember_emotion(emotion_result)
+    return {"emotion": emotion_result, "reused": False}
+
+
+def reset_action_session(room_id, user_id):
+    """면접 종료 시 해당 세션의 큐 초기화"""
+    session = action_sessions.peek((room_id, user_id))
+    if session is not None:
+        session.reset()
+
+
+def warmup():
+    """모델을 미리 로드 (워커 시작 시 첫 요청 지연 방지)"""
+    import numpy as np
+    from app.utils.action_analysis import model_pool
+
+    dummy = PreparedFrame(np.zeros((480, 640, 3), dtype=np.uint8))
+    analyze_frame_emotion(dummy)
+    model_pool.perceive(dummy)
+
+
+def _reset_task(room_id, user_id, timestamp, frame_bgr):
+    reset_action_session(room_id, user_id)
+
+
+# 워커 프로세스에서 실행할 작업 종류
+TASKS = {
+    "human": analyze_human_frame,
+    "ai": analyze_ai_frame,
+    "reset": _reset_task,
+}
+
+
+def run_task(kind, room_id, user_id, timestamp=None, frame_bgr=None):
+    """
+    워커 풀이 켜져 있으면 세션 고정 워커에 보내고, 아니면 현재 스레드에서 바로 실행
+    같은 (room_id, user_id) 는 항상 같은 워커로 가므로 시간적 상태가 한 곳에 유지된다
+    frame_bgr 은 ndarray 또는 PreparedFrame (워커에는 디코딩된 원본만 공유 메모리로 보내고 워커에서 다시 감쌈)
+    """
+    pool = get_inference_pool()
+    if pool is None:
+        result = TASKS[kind](room_id, user_id, timestamp, frame_bgr)
+    else:
+        # 워커에서 잰 단계별 시간은 결과와 같이 돌아오므로 요청 프로세스의 히스토그램에 기록
+        if isinstance(frame_bgr, PreparedFrame):
+            frame_bgr = frame_bgr.source
+        # 워커가 멈췄거나 죽었으면 InferenceUnavailable (라우트에서 503)
+        future = pool.submit((room_id, user_id), kind, (room_id, user_id, timestamp), frame_bgr)
+        try:
+            result, timings = future.result(timeout=INFERENCE_TIMEOUT)
+        except FutureTimeoutError:
+            # 워커가 멈췄을 수 있으므로 표시해 두면 계속 응답이 없을 때 풀이 강제 종료 후 재시작 (슬롯 반납)
+            pool.report_timeout((room_id, user_id))
+            raise InferenceUnavailable(f"추론 워커 응답 시간 초과 ({INFERENCE_TIMEOUT:.0f}초)") from None
+        record_timings(timings)
+
+    if isinstance(result, dict) and "reused" in result:
+        frames_total.inc(current_endpoint.get(), "reused" if result["reused"] else "analyzed")
+    return result
@@ -1,9 +1,100 @@
+import os
+
 import numpy as np
 import cv2
 import base64
 
+from app.utils.metrics import timed
+
+# 분석 단계가 쓰는 가장 큰 입력 해상도 (Pose 640x480)
+# JPEG 원본이 이 크기의 2 / 4 / 8 배 이상이면 디코딩하면서 바로 줄인다 (IMREAD_REDUCED_COLOR_*, DCT 단계에서 축소)
+ANALYSIS_SIZE = (640, 480)
+# 0 이면 줄여서 디코딩하지 않고 항상 원본 해상도로 디코딩
+REDUCED_DECODE = os.environ.get("SOSWEET_REDUCED_DECODE", "1") != "0"
+
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+_COLOR_CODES = {
+    "rgb": cv2.COLOR_BGR2RGB,
+    "gray": cv2.COLOR_BGR2GRAY,
+}
+# 크기 정보가 있는 JPEG SOF 마커 (DHT / JPG / DAC 제외)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class PreparedFrame:
+    """
+    프레임 1장에서 파생되는 해상도 / 색공간 버퍼를 한 번씩만 만들어 공유 (해상도 피라미드)
+    - source : 디코딩된 BGR 이미지 (큰 JPEG 는 줄여서 디코딩된 것)
+    - get(size, color) : (width, height) 로 줄이고 "bgr" / "rgb" / "gray" 로 변환한 이미지 (처음 요청할 때 만들고 캐시)
+    감정(RGB 원본) / Pose(640x480 RGB) / FaceMesh+Hands(320x180 RGB) / 움직임 비교(32x24 흑백)가 같은 버퍼를 나눠 쓴다
+    """
+    __slots__ = ("source", "_cache")
+
+    def __init__(self, source):
+        if source.dtype != np.uint8:
+            source = source.astype(np.uint8)
+        self.source = np.ascontiguousarray(source)
+        self._cache = {}
+
+    @classmethod
+    def wrap(cls, frame):
+        """ndarray 면 감싸고, 이미 PreparedFrame 이거나 None 이면 그대로 반환"""
+        if frame is None or isinstance(frame, cls):
+            return frame
+        return cls(frame)
+
+    @property
+    def size(self):
+        """(width, height)"""
+        return self.source.shape[1], self.source.shape[0]
+
+    def get(self, size=None, color="bgr", interpolation=cv2.INTER_LINEAR):
+        """size 가 None 이면 원본 해상도, 색 변환은 줄인 뒤에 해서 비용 최소화"""
+        if size is not None and tuple(size) == self.size:
+            size = None
+        key = (size and tuple(size), color, interpolation if size else None)
+        image = self._cache.get(key)
+        if image is not None:
+            return image
+
+        if color == "bgr":
+            if size is None:
+                return self.source
+            with timed("resize"):
+                image = cv2.resize(self.source, tuple(size), interpolation=interpolation)
+        else:
+            base = self.get(size, "bgr", interpolation)
+            with timed("color_convert"):
+                image = cv2.cvtColor(base, _COLOR_CODES[color])
+
+        self._cache[key] = image
+        return image
+
+
 def decode_frame_func(frame):
+    with timed("decode"):
+        return _decode_frame(frame)
+
+
+def prepare_frame(frame, min_size=ANALYSIS_SIZE):
+    """
+    data_url / 바이너리 프레임 -> PreparedFrame
+    min_size 보다 충분히 큰 JPEG 는 줄여서 디코딩 (분석에 안 쓰는 해상도는 아예 만들지 않음)
+    """
+    with timed("decode"):
+        return PreparedFrame(_decode_frame(frame, min_size if REDUCED_DECODE else None))
+
+
+def _decode_frame(frame, min_size=None):
     try:
+        # 바이너리 본문(JPEG/WebP 원본)은 base64 단계 없이 바로 디코딩
+        if isinstance(frame, (bytes, bytearray, memoryview)):
+            return decode_frame_bytes(frame, min_size)
+
         # data_url 에서 base64 데이터 추출
         if ',' in frame:
             base64_data = frame.split(',')[1]
@@ -12,20 +103,67 @@ def decode_frame_func(frame):
         
         # Base64 디코딩하여 numpy array로 변환
         img_data = base64.b64decode(base64_data)
-        np_img = np.frombuffer(img_data, dtype=np.uint8)
-        decoded_frame = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
-        
-        if decoded_frame is None:
-            raise ValueError("이미지 디코딩 실패")
-            
-        if decoded_frame.size == 0:  # 빈 배열 체크
-            raise ValueError("빈 이미지 데이터")
-        
-        # print(f"[디버그] 디코딩된 이미지 해상도: {decoded_frame.shape}")
-        return decoded_frame
+        return decode_frame_bytes(img_data, min_size)
         
     except Exception as e:
         raise ValueError(f"Frame decoding 실패: {str(e)}")
+
+
+def jpeg_size(np_img):
+    """JPEG 헤더(SOF 마커)만 읽어서 (width, height) 반환, JPEG 가 아니거나 못 찾으면 None"""
+    n = len(np_img)
+    if n < 4 or np_img[0] != 0xFF or np_img[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < n:
+        if np_img[i] != 0xFF:
+            return None
+        marker = int(np_img[i + 1])
+        if marker == 0xFF:  # 채움 바이트
+            i += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = (int(np_img[i + 5]) << 8) | int(np_img[i + 6])
+            width = (int(np_img[i + 7]) << 8) | int(np_img[i + 8])
+            return width, height
+        if marker == 0xD9 or marker == 0xDA:  # 이미지 끝 / 스캔 시작 전에 SOF 가 없으면 포기
+            return None
+        i += 2 + ((int(np_img[i + 2]) << 8) | int(np_img[i + 3]))
+    return None
+
+
+def reduced_decode_flag(np_img, min_size):
+    """줄여도 min_size 이상이 유지되는 가장 큰 축소 비율의 imdecode 플래그 (줄일 수 없으면 IMREAD_COLOR)"""
+    size = jpeg_size(np_img) if min_size else None
+    if size is None:
+        return cv2.IMREAD_COLOR
+
+    width, height = size
+    min_width, min_height = min_size
+    for scale, flag in _REDUCED_FLAGS:
+        if width // scale >= min_width and height // scale >= min_height:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_frame_bytes(buffer, min_size=None):
+    """
+    인코딩된 이미지 버퍼(bytes / memoryview)를 BGR 이미지로 디코딩
+    np.frombuffer 는 버퍼를 복사하지 않고 그대로 감싼다
+    min_size(width, height) 를 주면 큰 JPEG 는 그 크기 이상으로만 줄여서 디코딩
+    """
+    np_img = np.frombuffer(buffer, dtype=np.uint8)
+    decoded_frame = cv2.imdecode(np_img, reduced_decode_flag(np_img, min_size))
+    
+    if decoded_frame is None:
+        raise ValueError("이미지 디코딩 실패")
+        
+    if decoded_frame.size == 0:  # 빈 배열 체크
+        raise ValueError("빈 이미지 데이터")
+    
+    # print(f"[디버그] 디코딩된 이미지 해상도: {decoded_frame.shape}")
+    return decoded_frame
     
 
 # width와 height는 해상도 설정할 값임 (픽셀 단위)
@@ -0,0 +1,342 @@
+import os
+import time
+import atexit
+import logging
+import queue
+import threading
+import itertools
+import zlib
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import connection as mp_connection, shared_memory
+
+import numpy as np
+
+# 워커 수: 0 이면 풀을 쓰지 않고 요청 스레드에서 바로 추론, "auto" 면 CPU 코어 수
+INFERENCE_WORKERS = os.environ.get("SOSWEET_INFERENCE_WORKERS", "0")
+# 워커당 공유 메모리 프레임 슬롯 수 (동시에 처리 대기할 수 있는 프레임 수)
+SLOTS_PER_WORKER = int(os.environ.get("SOSWEET_SLOTS_PER_WORKER", "4"))
+# 슬롯 하나의 최대 크기 (기본 1920x1080 BGR)
+MAX_FRAME_BYTES = int(os.environ.get("SOSWEET_MAX_FRAME_BYTES", str(1920 * 1080 * 3)))
+# 빈 슬롯을 기다리는 최대 시간 (초), 넘으면 InferenceUnavailable (워커가 멈췄거나 밀려 있음)
+SLOT_TIMEOUT = float(os.environ.get("SOSWEET_SLOT_TIMEOUT", "5"))
+# 작업 시간 초과로 unhealthy 표시된 워커가 이 시간(초) 동안 아무 결과도 보내지 않으면 멈춘 것으로 보고 강제 종료 후 재시작
+WORKER_HUNG_TIMEOUT = float(os.environ.get("SOSWEET_WORKER_HUNG_TIMEOUT", "30"))
+# 죽은 / 멈춘 워커를 확인하는 주기 (초)
+WORKER_CHECK_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceUnavailable(RuntimeError):
+    """워커가 응답하지 않거나 죽어서 지금 추론할 수 없음 (HTTP 503)"""
+
+
+def _worker_main(worker_id, slot_names, task_queue, result_conn):
+    """
+    워커 프로세스 본체
+    - 시작 시 DeepFace / ActionAnalyzer 모델을 미리 로드
+    - 결과는 워커 전용 파이프로 보냄 (공유 큐의 쓰기 락을 쥔 채로 죽어서 다른 워커까지 막는 일이 없도록)
+    - 공유 메모리 슬롯에 놓인 BGR 프레임을 복사해서 추론
+      (결과를 보내면 슬롯이 다음 요청에 재사용되므로, 시간 초과로 늦게 끝나는 감정 단계가 덮어쓰인 슬롯을 읽지 않도록)
+    """
+    from app.utils import frame_pipeline
+    from app.utils.log_utils import setup_logging
+    from app.utils.metrics import capture_timings
+
+    setup_logging()
+
+    slots = []
+    for name in slot_names:
+        # spawn 워커는 부모의 resource tracker 를 같이 쓰므로 추적 해제하지 않음
+        # (여기서 해제하면 부모가 unlink 할 때 tracker 에서 KeyError, 슬롯 정리는 부모가 shutdown 에서 담당)
+        slots.append(shared_memory.SharedMemory(name=name))
+
+    try:
+        frame_pipeline.warmup()
+    except Exception as e:
+        logger.warning("[inference worker %s] warmup 실패: %s", worker_id, e)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, slot, shape, dtype, kind, args, inline_frame = task
+        try:
+            if slot is not None:
+                frame_bgr = np.ndarray(shape, dtype=dtype, buffer=slots[slot].buf).copy()
+            else:
+                frame_bgr = inline_frame
+            # 단계별 시간은 워커에서 기록하지 않고 결과와 함께 돌려보냄
+            with capture_timings() as timings:
+                result = frame_pipeline.TASKS[kind](*args, frame_bgr)
+            result_conn.send((task_id, worker_id, slot, True, (result, timings)))
+        except Exception as e:
+            result_conn.send((task_id, worker_id, slot, False, f"{type(e).__name__}: {e}"))
+        finally:
+            frame_bgr = None
+
+    for shm in slots:
+        shm.close()
+
+
+class InferencePool:
+    """
+    CPU 코어당 프로세스 1개인 추론 워커 풀
+    - 디코딩된 BGR 프레임은 pickle 대신 공유 메모리 슬롯으로 전달
+    - 같은 세션 키는 항상 같은 워커로 보냄 (세션 affinity)
+    - 죽은 워커는 다시 띄우고, 그 워커에 맡긴 작업은 InferenceUnavailable 로 실패 처리
+      (워커의 세션 상태는 새 프로세스에서 처음부터 다시 쌓임)
+    - 작업이 시간 초과되면 그 워커를 unhealthy 로 표시하고, WORKER_HUNG_TIMEOUT 동안 응답이 없으면
+      (네이티브 추론 호출에서 멈춤 등) 강제 종료 후 같은 방식으로 재시작해서 슬롯을 돌려받음
+    """
+    def __init__(self, num_workers, slots_per_worker=SLOTS_PER_WORKER, max_frame_bytes=MAX_FRAME_BYTES):
+        self.num_workers = num_workers
+        self.slots_per_worker = slots_per_worker
+        self.max_frame_bytes = max_frame_bytes
+
+        self._ctx = mp.get_context("spawn")  # TF / MediaPipe 상태를 fork 로 물려받지 않도록 spawn 사용
+        self._task_queues = []
+        self._result_conns = []  # worker -> 결과 파이프의 읽는 쪽
+        self._processes = []
+        self._slots = []       # worker -> [SharedMemory]
+        self._free_slots = []  # worker -> queue.Queue(빈 슬롯 번호)
+        self._worker_locks = []  # worker -> 작업 등록 / 재시작 직렬화
+        self._last_response = []   # worker -> 마지막으로 결과를 받은 시각 (monotonic, 시작 시각으로 초기화)
+        self._unhealthy_since = []  # worker -> 작업 시간 초과로 unhealthy 표시된 시각 (정상이면 None)
+        self._futures = {}     # task_id -> (worker_id, slot, Future), 슬롯은 항목을 꺼낸 쪽이 반납
+        self._futures_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._closed = False
+
+        for worker_id in range(num_workers):
+            shms = [
+                shared_memory.SharedMemory(create=True, size=max_frame_bytes)
+                for _ in range(slots_per_worker)
+            ]
+            free = queue.Queue()
+            for i in range(slots_per_worker):
+                free.put(i)
+
+            self._slots.append(shms)
+            self._free_slots.append(free)
+            self._worker_locks.append(threading.Lock())
+            self._last_response.append(None)
+            self._unhealthy_since.append(None)
+            self._task_queues.append(None)
+            self._result_conns.append(None)
+            self._processes.append(None)
+            self._start_worker(worker_id)
+
+        self._listener = threading.Thread(target=self._collect_results, name="inference-results", daemon=True)
+        self._listener.start()
+
+    def _start_worker(self, worker_id):
+        task_queue = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, [shm.name for shm in self._slots[worker_id]], task_queue, writer),
+            name=f"sosweet-inference-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        writer.close()  # 워커가 죽으면 읽는 쪽에서 EOF 를 받도록 부모의 쓰는 쪽은 닫는다
+        self._task_queues[worker_id] = task_queue
+        self._result_conns[worker_id] = reader
+        self._processes[worker_id] = process
+        self._last_response[worker_id] = time.monotonic()
+        self._unhealthy_since[worker_id] = None
+
+    def _is_hung(self, worker_id):
+        """unhealthy 표시 후 WORKER_HUNG_TIMEOUT 동안 결과를 하나도 보내지 않았는지"""
+        since = self._unhealthy_since[worker_id]
+        if since is None:
+            return False
+        if self._last_response[worker_id] >= since:
+            # 표시한 뒤에 결과가 왔으면 느렸을 뿐 살아 있음
+            self._unhealthy_since[worker_id] = None
+            return False
+        return time.monotonic() - since >= WORKER_HUNG_TIMEOUT
+
+    def _ensure_worker(self, worker_id):
+        """워커가 죽었거나 멈췄으면 맡긴 작업을 실패 처리하고 새로 띄움 (worker lock 을 잡고 호출)"""
+        process = self._processes[worker_id]
+        if self._closed:
+            return
+        if process.is_alive():
+            if not self._is_hung(worker_id):
+                return
+            logger.error("추론 워커 %s 가 %.0f초 동안 응답하지 않음, 강제 종료 후 다시 시작", worker_id, WORKER_HUNG_TIMEOUT)
+            process.terminate()
+            process.join(timeout=WORKER_CHECK_INTERVAL)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout=WORKER_CHECK_INTERVAL)
+            reason = f"추론 워커 {worker_id} 가 응답하지 않아 다시 시작했습니다."
+        else:
+            logger.error("추론 워커 %s 종료됨 (exitcode=%s), 다시 시작", worker_id, process.exitcode)
+            reason = f"추론 워커 {worker_id} 가 종료되었습니다."
+
+        with self._futures_lock:
+            lost = [(task_id, entry) for task_id, entry in self._futures.items() if entry[0] == worker_id]
+            for task_id, _ in lost:
+                del self._futures[task_id]
+        for _, (_, slot, future) in lost:
+            if slot is not None:
+                self._free_slots[worker_id].put(slot)
+            future.set_exception(InferenceUnavailable(reason))
+
+        # 죽은 워커의 작업 큐는 비우지 않고 버림 (종료 시 feeder 스레드를 기다리지 않도록)
+        # 이전 결과 파이프는 결과 수집 스레드가 EOF 를 보고 닫는다
+        self._task_queues[worker_id].cancel_join_thread()
+        self._task_queues[worker_id].close()
+        self._start_worker(worker_id)
+
+    def report_timeout(self, session_key):
+        """세션 작업이 시간 초과됨 -> 담당 워커를 unhealthy 로 표시 (계속 응답이 없으면 check_workers 가 재시작)"""
+        worker_id = self.worker_for(session_key)
+        with self._worker_locks[worker_id]:
+            if self._unhealthy_since[worker_id] is None:
+                logger.warning("추론 워커 %s 작업 시간 초과, unhealthy 로 표시", worker_id)
+                self._unhealthy_since[worker_id] = time.monotonic()
+
+    def check_workers(self):
+        """모든 워커 상태 확인 (결과 수집 스레드가 주기적으로 호출)"""
+        for worker_id, lock in enumerate(self._worker_locks):
+            with lock:
+                self._ensure_worker(worker_id)
+
+    def worker_for(self, session_key):
+        """세션 키 -> 워커 번호 (프로세스가 달라도 항상 같은 값이 나오도록 crc32 사용)"""
+        return zlib.crc32(repr(session_key).encode("utf-8")) % self.num_workers
+
+    def submit(self, session_key, kind, args, frame_bgr=None):
+        if self._closed:
+            raise RuntimeError("InferencePool 이 이미 종료되었습니다.")
+
+        worker_id = self.worker_for(session_key)
+        task_id = next(self._task_ids)
+        future = Future()
+
+        slot = None
+        shape = dtype = inline_frame = None
+        if frame_bgr is not None:
+            shape, dtype = frame_bgr.shape, frame_bgr.dtype.str
+            if frame_bgr.nbytes <= self.max_frame_bytes:
+                # 빈 슬롯을 기다렸다가 프레임을 공유 메모리에 한 번만 복사
+                try:
+                    slot = self._free_slots[worker_id].get(timeout=SLOT_TIMEOUT)
+                except queue.Empty:
+                    raise InferenceUnavailable(f"추론 워커 {worker_id} 의 빈 슬롯이 없습니다.") from None
+                view = np.ndarray(frame_bgr.shape, dtype=frame_bgr.dtype, buffer=self._slots[worker_id][slot].buf)
+                view[...] = frame_bgr
+                del view
+            else:
+                # 슬롯보다 큰 프레임은 예외적으로 pickle 로 전달
+                inline_frame = frame_bgr
+
+        with self._worker_locks[worker_id]:
+            self._ensure_worker(worker_id)
+            with self._futures_lock:
+                self._futures[task_id] = (worker_id, slot, future)
+            self._task_queues[worker_id].put((task_id, slot, shape, dtype, kind, args, inline_frame))
+        return future
+
+    def queue_depth(self):
+        """처리 대기 중인 작업 수"""
+        with self._futures_lock:
+            return len(self._futures)
+
+    def _collect_results(self):
+        next_check = time.monotonic() + WORKER_CHECK_INTERVAL
+        while not self._closed:
+            # 다른 워커의 결과가 계속 와도 멈춘 워커를 놓치지 않도록 주기마다 확인
+            if time.monotonic() >= next_check:
+                self.check_workers()
+                next_check = time.monotonic() + WORKER_CHECK_INTERVAL
+
+            conns = {conn: worker_id for worker_id, conn in enumerate(list(self._result_conns))}
+            ready = mp_connection.wait(list(conns), timeout=WORKER_CHECK_INTERVAL)
+
+            for conn in ready:
+                try:
+                    item = conn.recv()
+                except (EOFError, OSError):
+                    # 워커 종료: 재시작 후 이전 파이프 정리
+                    worker_id = conns[conn]
+                    self._processes[worker_id].join(timeout=WORKER_CHECK_INTERVAL)
+                    self.check_workers()
+                    if self._result_conns[worker_id] is not conn:
+                        conn.close()
+                    continue
+                self._last_response[conns[conn]] = time.monotonic()
+                self._set_result(*item)
+
+    def _set_result(self, task_id, worker_id, slot, ok, payload):
+        with self._futures_lock:
+            entry = self._futures.pop(task_id, None)
+        if entry is None:
+            return  # 워커 재시작으로 이미 실패 처리 / 슬롯 반납된 작업
+        if slot is not None:
+            self._free_slots[worker_id].put(slot)
+
+        future = entry[2]
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def shutdown(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        self._listener.join(timeout=5)
+        for conn in self._result_conns:
+            conn.close()
+
+        for shms in self._slots:
+            for shm in shms:
+                shm.close()
+                shm.unlink()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _configured_workers():
+    if INFERENCE_WORKERS == "auto":
+        return os.cpu_count() or 1
+    return int(INFERENCE_WORKERS)
+
+
+def get_inference_pool():
+    """설정된 워커 수만큼 풀을 (처음 호출 시) 띄워서 반환, 비활성화면 None"""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    num_workers = _configured_workers()
+    if num_workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = InferencePool(num_workers)
+            atexit.register(_pool.shutdown)
+    return _pool
+
+
+def current_inference_pool():
+    """이미 띄운 풀 반환 (없으면 None, 새로 띄우지 않음)"""
+    return _pool
@@ -1,34 +1,386 @@
 import os
+import sys
 import json
+import atexit
+import threading
+
+from app.utils.feedback_utils import new_emo_aggregate, update_emo_aggregate, build_emo_aggregate
+from app.utils.session_registry import SessionRegistry
+from app.utils.write_behind import WriteBehindWriter, append_bytes, replace_file
+from app.utils.metrics import timed
+
+# 세션 로그는 한 줄에 레코드 하나인 JSONL 로 저장 (append-only)
+# 예전 형식(JSON 배열, .json)은 읽기만 지원하고 convert_json_array_to_jsonl 로 변환 가능
+LOG_EXT = ".jsonl"
+LEGACY_EXT = ".json"
+# 누적값 등 작은 스냅샷 파일 (매번 통째로 교체)
+SNAPSHOT_EXT = ".snapshot.json"
+
+ACTION_DIRECTORY = "analysis_data/actions"
+
+# 0 이면 요청 스레드에서 바로 파일에 쓰고, 아니면 백그라운드 writer 가 모아서 쓴다 (메모리의 최신값 / 누적값은 항상 바로 갱신)
+WRITE_BEHIND = os.environ.get("SOSWEET_WRITE_BEHIND", "1") != "0"
+# writer 가 작업을 모으는 최대 시간 (ms)
+PERSIST_FLUSH_MS = float(os.environ.get("SOSWEET_PERSIST_FLUSH_MS", "100"))
+# fsync 정책: none (OS 에 맡김) / batch (배치마다, write-behind 를 끄면 쓰기마다 파일별 fsync)
+PERSIST_FSYNC = os.environ.get("SOSWEET_PERSIST_FSYNC", "none") == "batch"
+# 쓰이길 기다리는 작업이 이보다 많으면 저장 요청이 writer 가 따라잡을 때까지 대기
+PERSIST_MAX_PENDING = int(os.environ.get("SOSWEET_PERSIST_MAX_PENDING", "10000"))
+# 디스크에서 읽기 전 / 종료 시 남은 기록을 기다리는 최대 시간 (초)
+PERSIST_FLUSH_TIMEOUT = float(os.environ.get("SOSWEET_PERSIST_FLUSH_TIMEOUT", "10"))
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """백그라운드 writer (처음 저장할 때 생성, write-behind 를 끄면 None)"""
+    global _writer
+    if not WRITE_BEHIND:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteBehindWriter(
+                    flush_interval_ms=PERSIST_FLUSH_MS,
+                    fsync=PERSIST_FSYNC,
+                    max_pending=PERSIST_MAX_PENDING,
+                )
+                # 프로세스가 끝날 때 남은 기록을 모두 쓰고 종료
+                atexit.register(close_writer)
+    return _writer
+
+
+def flush_writes(timeout=PERSIST_FLUSH_TIMEOUT):
+    """지금까지 저장 요청한 기록이 모두 파일에 쓰일 때까지 대기 (파일을 직접 읽기 전에 호출)"""
+    writer = _writer
+    if writer is None:
+        return True
+    return writer.flush(timeout)
+
+
+def close_writer(timeout=PERSIST_FLUSH_TIMEOUT):
+    """남은 기록을 쓰고 writer 종료 (이후 저장은 다시 writer 를 만든다)"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
+
+
+def persist_queue_depth():
+    """쓰이길 기다리는 작업 수"""
+    writer = _writer
+    return writer.queue_depth() if writer is not None else 0
+
+
+def _encode_record(data: dict) -> bytes:
+    return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def append_record(file_path: str, data: dict):
+    """
+    레코드 한 줄을 파일 끝에 추가
+    O_APPEND 로 한 번의 write 만 하므로 기존 내용은 다시 쓰지 않고, 중간에 죽어도 앞 레코드는 안전함
+    """
+    append_bytes(file_path, _encode_record(data), PERSIST_FSYNC)
+
 
 # 공통 JSON 저장 함수
-def save_to_json(directory:str, filename: str, data: dict):
+def save_to_json(directory: str, filename: str, data: dict):
+    file_path = os.path.join(directory, f"{filename}{LOG_EXT}")
+    writer = get_writer()
+    if writer is not None:
+        # 인코딩만 지금 하고 (호출자가 dict 를 나중에 바꿔도 안전) 파일 쓰기는 writer 에 맡김
+        writer.append(file_path, _encode_record(data))
+        return
+
     # 디렉토리가 없다면 생성하기
     os.makedirs(directory, exist_ok=True)
-    
-    file_path = os.path.join(directory, f"{filename}.json")
-    
-    # 기존 데이터 불러오기
-    if os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            existing_data = json.load(f)
+    append_record(file_path, data)
+
+
+def write_snapshot(file_path: str, data: dict):
+    """작은 스냅샷 파일을 임시 파일에 쓴 뒤 os.replace 로 교체 (읽는 쪽은 항상 완전한 파일만 봄)"""
+    replace_file(file_path, data, PERSIST_FSYNC)
+
+
+def save_snapshot(file_path: str, data: dict):
+    """스냅샷 교체 (write-behind 면 writer 에 맡기고, 한 배치 안의 같은 파일은 마지막 것만 씀)"""
+    writer = get_writer()
+    if writer is not None:
+        writer.replace(file_path, data)
     else:
-        existing_data = []
-    
-    # 새 데이터 추가
-    existing_data.append(data)
-    
-    # JSON 파일 저장
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, indent=4, ensure_ascii=False)
+        write_snapshot(file_path, data)
+
+
+def read_snapshot(file_path: str):
+    """스냅샷 파일 읽기 (없거나 손상되었으면 None)"""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def read_jsonl(file_path: str) -> list:
+    """JSONL 파일 읽기 (쓰다 만 마지막 줄은 무시)"""
+    records = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not line.endswith("\n"):
+                break  # 기록 중이던 마지막 줄
+            records.append(json.loads(line))
+    return records
+
+
+def read_last_jsonl_record(file_path: str, block_size: int = 4096):
+    """JSONL 파일의 마지막 완전한 레코드만 뒤에서부터 읽어서 반환 (없으면 None)"""
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while True:
+            # 쓰다 만 마지막 줄(개행 없음)은 버리고 완전한 줄만 본다
+            last_nl = tail.rfind(b"\n")
+            if last_nl != -1:
+                prev_nl = tail.rfind(b"\n", 0, last_nl)
+                if prev_nl != -1 or pos == 0:
+                    line = tail[prev_nl + 1:last_nl].strip()
+                    if line:
+                        return json.loads(line)
+                    tail = tail[:prev_nl + 1]  # 빈 줄은 건너뛴다
+                    continue
+            if pos == 0:
+                return None
+
+            read_size = min(block_size, pos)
+            pos -= read_size
+            f.seek(pos)
+            tail = f.read(read_size) + tail
+
+
+def load_records(directory: str, filename: str):
+    """
+    세션 로그 전체를 list of dict 로 반환 (파일이 없으면 None)
+    예전 JSON 배열 파일이 남아 있으면 그 내용을 앞에 붙인다
+    """
+    legacy_path = os.path.join(directory, f"{filename}{LEGACY_EXT}")
+    log_path = os.path.join(directory, f"{filename}{LOG_EXT}")
+
+    # 아직 writer 큐에 있는 기록까지 읽히도록
+    flush_writes()
+    if not os.path.exists(legacy_path) and not os.path.exists(log_path):
+        return None
+
+    records = []
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            records.extend(json.load(f))
+    if os.path.exists(log_path):
+        records.extend(read_jsonl(log_path))
+    return records
 
 
 # actions 저장 함수
 def save_action_data(room_id: str, user_id: str, data: dict):
-    directory ="analysis_data/actions"
-    filename = f"{room_id}_{user_id}"
-    save_to_json(directory, filename, data)
+    with timed("persist"):
+        directory = ACTION_DIRECTORY
+        filename = f"{room_id}_{user_id}"
+        save_to_json(directory, filename, data)
+
+        # 가장 최근 레코드는 메모리 + 작은 스냅샷 파일에도 기록 (피드백 요청이 전체 기록을 읽지 않도록)
+        with _latest_action_lock:
+            latest = latest_actions.get((room_id, user_id), dict)
+            latest.clear()
+            latest.update(data)
+            save_snapshot(latest_action_path(room_id, user_id), dict(data))
 
 # emotions 저장 함수
 def save_emotion_data(room_id: str, user_id: str, data: dict):
-    save_to_json(f"analysis_data/emotions/{room_id}", user_id, data)
\ No newline at end of file
+    key = (room_id, user_id)
+    with timed("persist"), _emotion_summary_lock(key):
+        # 로그에 추가하기 전에 누적값을 가져와야 (스냅샷이 없을 때) 이번 레코드가 두 번 더해지지 않음
+        aggregate = emotion_summaries.peek(key)
+        if aggregate is None:
+            # 디스크 로드는 registry 락 밖에서 (factory 는 registry 락을 잡은 채로 실행됨)
+            aggregate = _load_emotion_summary_from_disk(room_id, user_id)
+        aggregate = emotion_summaries.get(key, lambda: aggregate)
+        save_to_json(emotion_directory(room_id), user_id, data)
+        update_emo_aggregate(aggregate, data)
+        # writer 가 나중에 직렬화하므로 지금 값의 복사본을 넘김
+        save_snapshot(emotion_summary_path(room_id, user_id), _copy_aggregate(aggregate))
+
+
+# actions 읽기 함수
+def load_action_data(room_id: str, user_id: str):
+    return load_records(ACTION_DIRECTORY, f"{room_id}_{user_id}")
+
+
+def latest_action_path(room_id: str, user_id: str) -> str:
+    return os.path.join(ACTION_DIRECTORY, f"{room_id}_{user_id}.latest{SNAPSHOT_EXT}")
+
+
+# (room_id, user_id) -> 가장 최근 action 레코드
+latest_actions = SessionRegistry(
+    dict,
+    ttl=int(os.environ.get("SOSWEET_SESSION_TTL", "600")),
+    max_sessions=int(os.environ.get("SOSWEET_MAX_SESSIONS", "500")),
+)
+_latest_action_lock = threading.Lock()
+
+
+def load_latest_action(room_id: str, user_id: str):
+    """
+    가장 최근 action 레코드 반환 (없으면 None)
+    메모리 -> 스냅샷 파일 -> JSONL 로그의 마지막 줄 순서로 찾고, 전체 기록은 파싱하지 않는다
+    (로그가 예전 JSON 배열 파일뿐인 세션만 전체를 읽어 마지막 레코드를 사용)
+    메모리에는 이 프로세스가 save_action_data 로 저장한 세션만 있다
+    다른 프로세스가 저장하는 세션(피드백 전용 배포 등)은 매번 스냅샷을 다시 읽고 캐시하지 않는다
+    """
+    key = (room_id, user_id)
+    with _latest_action_lock:
+        latest = latest_actions.peek(key)
+        if latest:
+            return dict(latest)
+
+    # 메모리에 없을 때만 파일을 보므로, 그 전에 큐에 남은 기록을 먼저 쓴다 (read-your-writes)
+    flush_writes()
+    latest = read_snapshot(latest_action_path(room_id, user_id))
+    if latest is None:
+        log_path = os.path.join(ACTION_DIRECTORY, f"{room_id}_{user_id}{LOG_EXT}")
+        latest = read_last_jsonl_record(log_path)
+    if latest is None:
+        records = load_action_data(room_id, user_id)
+        latest = records[-1] if records else None
+    return latest
+
+# emotions 읽기 함수
+def load_emotion_data(room_id: str, user_id: str):
+    return load_records(emotion_directory(room_id), user_id)
+
+
+def emotion_directory(room_id: str) -> str:
+    return f"analysis_data/emotions/{room_id}"
+
+
+def emotion_summary_path(room_id: str, user_id: str) -> str:
+    return os.path.join(emotion_directory(room_id), f"{user_id}.summary{SNAPSHOT_EXT}")
+
+
+# (room_id, user_id) -> 감정 누적값 (오래 안 쓰면 메모리에서 내리고 스냅샷 파일에서 다시 읽음)
+emotion_summaries = SessionRegistry(
+    new_emo_aggregate,
+    ttl=int(os.environ.get("SOSWEET_SESSION_TTL", "600")),
+    max_sessions=int(os.environ.get("SOSWEET_MAX_SESSIONS", "500")),
+)
+# 세션 하나의 누적값 갱신 / 디스크 로드를 직렬화하는 락 (세션 키 해시로 나눠서, 한 세션의 느린 로드가 다른 세션 저장을 막지 않음)
+# 누적값이 메모리에서 내려가도 같은 키는 같은 락을 쓰므로, 다시 읽을 때는 진행 중이던 갱신이 끝난 뒤의 스냅샷을 본다
+_emotion_summary_locks = [threading.Lock() for _ in range(64)]
+
+
+def _emotion_summary_lock(key):
+    return _emotion_summary_locks[hash(key) % len(_emotion_summary_locks)]
+
+
+def _load_emotion_summary_from_disk(room_id: str, user_id: str):
+    """스냅샷 파일 -> 없으면 기존 로그로 한 번만 재계산 -> 로그도 없으면 빈 누적값"""
+    flush_writes()
+    aggregate = read_snapshot(emotion_summary_path(room_id, user_id))
+    if aggregate is not None:
+        return aggregate
+
+    emotion_data = load_emotion_data(room_id, user_id)
+    if emotion_data is None:
+        return new_emo_aggregate()
+
+    aggregate = build_emo_aggregate(emotion_data)
+    write_snapshot(emotion_summary_path(room_id, user_id), aggregate)
+    return aggregate
+
+
+def load_emotion_summary(room_id: str, user_id: str):
+    """
+    세션 감정 누적값 반환 (기록이 전혀 없으면 None)
+    메모리 -> 스냅샷 파일 -> (예전 세션만) 로그 재계산 순서로 찾는다
+    메모리에는 이 프로세스가 save_emotion_data 로 갱신한 세션만 있고,
+    다른 프로세스가 저장하는 세션은 매번 스냅샷을 다시 읽는다 (읽은 값은 캐시하지 않음)
+    """
+    key = (room_id, user_id)
+    with _emotion_summary_lock(key):
+        aggregate = emotion_summaries.peek(key)
+        if aggregate is None:
+            aggregate = _load_emotion_summary_from_disk(room_id, user_id)
+            return aggregate if aggregate["frame_count"] > 0 else None
+
+        # 저장 스레드가 계속 갱신하므로 복사본을 반환
+        return _copy_aggregate(aggregate)
+
+
+def _copy_aggregate(aggregate):
+    return {
+        "score_sums": dict(aggregate["score_sums"]),
+        "frame_count": aggregate["frame_count"],
+        "dominant_counts": dict(aggregate["dominant_counts"]),
+    }
+
+
+def convert_json_array_to_jsonl(json_path: str) -> str:
+    """
+    예전 JSON 배열 파일(.json)을 JSONL(.jsonl)로 변환하고 원본은 삭제
+    이미 .jsonl 이 있으면 배열 내용을 앞에 붙여 순서를 유지한다
+    임시 파일에 쓴 뒤 os.replace 로 교체하므로 변환 도중 죽어도 원본은 남는다
+    """
+    base, _ = os.path.splitext(json_path)
+    jsonl_path = base + LOG_EXT
+    tmp_path = jsonl_path + ".tmp"
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise json.JSONDecodeError("JSON 배열이 아닙니다", "", 0)
+
+    with open(tmp_path, "wb") as out:
+        for record in records:
+            out.write(_encode_record(record))
+        if os.path.exists(jsonl_path):
+            with open(jsonl_path, "rb") as existing:
+                out.write(existing.read())
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, jsonl_path)
+    os.remove(json_path)
+    return jsonl_path
+
+
+def convert_directory(root: str) -> list:
+    """
+    root 아래의 모든 JSON 배열 로그 파일을 JSONL 로 변환
+    이미 손상된 파일(동시 덮어쓰기 등)은 건너뛰고 그대로 둔다
+    """
+    converted = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.endswith(LEGACY_EXT) or name.endswith(SNAPSHOT_EXT):
+                continue
+            json_path = os.path.join(dirpath, name)
+            try:
+                converted.append(convert_json_array_to_jsonl(json_path))
+            except json.JSONDecodeError as e:
+                print(f"손상된 파일이라 변환하지 않음: {json_path} ({e})")
+    return converted
+
+
+if __name__ == "__main__":
+    # 사용법: python -m app.utils.json_utils [analysis_data 경로]
+    target = sys.argv[1] if len(sys.argv) > 1 else "analysis_data"
+    for path in convert_directory(target):
+        print(f"변환 완료: {path}")
@@ -0,0 +1,53 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# 로그 레벨 (DEBUG 면 감지 결과 등 프레임마다 찍히는 로그까지 출력)
+LOG_LEVEL = os.environ.get("SOSWEET_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(processName)s] %(name)s: %(message)s"
+
+_log_queue = None
+_handler = None
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    _listener = QueueListener(_log_queue, _handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def setup_logging(level=LOG_LEVEL):
+    """
+    app.* 로거 설정 (프로세스당 한 번)
+    요청 스레드는 레코드를 큐에 넣기만 하고, 포맷팅 / stderr 출력은 백그라운드 리스너 스레드가 한다
+    """
+    global _log_queue, _handler
+    if _log_queue is not None:
+        return
+
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("app")
+    logger.setLevel(level)
+    logger.addHandler(QueueHandler(_log_queue))
+    logger.propagate = False
+
+    _start_listener()
+    atexit.register(_stop_listener)
+
+
+def restart_after_fork():
+    """fork 된 자식에는 리스너 스레드가 없으므로 같은 큐 / 핸들러로 다시 띄움"""
+    if _log_queue is not None:
+        _start_listener()
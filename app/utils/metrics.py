@@ -0,0 +1,185 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# 단계별 지연 시간 히스토그램 / 카운터 (Prometheus 텍스트 형식으로 /metrics 에서 노출)
+# 프로세스 안에서만 집계하고, 추론 워커 프로세스의 단계 시간은 작업 결과에 실어서 요청 프로세스에 기록한다
+
+# 히스토그램 버킷 경계 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 지금 처리 중인 엔드포인트 (요청 / 스트림 스레드마다 따로)
+current_endpoint = contextvars.ContextVar("sosweet_endpoint", default="none")
+# 워커 프로세스에서 단계 시간을 바로 기록하지 않고 모아두는 목록
+_captured_timings = contextvars.ContextVar("sosweet_captured_timings", default=None)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """라벨 조합별 누적 버킷 히스토그램"""
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # 라벨 값 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        # 버킷은 누적하지 않고 해당 칸에만 더하고, 출력할 때 누적
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """라벨 조합별 누적 카운터"""
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """수집 시점에 콜백으로 값을 읽는 게이지 (큐 길이 / 활성 세션 수 등)"""
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._callbacks = []  # (라벨 값, 콜백)
+        self._lock = threading.Lock()
+
+    def set_function(self, callback, *label_values):
+        with self._lock:
+            self._callbacks = [(l, c) for l, c in self._callbacks if l != label_values]
+            self._callbacks.append((label_values, callback))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for labels, callback in callbacks:
+            try:
+                value = callback()
+            except Exception:
+                continue  # 값을 못 읽는 게이지는 이번 수집에서 빠짐
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "sosweet_stage_seconds", "Latency of one pipeline stage (decode, pose, deepface / onnx / tflite, persist, ...)",
+    ("endpoint", "stage"),
+)
+request_seconds = Histogram(
+    "sosweet_request_seconds", "End-to-end request latency",
+    ("endpoint", "method", "status"),
+)
+requests_total = Counter("sosweet_requests_total", "Handled requests", ("endpoint", "method", "status"))
+stage_errors_total = Counter("sosweet_stage_errors_total", "Pipeline stage failures", ("endpoint", "stage"))
+frames_total = Counter("sosweet_frames_total", "Analyzed frames by outcome (analyzed, reused, dropped)", ("endpoint", "outcome"))
+queue_depth = Gauge("sosweet_queue_depth", "Items waiting in an internal queue", ("queue",))
+active_sessions = Gauge("sosweet_active_sessions", "Sessions currently held in memory", ("kind",))
+
+REGISTRY = [stage_seconds, request_seconds, requests_total, stage_errors_total, frames_total, queue_depth, active_sessions]
+
+
+def observe_stage(stage, seconds, endpoint=None):
+    captured = _captured_timings.get()
+    if captured is not None:
+        captured.append((stage, seconds))
+        return
+    stage_seconds.observe(seconds, endpoint or current_endpoint.get(), stage)
+
+
+@contextmanager
+def timed(stage):
+    """with timed("pose"): ...  블록 실행 시간을 현재 엔드포인트의 단계 히스토그램에 기록 (예외여도 기록)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_errors_total.inc(current_endpoint.get(), stage)
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def capture_timings():
+    """블록 안의 단계 시간을 기록하지 않고 [(stage, seconds)] 로 모음 (워커 프로세스 -> 요청 프로세스 전달용)"""
+    timings = []
+    token = _captured_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _captured_timings.reset(token)
+
+
+def record_timings(timings, endpoint=None):
+    """capture_timings 로 모은 단계 시간을 현재 엔드포인트에 기록"""
+    for stage, seconds in timings or ():
+        observe_stage(stage, seconds, endpoint)
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,58 @@
+import os
+
+import cv2
+import numpy as np
+
+from app.utils.frame_utils import PreparedFrame
+
+# 작은 흑백 썸네일의 평균 픽셀 차이(0~255)가 이 값 이하면 "변화 없음"으로 보고 이전 결과 재사용 (0 이하면 끔)
+MOTION_THRESHOLD = float(os.environ.get("SOSWEET_MOTION_THRESHOLD", "2.0"))
+# 연속으로 재사용할 수 있는 최대 프레임 수 (이후엔 변화가 없어도 다시 분석)
+MOTION_MAX_SKIP = int(os.environ.get("SOSWEET_MOTION_MAX_SKIP", "5"))
+# 비교용 썸네일 크기 (width, height)
+MOTION_THUMB_SIZE = (32, 24)
+
+
+def make_thumbnail(frame_bgr):
+    """프레임(또는 PreparedFrame) -> 비교용 작은 흑백 썸네일 (먼저 줄인 뒤 변환해서 비용 최소화)"""
+    frame = PreparedFrame.wrap(frame_bgr)
+    return frame.get(MOTION_THUMB_SIZE, "gray", interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class MotionGate:
+    """
+    세션의 마지막으로 "분석한" 프레임과 비교해서 거의 같은 프레임이면 추론을 건너뛰도록 알려주는 단계
+    - 직전 프레임이 아니라 마지막 분석 프레임과 비교하므로 아주 느린 변화도 누적되어 감지됨
+    - max_skip 프레임 연속으로 건너뛰면 변화가 없어도 한 번은 다시 분석
+    """
+    def __init__(self, threshold=MOTION_THRESHOLD, max_skip=MOTION_MAX_SKIP):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.last_thumbnail = None
+        self.skipped = 0
+
+    def reset(self):
+        self.last_thumbnail = None
+        self.skipped = 0
+
+    def update(self, frame_bgr):
+        """이번 프레임을 분석한 것으로 보고 기준 썸네일만 갱신 (재사용 판단 / skipped 집계 없이)"""
+        if self.threshold > 0:
+            self.last_thumbnail = make_thumbnail(frame_bgr)
+        self.skipped = 0
+
+    def should_skip(self, frame_bgr):
+        """True 면 이전 분석 결과를 재사용, False 면 이번 프레임을 분석 (기준 썸네일 갱신)"""
+        if self.threshold <= 0:
+            return False
+
+        thumbnail = make_thumbnail(frame_bgr)
+        if self.last_thumbnail is not None and self.skipped < self.max_skip:
+            score = float(np.mean(np.abs(thumbnail - self.last_thumbnail)))
+            if score <= self.threshold:
+                self.skipped += 1
+                return True
+
+        self.last_thumbnail = thumbnail
+        self.skipped = 0
+        return False
@@ -0,0 +1,214 @@
+import os
+import logging
+import threading
+
+from app.utils.session_registry import SessionRegistry
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Kiwi 배치 토크나이즈에 사용할 스레드 수 (0 이면 가용 코어 전부)
+# kiwipiepy 는 버전에 따라 num_workers=0 의 뜻이 달라서 (0.21 부터는 단일 스레드) 항상 실제 스레드 수를 넘긴다
+NLP_WORKERS = int(os.environ.get("SOSWEET_NLP_WORKERS", "0")) or os.cpu_count() or 1
+
+# 말을 더듬는 경우 (감탄사)
+NOWORD_FORMS = {'음', '어'}
+# 한국인이 많이 쓰는 filler word
+FILLER_FORMS = {'아니', '근데', '이건', '진짜', '이거', '좀'}
+# 존댓말 종결 어미
+POLITE_ENDINGS = {'요', '죠', '세요', '에요', '어요', '네요', '나요'}
+
+# 실시간 전사(STT) 세션 상태 유지 시간 / 최대 세션 수
+NLP_SESSION_TTL = int(os.environ.get("SOSWEET_NLP_SESSION_TTL", "600"))
+NLP_MAX_SESSIONS = int(os.environ.get("SOSWEET_NLP_MAX_SESSIONS", "1000"))
+
+# 불용어 (키워드에서 제외)
+STOPWORD_NOUNS = ['최근', '요즘', '다음', '장르', '가이드', '메세지', '안녕', '준비', '감명', '추천', '실시간']
+
+
+def build_kiwi():
+    from kiwipiepy import Kiwi
+
+    kiwi = Kiwi(model_type='sbg', num_workers=NLP_WORKERS)
+    #한국인이 자주 쓰는 filler word: '이건'의 경우 '이거/NP' + 'ㄴ/JX'로 잡힘
+    kiwi.add_user_word('이건', 'IC')
+    return kiwi
+
+
+def build_stopwords():
+    from kiwipiepy.utils import Stopwords
+
+    stopwords = Stopwords()
+    for noun in STOPWORD_NOUNS:
+        stopwords.add((noun, 'NNG'))
+    return stopwords
+
+
+# 사용자 사전 / 불용어는 처음 쓸 때 한 번만 구성 (요청마다 전역 모델을 수정하지 않음)
+# NLP 를 쓰지 않는 서비스는 kiwipiepy 를 로드하지 않는다
+_kiwi = None
+_stopwords = None
+_kiwi_lock = threading.Lock()
+
+
+def get_kiwi():
+    """(Kiwi, Stopwords) 반환, 처음 호출 시 로드"""
+    global _kiwi, _stopwords
+    if _kiwi is None:
+        with _kiwi_lock:
+            if _kiwi is None:
+                _stopwords = build_stopwords()
+                _kiwi = build_kiwi()
+    return _kiwi, _stopwords
+
+
+def kiwi_loaded():
+    return _kiwi is not None
+
+
+def tokenize(script):
+    kiwi, stopwords = get_kiwi()
+    with timed("nlp_tokenize"):
+        return kiwi.tokenize(script, stopwords=stopwords)
+
+
+# Kiwi 가 단일 스레드 모드라서 배치(asyncAnalyze)를 쓸 수 없으면 False 로 바뀌고 발화마다 토크나이즈
+_batch_supported = True
+
+
+def tokenize_batch(scripts):
+    """여러 발화를 Kiwi 멀티스레드 배치로 한 번에 토크나이즈 (입력 순서대로 반환)"""
+    global _batch_supported
+    kiwi, stopwords = get_kiwi()
+    with timed("nlp_tokenize"):
+        if _batch_supported:
+            try:
+                return list(kiwi.tokenize(scripts, stopwords=stopwords))
+            except Exception as e:
+                if "single thread" not in str(e):
+                    raise
+                logger.warning("Kiwi 배치 토크나이즈를 쓸 수 없어 발화마다 처리합니다: %s", e)
+                _batch_supported = False
+        return [kiwi.tokenize(script, stopwords=stopwords) for script in scripts]
+
+
+def count_tokens(tokens):
+    """말 더듬기 / filler 개수와 키워드(NNG) 빈도 계산"""
+    noword_count = 0
+    filler_count = 0
+    keyword_dict = dict()
+
+    for temp in tokens:
+        if temp.form in NOWORD_FORMS and temp.tag == 'IC': #말을 더듬는 경우
+            noword_count += 1
+        if temp.form in FILLER_FORMS: #한국인이 많이 쓰는 filler word
+            filler_count += 1
+        if temp.tag == 'NNG': # 키워드 세기
+            keyword_dict[temp.form] = keyword_dict.get(temp.form, 0) + 1
+
+    return noword_count, filler_count, keyword_dict
+
+
+def ending_flags(tokens):
+    """마지막 토큰으로 (종결되지 않은 문장, 존댓말 사용 안함) 판단"""
+    noend_flag = False
+    nopolite_flag = False
+
+    last = tokens[-1]
+    if last.tag != 'EF' and last.tag != 'JX': # 문장 종결 확인: '취미요'같은 경우 '요'를 보조사(JX)로 잡음
+        noend_flag = True
+    elif last.form not in POLITE_ENDINGS and last.len != 3:
+        nopolite_flag = True
+    return noend_flag, nopolite_flag
+
+
+def analyze_tokens(tokens):
+    """발화 하나의 토큰 -> /api/nlp 응답 형식의 분석 결과"""
+    noword_count, filler_count, keyword_dict = count_tokens(tokens)
+    noend_flag, nopolite_flag = ending_flags(tokens) if tokens else (False, False)
+
+    return build_result(noword_count, filler_count, keyword_dict, noend_flag, nopolite_flag)
+
+
+def build_result(noword_count, filler_count, keyword_dict, noend_flag, nopolite_flag):
+    return {
+        "noword_flag": noword_count > 1,
+        "filler_flag": filler_count > 4,
+        "noend_flag": noend_flag,
+        "nopolite_flag": nopolite_flag,
+        "keyword_dict": keyword_dict,
+    }
+
+
+class TranscriptSession:
+    """
+    실시간 전사 한 세션의 누적 분석 상태
+    - 끝난 문장들의 토큰은 한 번만 세어서 committed 카운트에 더함
+    - 아직 이어질 수 있는 마지막 문장(pending)만 다음 append 때 새 텍스트와 함께 다시 토크나이즈
+    => 전사 전체를 매번 다시 분석하지 않으므로 전체 작업량이 전사 길이에 비례
+    """
+    def __init__(self):
+        self.pending = ''
+        self.noword_count = 0
+        self.filler_count = 0
+        self.keyword_dict = dict()
+        self.last_tokens = []  # 지금까지 전사의 마지막 문장 토큰 (종결 / 존댓말 판단용)
+        self.lock = threading.Lock()
+
+    def _commit(self, tokens):
+        noword_count, filler_count, keyword_dict = count_tokens(tokens)
+        self.noword_count += noword_count
+        self.filler_count += filler_count
+        for form, count in keyword_dict.items():
+            self.keyword_dict[form] = self.keyword_dict.get(form, 0) + count
+
+    def append(self, text, final=False):
+        """
+        새로 붙은 텍스트만 받아서 분석하고 누적 결과 반환
+        final 이면 마지막 문장까지 확정
+        """
+        with self.lock:
+            span = self.pending + text
+            sents = []
+            if span.strip():
+                kiwi, stopwords = get_kiwi()
+                with timed("nlp_tokenize"):
+                    sents = kiwi.split_into_sents(span, stopwords=stopwords, return_tokens=True)
+
+            if sents:
+                # 마지막 문장은 뒤에 텍스트가 더 붙을 수 있으므로 final 이 아니면 보류
+                done = sents if final else sents[:-1]
+                for sent in done:
+                    self._commit(sent.tokens)
+                self.pending = '' if final else span[sents[-1].start:]
+                if sents[-1].tokens:
+                    self.last_tokens = list(sents[-1].tokens)
+            elif final:
+                self.pending = ''
+
+            return self._result(sents[-1].tokens if sents and not final else [])
+
+    def snapshot(self):
+        """새 텍스트 없이 현재 누적 결과만 반환"""
+        with self.lock:
+            tokens = self.last_tokens if self.pending else []
+            return self._result(tokens)
+
+    def _result(self, pending_tokens):
+        # 누적 카운트 + 보류 중인 마지막 문장 카운트 (보류분은 상태에 더하지 않음)
+        noword_count, filler_count, keyword_dict = count_tokens(pending_tokens)
+        for form, count in self.keyword_dict.items():
+            keyword_dict[form] = keyword_dict.get(form, 0) + count
+
+        noend_flag, nopolite_flag = ending_flags(self.last_tokens) if self.last_tokens else (False, False)
+        return build_result(
+            self.noword_count + noword_count,
+            self.filler_count + filler_count,
+            keyword_dict,
+            noend_flag,
+            nopolite_flag,
+        )
+
+
+# (room_id, user_id) -> TranscriptSession (오래 접근 없는 세션은 제거)
+transcript_sessions = SessionRegistry(TranscriptSession, ttl=NLP_SESSION_TTL, max_sessions=NLP_MAX_SESSIONS)
@@ -0,0 +1,343 @@
+import os
+import re
+import glob
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# 녹화된 면접 영상 / 프레임 디렉토리를 API 없이 다시 분석해서 analysis_data/ 로그를 만드는 CLI
+#
+# 사용법:
+#   python -m app.utils.offline_analysis interview.mp4 --room-id room_1 --user-id ming01
+#   python -m app.utils.offline_analysis frames/ --room-id room_1 --user-id ming01 --sample-fps 5 --workers 4 --replace
+#
+# 처리 방식
+# - 샘플링한 프레임을 시간 구간(chunk)으로 나눠서 워커 프로세스들이 병렬로 MediaPipe 인식 + 감정 분석
+#   (구간 앞의 preroll 프레임은 MediaPipe 추적 / 얼굴 박스 추적을 데우는 데만 쓰고 결과는 버림)
+# - 시간에 따라 누적되는 동작 상태(랜드마크 히스토리 / 좌우 baseline / 카운터)는
+#   부모 프로세스가 구간 순서대로 이어 붙여 한 번에 순차 재생하므로 구간 경계와 상관없이 라이브 경로와 같다
+#   (baseline 갱신 주기는 벽시계 대신 프레임 시간 기준)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+# 파일 이름 끝의 숫자를 timestamp(ms) 로 사용 (예: debug_frame_1736178533621.jpg)
+TIMESTAMP_PATTERN = re.compile(r"(\d+)$")
+
+
+#########################################################################################################
+# 입력 샘플링
+
+def sample_video(path, sample_fps, start_timestamp=0):
+    """
+    영상에서 sample_fps 간격으로 고를 프레임 목록 [(timestamp, 프레임 번호)]
+    timestamp 는 start_timestamp(ms) + 영상 안에서의 위치(ms)
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"영상을 열 수 없습니다: {path}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+    # sample_fps 가 0 이하면 모든 프레임
+    interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+    refs = []
+    next_time = 0.0
+    for index in range(frame_count):
+        t = index / fps
+        if t + 1e-9 < next_time:
+            continue
+        refs.append((start_timestamp + int(round(t * 1000)), index))
+        next_time += interval
+        if next_time <= t:
+            next_time = t + interval
+    return refs
+
+
+def sample_directory(path, sample_fps, source_fps, start_timestamp=0):
+    """
+    프레임 디렉토리에서 고를 이미지 목록 [(timestamp, 파일 경로)]
+    파일 이름이 숫자로 끝나면 그 값을 timestamp(ms)로, 아니면 source_fps 기준 순번으로 계산
+    """
+    files = sorted(
+        f for f in glob.glob(os.path.join(path, "*"))
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+    stamped = []
+    for index, file_path in enumerate(files):
+        match = TIMESTAMP_PATTERN.search(os.path.splitext(os.path.basename(file_path))[0])
+        if match:
+            timestamp = int(match.group(1))
+        else:
+            timestamp = start_timestamp + int(round(index * 1000 / source_fps))
+        stamped.append((timestamp, file_path))
+    stamped.sort(key=lambda ref: ref[0])
+
+    interval_ms = 1000.0 / sample_fps if sample_fps > 0 else 0.0
+    refs = []
+    next_time = None
+    for timestamp, file_path in stamped:
+        if next_time is not None and timestamp < next_time:
+            continue
+        refs.append((timestamp, file_path))
+        next_time = timestamp + interval_ms
+    return refs
+
+
+def split_chunks(refs, chunk_seconds, preroll_seconds):
+    """
+    샘플 목록을 시간 구간으로 나눔 -> [(preroll refs, 구간 refs)]
+    preroll 은 구간 시작 직전 preroll_seconds 동안의 샘플 (추적기 예열용)
+    """
+    if not refs:
+        return []
+
+    chunk_ms = max(1, int(chunk_seconds * 1000))
+    preroll_ms = int(preroll_seconds * 1000)
+    origin = refs[0][0]
+
+    groups = []
+    for ref in refs:
+        bucket = (ref[0] - origin) // chunk_ms
+        if not groups or groups[-1][0] != bucket:
+            groups.append((bucket, []))
+        groups[-1][1].append(ref)
+
+    chunks = []
+    start = 0
+    for _, chunk_refs in groups:
+        first_timestamp = chunk_refs[0][0]
+        preroll = [ref for ref in refs[:start] if ref[0] >= first_timestamp - preroll_ms]
+        chunks.append((preroll, chunk_refs))
+        start += len(chunk_refs)
+    return chunks
+
+
+def iter_frames(refs):
+    """프레임 디렉토리 refs 순서대로 (timestamp, BGR 프레임) 읽기"""
+    if not refs:
+        return
+    from app.utils.frame_utils import ANALYSIS_SIZE, REDUCED_DECODE, decode_frame_bytes
+
+    if isinstance(refs[0][1], str):
+        for timestamp, file_path in refs:
+            # 라이브 경로(prepare_frame)와 같이 큰 JPEG 는 분석 해상도 이상으로만 줄여서 디코딩
+            try:
+                with open(file_path, "rb") as f:
+                    frame = decode_frame_bytes(f.read(), ANALYSIS_SIZE if REDUCED_DECODE else None)
+            except (OSError, ValueError, cv2.error):
+                continue
+            yield timestamp, frame
+        return
+
+    raise ValueError("영상 프레임은 iter_video_frames 로 읽어야 합니다.")
+
+
+def iter_video_frames(video_path, refs):
+    capture = cv2.VideoCapture(video_path)
+    try:
+        wanted = {index: timestamp for timestamp, index in refs}
+        first, last = refs[0][1], refs[-1][1]
+        capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+        for index in range(first, last + 1):
+            # 고르지 않은 프레임은 grab 만 하고 디코딩은 건너뜀
+            if not capture.grab():
+                break
+            if index not in wanted:
+                continue
+            ok, frame = capture.retrieve()
+            if ok:
+                yield wanted[index], frame
+    finally:
+        capture.release()
+
+
+#########################################################################################################
+# 워커: 구간 하나의 인식 + 감정 분석 (시간적 상태는 다루지 않음)
+
+def pack_perception(perception):
+    """FramePerception -> 프로세스 간에 보내기 쉬운 float32 배열 묶음 (이미 배열이므로 변환 없음)"""
+    if perception is None:
+        return None
+    return {"pose": perception.pose, "faces": perception.faces, "hands": perception.hands}
+
+
+def unpack_perception(packed):
+    """pack_perception 의 반대 (감지기가 읽는 FramePerception 으로 복원, 랜드마크 객체는 만들지 않음)"""
+    from app.utils.action_analysis import FramePerception
+
+    if packed is None:
+        return None
+    return FramePerception(packed["pose"], packed["faces"], packed["hands"])
+
+
+def _init_worker():
+    # 워커는 요청을 모을 일이 없으므로 감정 배치 대기 시간 없이 바로 추론
+    os.environ["SOSWEET_EMOTION_BATCH_WAIT_MS"] = "0"
+    from app.utils.log_utils import setup_logging
+    setup_logging()
+
+
+def analyze_chunk(task):
+    """
+    구간 하나 분석 -> [(timestamp, packed perception, 감정 결과)]
+    MediaPipe 그래프 / 얼굴 추적기는 워커마다 새로 만들고 preroll 프레임으로 예열한다
+    """
+    from app.utils.action_analysis import ActionModels
+    from app.utils.face_tracker import face_box_from_landmarks
+    from app.utils.frame_pipeline import analyze_frame_emotion
+    from app.utils.frame_utils import PreparedFrame
+    from app.utils.session_registry import ActionSession
+
+    source, preroll, refs = task
+    models = ActionModels()
+    session = ActionSession()  # 얼굴 박스 추적 캐시만 사용
+    preroll_timestamps = {ref[0] for ref in preroll}
+
+    frames = iter_video_frames(source, preroll + refs) if source is not None else iter_frames(preroll + refs)
+    results = []
+    for timestamp, frame_bgr in frames:
+        # 라이브 경로와 같은 순서: 감정 (얼굴 추적) -> 인식 -> FaceMesh 얼굴 영역을 다음 프레임 추적 힌트로
+        frame_bgr = PreparedFrame(frame_bgr)
+        emotion_result = analyze_frame_emotion(frame_bgr, session)
+        perception = models.perceive(frame_bgr)
+        if perception is not None and len(perception.faces):
+            session.face_tracker.set_hint(face_box_from_landmarks(perception.faces[0]))
+
+        if timestamp in preroll_timestamps:
+            continue
+        results.append((timestamp, pack_perception(perception), emotion_result))
+    return results
+
+
+#########################################################################################################
+# 부모: 구간 결과를 순서대로 이어서 시간적 상태 재생 + 저장
+
+class FrameClock:
+    """재생 중인 프레임의 시간(초)을 돌려주는 시계 (좌우 baseline 갱신 주기용)"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def replay_and_save(room_id, user_id, chunk_results):
+    """
+    구간 결과를 시간 순서대로 하나의 세션 상태로 재생하고 라이브 경로와 같은 형식으로 저장
+    반환: 저장한 프레임 수
+    """
+    from app.utils.action_analysis import ActionAnalyzer
+    from app.utils.frame_pipeline import analyze_frame_actions
+    from app.utils.session_registry import ActionSession
+    from app.utils.json_utils import save_action_data, save_emotion_data, flush_writes
+
+    clock = FrameClock()
+    session = ActionSession()
+    session.analyzer = ActionAnalyzer(clock=clock)
+
+    saved = 0
+    for results in chunk_results:
+        for timestamp, packed, emotion_result in results:
+            clock.now = timestamp / 1000.0
+            perception = unpack_perception(packed)
+            if perception is not None:
+                is_actions, counters = analyze_frame_actions(session, None, timestamp, perception)
+            else:
+                # 인식 실패 프레임도 라이브 경로처럼 카운터는 그대로 기록
+                is_actions, counters = {"is_hand": 0, "is_side": 0, "is_eye": 0}, dict(session.counters)
+
+            save_action_data(room_id, user_id, {
+                "timestamp": timestamp,
+                "actions": is_actions,
+                "counters": counters,
+            })
+            save_emotion_data(room_id, user_id, {
+                "timestamp": timestamp,
+                "dominant_emotion": emotion_result["dominant_emotion"],
+                "percentage": emotion_result["percentage"],
+                "emotion_scores": emotion_result.get("emotion_scores", {}),
+            })
+            saved += 1
+
+    # 백그라운드 writer 에 남은 기록까지 파일에 쓴 뒤 반환
+    flush_writes()
+    return saved
+
+
+def remove_session_logs(room_id, user_id):
+    """재분석 전에 기존 로그 / 스냅샷 삭제 (--replace)"""
+    from app.utils.json_utils import (
+        ACTION_DIRECTORY, LOG_EXT, LEGACY_EXT, emotion_directory, emotion_summary_path, latest_action_path,
+    )
+
+    paths = [
+        os.path.join(ACTION_DIRECTORY, f"{room_id}_{user_id}{LOG_EXT}"),
+        os.path.join(ACTION_DIRECTORY, f"{room_id}_{user_id}{LEGACY_EXT}"),
+        latest_action_path(room_id, user_id),
+        os.path.join(emotion_directory(room_id), f"{user_id}{LOG_EXT}"),
+        os.path.join(emotion_directory(room_id), f"{user_id}{LEGACY_EXT}"),
+        emotion_summary_path(room_id, user_id),
+    ]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def run(args):
+    # 출력 루트로 이동하기 전에 입력 경로를 절대 경로로 고정
+    source = os.path.abspath(args.source)
+    if os.path.isdir(source):
+        refs = sample_directory(source, args.sample_fps, args.source_fps, args.start_timestamp)
+        video = None
+    else:
+        refs = sample_video(source, args.sample_fps, args.start_timestamp)
+        video = source
+
+    chunks = split_chunks(refs, args.chunk_seconds, args.preroll_seconds)
+    print(f"샘플 프레임 {len(refs)}개, 구간 {len(chunks)}개, 워커 {args.workers}개")
+    if not chunks:
+        return 0
+
+    # 로그는 analysis_data/ 상대 경로에 쓰므로 출력 루트로 이동
+    os.makedirs(args.output_root, exist_ok=True)
+    os.chdir(args.output_root)
+    if args.replace:
+        remove_session_logs(args.room_id, args.user_id)
+
+    tasks = [(video, preroll, chunk_refs) for preroll, chunk_refs in chunks]
+    # TF / MediaPipe 상태를 fork 로 물려받지 않도록 spawn 사용
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker) as executor:
+        chunk_results = executor.map(analyze_chunk, tasks)
+
+        # map 은 구간 순서대로 결과를 돌려주므로 먼저 끝난 앞 구간부터 바로 재생 / 저장
+        saved = replay_and_save(args.room_id, args.user_id, chunk_results)
+
+    print(f"저장 완료: {saved}프레임 ({args.room_id}, {args.user_id})")
+    return saved
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="녹화된 면접 영상 / 프레임 디렉토리 오프라인 재분석")
+    parser.add_argument("source", help="영상 파일 또는 프레임 이미지 디렉토리")
+    parser.add_argument("--room-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--sample-fps", type=float, default=5.0, help="초당 분석할 프레임 수")
+    parser.add_argument("--source-fps", type=float, default=30.0, help="파일 이름에 timestamp 가 없는 프레임 디렉토리의 프레임 속도")
+    parser.add_argument("--start-timestamp", type=int, default=0, help="첫 프레임의 timestamp(ms)")
+    parser.add_argument("--chunk-seconds", type=float, default=30.0, help="워커 하나가 맡는 구간 길이")
+    parser.add_argument("--preroll-seconds", type=float, default=1.0, help="구간 앞에서 추적기 예열에 쓸 길이")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-root", default=".", help="analysis_data/ 를 만들 디렉토리")
+    parser.add_argument("--replace", action="store_true", help="해당 세션의 기존 로그를 지우고 새로 씀")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,87 @@
+import gc
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 운영 서버(gunicorn preload + fork) 훅에서 부르는 함수들 (설정은 gunicorn.conf.py)
+# - 부모 프로세스 : Kiwi / DeepFace 가중치를 한 번만 로드하고 gc.freeze() 후 fork -> 워커들이 copy-on-write 로 공유
+# - 워커 프로세스 : fork 전에 떠 있던 스레드(로그 리스너 / 감정 배처)를 새로 만들고,
+#                  MediaPipe 그래프는 워커에서 처음 만든 뒤 워밍업 추론까지 끝내고 요청을 받는다
+
+# 0 이면 DeepFace 가중치는 부모에서 미리 로드하지 않고 워커마다 로드
+PRELOAD_DEEPFACE = os.environ.get("SOSWEET_PRELOAD_DEEPFACE", "1") != "0"
+
+# 프레임 분석 모델(DeepFace / MediaPipe)이 필요한 기능 그룹
+FRAME_GROUPS = {"frame", "stream"}
+
+
+def _enabled():
+    from app.routes import enabled_groups
+    return set(enabled_groups())
+
+
+def preload_models():
+    """
+    부모 프로세스에서 fork 전에 한 번 호출 (켜진 기능의 모델만)
+    추론은 하지 않고 가중치만 올린다 (TF 스레드 풀 / 감정 배처 스레드가 부모에 생기지 않도록)
+    """
+    from app.utils.emotion_backends import EMOTION_BACKEND
+
+    groups = _enabled()
+
+    if "nlp" in groups:
+        from app.utils.nlp_utils import get_kiwi
+
+        kiwi, _ = get_kiwi()  # Kiwi 모델 / 사용자 사전 / 불용어
+        logger.info("Kiwi 로드 완료 (%s)", type(kiwi).__name__)
+
+    # onnx / tflite 백엔드는 세션을 만들 때 런타임 스레드 풀이 생기므로 fork 뒤 워커에서 로드 (모델 파일도 작음)
+    if PRELOAD_DEEPFACE and groups & FRAME_GROUPS and EMOTION_BACKEND == "deepface":
+        from deepface import DeepFace
+
+        DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+        DeepFace.build_model(model_name="opencv", task="face_detector")
+        logger.info("DeepFace 감정 모델 / 얼굴 검출기 로드 완료")
+
+    # 지금까지 만든 객체는 GC 대상에서 빼서, 자식의 GC 가 공유 페이지를 건드려 복사되지 않게 함
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork():
+    """워커 프로세스에서 fork 직후 호출: 부모에서 물려받은 죽은 스레드 / 풀 상태 정리"""
+    from app.utils import log_utils, emotion_analysis, inference_pool, frame_pipeline, json_utils
+
+    log_utils.restart_after_fork()
+    # 배처 / 단계 / 저장 스레드는 fork 로 복사되지 않으므로 워커에서 처음 쓸 때 다시 만든다
+    emotion_analysis._batcher = None
+    inference_pool._pool = None
+    frame_pipeline._stage_executor = None
+    json_utils._writer = None
+
+
+def warmup_worker():
+    """
+    워커가 요청을 받기 전에 호출
+    MediaPipe 그래프 생성 + 감정 / 인식 / 토크나이즈를 한 번씩 실행해서 첫 요청이 느리지 않게 한다
+    """
+    groups = _enabled()
+
+    if groups & FRAME_GROUPS:
+        from app.utils import frame_pipeline
+        frame_pipeline.warmup()
+
+    if "nlp" in groups:
+        from app.utils.nlp_utils import analyze_tokens, tokenize
+        analyze_tokens(tokenize("안녕하세요 워밍업입니다."))
+
+    logger.info("워커 %s 준비 완료", os.getpid())
+
+
+def shutdown_worker():
+    """워커 종료 직전에 호출: 아직 파일에 쓰지 않은 분석 기록을 모두 쓴다"""
+    from app.utils.json_utils import close_writer
+
+    close_writer()
+    logger.info("워커 %s 저장 대기 기록 정리 완료", os.getpid())
@@ -0,0 +1,126 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from app.utils.action_analysis import ActionAnalyzer
+from app.utils.face_tracker import FaceTracker
+from app.utils.motion_gate import MotionGate
+
+
+def new_action_counters():
+    """사용자별 행동 카운터 초기값"""
+    return {
+        "hand_count": 0,
+        "hand_message_count": 0,
+        "side_move_count": 0,
+        "side_move_message_count": 0,
+        "eye_touch_count": 0,
+        "eye_touch_message_count": 0,
+    }
+
+
+class ActionSession:
+    """
+    (room_id, user_id) 한 세션의 가벼운 시간적 상태
+    - analyzer : 큐 / baseline / 프레임 카운터 (모델은 공유 풀 사용)
+    - counters : 행동 누적 카운터
+    - face_tracker : 감정 분석용 얼굴 박스 추적 캐시
+    - motion_gate : 변화 없는 프레임은 마지막 감정 / 랜드마크 결과를 재사용
+    """
+    def __init__(self):
+        self.analyzer = ActionAnalyzer()
+        self.counters = new_action_counters()
+        self.face_tracker = FaceTracker()
+        self.motion_gate = MotionGate()
+        self.last_emotion = None
+        self.last_perception = None
+        self.frame_counter = 0
+        # 같은 세션의 프레임이 동시에 들어와도 상태가 꼬이지 않도록 직렬화
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.analyzer.reset_all_queues()
+        self.face_tracker.reset()
+        self.motion_gate.reset()
+        self.last_emotion = None
+        self.last_perception = None
+
+    def remember_emotion(self, emotion_result):
+        """분석한 감정 결과를 재사용 후보로 저장 (실패 결과는 저장하지 않아서 다음 프레임은 변화가 없어도 다시 분석)"""
+        failed = not emotion_result or emotion_result.get("dominant_emotion") == "error"
+        with self.lock:
+            self.last_emotion = None if failed else emotion_result
+
+    def can_reuse(self, frame_bgr):
+        """이전 프레임과 거의 같아서 마지막 분석 결과를 재사용해도 되는지"""
+        with self.lock:
+            # 재사용할 결과가 없으면 기준 썸네일만 갱신 (skipped 가 실제 재사용 횟수보다 크게 세지지 않도록)
+            if self.last_emotion is None:
+                self.motion_gate.update(frame_bgr)
+                return False
+            return self.motion_gate.should_skip(frame_bgr)
+
+
+class SessionRegistry:
+    """
+    세션 키 -> 세션 상태 저장소
+    - ttl 초 동안 접근이 없으면 만료
+    - max_sessions 를 넘으면 가장 오래 사용하지 않은 세션부터 제거 (LRU)
+    """
+    def __init__(self, factory, ttl=600, max_sessions=500):
+        self.factory = factory
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # key -> (last_access, session), 앞쪽일수록 오래됨
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict(self, now):
+        # 앞쪽(LRU)부터 만료된 세션 제거
+        while self._sessions:
+            last_access, _ = next(iter(self._sessions.values()))
+            if now - last_access <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+        # 개수 제한 초과 시 LRU 제거
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, key, factory=None):
+        """세션을 가져오고, 없으면 새로 만든다 (factory 를 주면 기본 factory 대신 사용)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            session = entry[1] if entry is not None else (factory or self.factory)()
+            self._sessions[key] = (now, session)
+            self._evict(now)
+            return session
+
+    def peek(self, key):
+        """세션이 있으면 반환 (새로 만들지 않음, 접근 시간도 갱신하지 않음)"""
+        with self._lock:
+            entry = self._sessions.get(key)
+            return entry[1] if entry is not None else None
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            return entry[1] if entry is not None else None
+
+    def sweep(self):
+        """만료된 세션 정리"""
+        with self._lock:
+            self._evict(time.monotonic())
+
+
+# (room_id, user_id) -> ActionSession
+action_sessions = SessionRegistry(
+    ActionSession,
+    ttl=int(os.environ.get("SOSWEET_SESSION_TTL", "600")),
+    max_sessions=int(os.environ.get("SOSWEET_MAX_SESSIONS", "500")),
+)
@@ -0,0 +1,156 @@
+import os
+import json
+import logging
+import threading
+import time
+
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+def append_bytes(file_path, data, fsync=False):
+    """
+    바이트를 파일 끝에 추가 (O_APPEND, 여러 레코드를 한 번에)
+    fsync 면 디스크에 내려갈 때까지 기다린다
+    """
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(file_path, data, fsync=False):
+    """작은 파일을 임시 파일에 쓴 뒤 os.replace 로 교체 (읽는 쪽은 항상 완전한 파일만 봄)"""
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+class WriteBehindWriter:
+    """
+    요청 스레드 대신 파일에 쓰는 백그라운드 writer
+    - submit 은 쓰기 작업을 메모리 큐에 넣고 바로 반환 (요청 지연에 디스크 I/O 가 들어가지 않음)
+    - writer 스레드는 flush_interval 마다 모인 작업을 파일별로 묶어서 쓴다
+      (로그 추가는 파일당 write 한 번, 스냅샷 교체는 파일당 마지막 것만)
+    - flush() 는 호출 전에 넣은 작업이 모두 파일에 쓰일 때까지 기다린다 (read-your-writes)
+    - 대기 작업이 max_pending 을 넘으면 submit 이 writer 가 따라잡을 때까지 기다린다
+    """
+    def __init__(self, flush_interval_ms=100, fsync=False, max_pending=10000):
+        self.flush_interval = max(0.0, flush_interval_ms / 1000.0)
+        self.fsync = fsync
+        self.max_pending = max(1, max_pending)
+        self._cond = threading.Condition()
+        self._pending = []   # (종류, 절대 경로, 데이터)
+        self._submitted = 0  # 지금까지 넣은 작업 수
+        self._written = 0    # 지금까지 처리한 작업 수 (넣은 순서대로 처리)
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="persist-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, file_path, line):
+        """JSONL 한 줄(bytes) 추가 예약"""
+        self._submit("append", file_path, line)
+
+    def replace(self, file_path, data):
+        """스냅샷 파일 교체 예약 (data 는 호출 시점의 복사본이어야 함)"""
+        self._submit("replace", file_path, data)
+
+    def _submit(self, kind, file_path, data):
+        # 상대 경로는 지금 작업 디렉토리 기준으로 고정 (writer 가 쓸 때 cwd 가 바뀌어 있을 수 있음)
+        item = (kind, os.path.abspath(file_path), data)
+        with self._cond:
+            while len(self._pending) >= self.max_pending and not self._closed:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait()
+            if not self._closed:
+                self._pending.append(item)
+                self._submitted += 1
+                self._cond.notify_all()
+                return
+
+        # 종료된 뒤에 들어온 작업은 요청 스레드에서 바로 쓴다
+        self._write_batch([item])
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 작업이 모두 쓰일 때까지 대기 (시간 안에 끝나면 True)"""
+        with self._cond:
+            target = self._submitted
+            if self._written >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout=None):
+        """남은 작업을 모두 쓰고 writer 스레드 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _take_batch(self):
+        with self._cond:
+            # 첫 작업이 올 때까지 기다리고, 이후는 flush 요청 / 종료 / 대기 시간까지 더 모은다
+            self._cond.wait_for(lambda: self._pending or self._closed)
+            deadline = time.monotonic() + self.flush_interval
+            while not (self._flush_requested or self._closed):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending, []
+            self._flush_requested = False
+            self._cond.notify_all()  # max_pending 에 막혀 있던 submit 깨우기
+            return batch, self._closed
+
+    def _run(self):
+        while True:
+            batch, closed = self._take_batch()
+            if batch:
+                with timed("persist_flush"):
+                    self._write_batch(batch)
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+            if closed and not batch:
+                break
+
+    def _write_batch(self, batch):
+        # 파일별로 묶기: 로그 줄은 순서대로 이어 붙이고, 스냅샷은 마지막 것만 남긴다
+        appends = {}
+        replaces = {}
+        for kind, file_path, data in batch:
+            if kind == "append":
+                appends.setdefault(file_path, []).append(data)
+            else:
+                replaces[file_path] = data
+
+        for file_path, lines in appends.items():
+            self._write_file(append_bytes, file_path, b"".join(lines))
+        for file_path, data in replaces.items():
+            self._write_file(replace_file, file_path, data)
+
+    def _write_file(self, write, file_path, data):
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            write(file_path, data, self.fsync)
+        except Exception as e:
+            # 이 파일의 이번 배치만 버리고 다른 파일 / 다음 배치는 계속 쓴다
+            logger.error("저장 실패 (%s): %s", file_path, e)
@@ -0,0 +1 @@
+# 단계별 마이크로 벤치마크 (python -m benchmarks.run)
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from benchmarks import fixtures
+
+# 내보낸 감정 모델(onnx / tflite, int8 포함)이 DeepFace 와 같은 감정 점수를 내는지 비교
+#
+# 사용법:
+#   python -m benchmarks.emotion_parity --backend onnx                  # 합성 얼굴 64개
+#   python -m benchmarks.emotion_parity --backend onnx --int8 --images frames/
+#   python -m benchmarks.emotion_parity --backend tflite --model models/emotion.tflite --tolerance 2
+#
+# - 분류기 비교: 같은 48x48 입력을 두 백엔드에 넣고 emotion_scores(백분율) 차이 / dominant 일치율을 본다
+#   기준을 넘으면 종료 코드 1 (모델을 다시 내보낸 뒤 배포 전에 실행)
+# - --images 를 주면 각 백엔드의 얼굴 검출까지 포함한 analyze_emotion 결과의 dominant 일치율도 출력 (참고용)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+# 허용 최대 점수 차이 (백분율 포인트) / dominant 감정 최소 일치율 (tests/test_emotion_parity.py 도 같은 기준 사용)
+FP32_TOLERANCE = 1.0
+INT8_TOLERANCE = 5.0
+MIN_AGREEMENT = 0.95
+
+
+def load_images(path):
+    """이미지 디렉토리 -> RGB 프레임 목록 (frame_pipeline 이 감정 분석에 넘기는 형식)"""
+    import cv2
+
+    frames = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        frame = cv2.imread(os.path.join(path, name))
+        if frame is not None:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    return frames
+
+
+def score_rows(predictions):
+    from app.utils.emotion_analysis import build_emotion_scores
+
+    return [build_emotion_scores(np.asarray(row)) for row in predictions]
+
+
+def compare_scores(reference, candidate):
+    """두 백엔드의 emotion_scores 목록 비교 (차이는 백분율 포인트)"""
+    diffs = np.array([[abs(r[k] - c[k]) for k in r] for r, c in zip(reference, candidate)])
+    agree = [max(r, key=r.get) == max(c, key=c.get) for r, c in zip(reference, candidate)]
+    return {
+        "count": len(reference),
+        "max_abs_diff": round(float(diffs.max()), 4) if len(diffs) else 0.0,
+        "mean_abs_diff": round(float(diffs.mean()), 4) if len(diffs) else 0.0,
+        "dominant_agreement": round(sum(agree) / len(agree), 4) if agree else 1.0,
+    }
+
+
+def end_to_end(backend, frames):
+    """얼굴 검출 -> 전처리 -> 분류 (analyze_emotion 과 같은 순서, 배처 없이)"""
+    from app.utils.emotion_analysis import preprocess_face
+
+    inputs = np.stack([preprocess_face(backend.detect_face(frame)[0]) for frame in frames])
+    return score_rows(backend.predict(inputs))
+
+
+def run(args):
+    from app.utils.emotion_backends import DeepFaceBackend, create_backend
+
+    reference = DeepFaceBackend()
+    candidate = create_backend(args.backend, model_path=args.model, int8=args.int8)
+    tolerance = args.tolerance if args.tolerance is not None else (INT8_TOLERANCE if args.int8 else FP32_TOLERANCE)
+
+    frames = load_images(args.images) if args.images else []
+    if frames:
+        from app.utils.emotion_analysis import preprocess_face
+        inputs = np.stack([preprocess_face(reference.detect_face(frame)[0]) for frame in frames])
+    else:
+        inputs = fixtures.face_inputs(args.count, args.seed)
+
+    report = {
+        "backend": candidate.name,
+        "model": candidate.model_path,
+        "tolerance": tolerance,
+        "min_agreement": args.min_agreement,
+        "classifier": compare_scores(score_rows(reference.predict(inputs)), score_rows(candidate.predict(inputs))),
+    }
+    if frames:
+        report["end_to_end"] = compare_scores(end_to_end(reference, frames), end_to_end(candidate, frames))
+
+    classifier = report["classifier"]
+    report["passed"] = (
+        classifier["max_abs_diff"] <= tolerance and classifier["dominant_agreement"] >= args.min_agreement
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="내보낸 감정 모델과 DeepFace 감정 점수 비교")
+    parser.add_argument("--backend", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--model", default=None, help="모델 파일 (기본: 백엔드 설정과 같은 경로)")
+    parser.add_argument("--int8", action="store_true", help="기본 경로에서 int8 모델 사용")
+    parser.add_argument("--images", default=None, help="얼굴 이미지 디렉토리 (없으면 합성 얼굴)")
+    parser.add_argument("--count", type=int, default=64, help="합성 얼굴 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=None, help="허용 최대 점수 차이 (백분율 포인트, 기본 fp32 1 / int8 5)")
+    parser.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT, help="dominant 감정 최소 일치율")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run(parse_args())["passed"] else 1)
@@ -0,0 +1,186 @@
+import os
+import glob
+import json
+import base64
+import random
+from types import SimpleNamespace
+from collections import namedtuple
+
+import numpy as np
+
+# 벤치마크 입력은 모두 오프라인에서 만들 수 있는 합성 데이터 또는 레포 안의 기록 파일만 사용
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMOTION_FIXTURE_GLOB = os.path.join(ROOT, "analysis_data", "emotions", "*", "*.json")
+TEST_DATA_PATH = os.path.join(ROOT, "test_data.json")
+
+Landmark = namedtuple("Landmark", ["x", "y", "z"])
+
+# /api/nlp 벤치마크용 발화 (filler / 말 더듬기 / 존댓말 여부가 섞여 있음)
+SAMPLE_SCRIPTS = [
+    "음 저는 요즘 영화 보는 걸 좋아해요.",
+    "어 근데 진짜 이거 좀 아니 이건 제가 준비한 프로젝트 경험인데요.",
+    "팀 프로젝트에서 백엔드 개발을 맡았고 서버 성능 개선을 담당했습니다.",
+    "음 어 그러니까 제 장점은 꼼꼼함이라고 생각합니다",
+    "취미는 독서랑 운동이에요",
+    "실시간 추천 시스템을 만들면서 데이터 처리 경험을 쌓았어",
+]
+
+
+def synthetic_frame(width=1280, height=720, seed=0):
+    """
+    얼굴 비슷한 타원과 손 모양 덩어리가 있는 BGR 합성 프레임
+    실제 검출 결과와 상관없이 디코딩 / 리사이즈 / 색 변환 비용이 실제 카메라 프레임과 비슷하도록
+    그라디언트 + 노이즈를 깔아 JPEG 압축률이 너무 높게 나오지 않게 한다
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width]
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = (xs * 255 // max(width - 1, 1)).astype(np.uint8)
+    frame[..., 1] = (ys * 255 // max(height - 1, 1)).astype(np.uint8)
+    frame[..., 2] = 128
+    frame = cv2.add(frame, rng.integers(0, 24, frame.shape, dtype=np.uint8))
+
+    center = (width // 2, height // 2 - height // 10)
+    axes = (width // 10, height // 5)
+    cv2.ellipse(frame, center, axes, 0, 0, 360, (140, 170, 220), -1)
+    cv2.circle(frame, (center[0] - axes[0] // 2, center[1] - axes[1] // 4), axes[0] // 8, (40, 40, 40), -1)
+    cv2.circle(frame, (center[0] + axes[0] // 2, center[1] - axes[1] // 4), axes[0] // 8, (40, 40, 40), -1)
+    cv2.ellipse(frame, (center[0], center[1] + axes[1] // 2), (axes[0] // 3, axes[1] // 10), 0, 0, 180, (60, 60, 160), -1)
+    cv2.rectangle(frame, (width // 6, height * 2 // 3), (width // 6 + width // 12, height - 10), (130, 160, 210), -1)
+    return frame
+
+
+def encode_frame(frame_bgr, ext=".jpg", quality=80):
+    """BGR 프레임 -> (인코딩된 바이트, data URL) (클라이언트가 보내는 두 가지 형식)"""
+    import cv2
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext == ".jpg" else []
+    ok, buffer = cv2.imencode(ext, frame_bgr, params)
+    if not ok:
+        raise ValueError(f"{ext} 인코딩 실패")
+    raw = buffer.tobytes()
+    mime = "image/jpeg" if ext == ".jpg" else f"image/{ext.lstrip('.')}"
+    return raw, f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}"
+
+
+def face_inputs(count, seed=0):
+    """
+    감정 모델 입력 (count, 48, 48) 합성 얼굴
+    합성 프레임의 얼굴 타원 주변을 조금씩 다르게 잘라서 (위치 / 크기 / 밝기) 감정 모델 전처리를 그대로 거친다
+    """
+    import cv2
+    from app.utils.emotion_analysis import preprocess_face
+    from app.utils.emotion_backends import resize_face
+
+    rng = np.random.default_rng(seed)
+    faces = []
+    for i in range(count):
+        frame = cv2.cvtColor(synthetic_frame(320, 240, seed=seed + i), cv2.COLOR_BGR2RGB)
+        frame = cv2.convertScaleAbs(frame, alpha=rng.uniform(0.6, 1.4), beta=rng.uniform(-30, 30))
+        size = int(rng.integers(70, 120))
+        x0 = int(rng.integers(110, 140)) - size // 2 + 25
+        y0 = int(rng.integers(60, 90)) - size // 2 + 25
+        faces.append(preprocess_face(resize_face(frame[y0:y0 + size, x0:x0 + size] / 255)))
+    return np.stack(faces)
+
+
+def _landmarks(points):
+    return [Landmark(float(x), float(y), float(z)) for x, y, z in points]
+
+
+def synthetic_results(seed=0, hand_near_eye=True):
+    """
+    MediaPipe 결과와 같은 모양(.landmark / .multi_face_landmarks / .multi_hand_landmarks)의
+    (pose 랜드마크 목록, FaceMesh 결과, Hands 결과)
+    hand_near_eye 면 손가락 끝(Hands / Pose 검지)이 왼쪽 눈 근처에 있어서 눈 만지기 경로 끝까지 계산된다
+    """
+    rng = np.random.default_rng(seed)
+
+    pose = rng.uniform(0.3, 0.7, (33, 3))
+    pose[:, 2] = rng.uniform(-0.2, 0.2, 33)
+    pose[9:11, 1] = 0.35   # 입
+    pose[11:13, 1] = 0.6   # 어깨
+    pose[11, 0], pose[12, 0] = 0.65, 0.35
+    pose[15:23, 1] = 0.8   # 손목 / 손가락 (중간선 아래)
+
+    face = rng.uniform(0.4, 0.6, (478, 3))
+    face[:, 2] = rng.uniform(-0.05, 0.05, 478)
+    left_eye = np.array([0.45, 0.35, 0.0])
+    pose[0, :2] = 0.5, 0.4          # 코
+    pose[2, :2] = left_eye[:2]      # 왼쪽 눈
+    pose[5, :2] = 0.55, 0.35        # 오른쪽 눈
+    if hand_near_eye:
+        pose[19, :2] = left_eye[:2]  # 왼쪽 검지 (Pose cascade 통과)
+    face[[33, 133, 159, 145]] = left_eye + rng.normal(0, 0.005, (4, 3))
+    face[[362, 263, 386, 374]] = np.array([0.55, 0.35, 0.0]) + rng.normal(0, 0.005, (4, 3))
+
+    hands = []
+    for h in range(2):
+        hand = rng.uniform(0.6, 0.9, (21, 3))
+        if hand_near_eye and h == 0:
+            hand[[8, 12, 16]] = left_eye + rng.normal(0, 0.01, (3, 3))
+        hands.append(SimpleNamespace(landmark=_landmarks(hand)))
+
+    return (
+        _landmarks(pose),
+        SimpleNamespace(multi_face_landmarks=[SimpleNamespace(landmark=_landmarks(face))]),
+        SimpleNamespace(multi_hand_landmarks=hands),
+    )
+
+
+def synthetic_perception(seed=0, hand_near_eye=True):
+    """감지기(손 / 몸 / 눈) 벤치마크용 FramePerception (synthetic_results 를 배열로 변환한 것)"""
+    from app.utils.action_analysis import FramePerception
+
+    return FramePerception.from_results(*synthetic_results(seed, hand_near_eye))
+
+
+def load_emotion_fixture_records():
+    """레포에 있는 기록된 세션(analysis_data/emotions) + test_data.json 의 감정 레코드"""
+    from app.utils.json_utils import SNAPSHOT_EXT
+
+    records = []
+    for path in sorted(glob.glob(EMOTION_FIXTURE_GLOB)):
+        if path.endswith(SNAPSHOT_EXT):
+            continue  # 누적값 스냅샷(*.summary.snapshot.json)은 레코드 목록이 아님
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except json.JSONDecodeError:
+            continue  # 동시 덮어쓰기로 손상된 예전 기록은 건너뜀
+        if isinstance(payload, list):
+            records.extend(payload)
+    if os.path.exists(TEST_DATA_PATH):
+        with open(TEST_DATA_PATH, "r", encoding="utf-8") as f:
+            records.extend(json.load(f))
+    return [r for r in records if r.get("emotion_scores")]
+
+
+def emotion_history(size, seed=0):
+    """기록 파일의 레코드를 섞어서 size 개짜리 세션 감정 기록을 만든다"""
+    base = load_emotion_fixture_records()
+    rng = random.Random(seed)
+    history = []
+    for i in range(size):
+        record = dict(rng.choice(base))
+        record["timestamp"] = 1736178533621 + i * 200
+        history.append(record)
+    return history
+
+
+def action_record(i):
+    """save_action_data 가 쓰는 것과 같은 모양의 레코드"""
+    return {
+        "timestamp": 1736178533621 + i * 200,
+        "actions": {"is_hand": int(i % 7 == 0), "is_side": 0, "is_eye": int(i % 11 == 0)},
+        "counters": {
+            "hand_count": i % 2,
+            "hand_message_count": i // 7,
+            "side_move_count": 0,
+            "side_move_message_count": 0,
+            "eye_touch_count": i % 4,
+            "eye_touch_message_count": i // 11,
+        },
+    }
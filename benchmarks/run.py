@@ -0,0 +1,379 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import itertools
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from benchmarks import fixtures
+
+# 사용법:
+#   python -m benchmarks.run                       # 모든 단계 실행, JSON 결과를 stdout 으로
+#   python -m benchmarks.run --only decode nlp     # 이름이 해당 접두사로 시작하는 단계만
+#   python -m benchmarks.run --output bench.json   # 결과 파일로 저장
+#   python -m benchmarks.run --compare base.json   # 이전 결과(다른 커밋)와 p50 / p99 비교
+#
+# 각 단계는 다른 단계와 따로 측정되고, 의존성(mediapipe / deepface / kiwipiepy)이 없는 단계는 skipped 로 기록된다
+# 감정 단계는 SOSWEET_EMOTION_BACKEND 의 백엔드로 측정 (DeepFace 와의 점수 비교는 benchmarks.emotion_parity)
+
+STAGES = []  # (이름, setup 함수) 등록 순서대로 실행
+
+
+def stage(name):
+    """
+    벤치마크 단계 등록
+    setup 함수는 준비 작업 후 {케이스 이름: op} 또는 {케이스 이름: (op, 호출당 처리 개수)} 를 반환
+    op 는 인자 없는 함수이고, 측정은 op 호출만 포함한다
+    """
+    def register(setup):
+        STAGES.append((name, setup))
+        return setup
+    return register
+
+
+@contextmanager
+def working_directory(path):
+    # json_utils 는 analysis_data/ 상대 경로로 저장하므로 임시 디렉토리에서 실행
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def percentile(sorted_values, q):
+    """nearest-rank 백분위수 (값은 오름차순 정렬되어 있어야 함)"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def measure(op, iterations, warmup, items_per_call=1):
+    for _ in range(warmup):
+        op()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        op()
+        samples.append(time.perf_counter_ns() - start)
+
+    samples.sort()
+    total_s = sum(samples) / 1e9
+    to_ms = lambda ns: round(ns / 1e6, 4)
+    return {
+        "iterations": iterations,
+        "items_per_call": items_per_call,
+        "throughput_per_s": round(iterations * items_per_call / total_s, 2) if total_s else None,
+        "mean_ms": to_ms(sum(samples) / len(samples)),
+        "p50_ms": to_ms(percentile(samples, 50)),
+        "p99_ms": to_ms(percentile(samples, 99)),
+        "min_ms": to_ms(samples[0]),
+        "max_ms": to_ms(samples[-1]),
+    }
+
+
+#########################################################################################################
+# 프레임 디코딩
+
+@stage("decode")
+def bench_decode(args):
+    from app.utils.frame_utils import decode_frame_func, prepare_frame
+
+    cases = {}
+    for width, height in ((640, 480), (1280, 720), (1920, 1080)):
+        raw, data_url = fixtures.encode_frame(fixtures.synthetic_frame(width, height))
+        cases[f"decode_frame_func.data_url.{width}x{height}"] = lambda u=data_url: decode_frame_func(u)
+        cases[f"decode_frame_func.bytes.{width}x{height}"] = lambda b=raw: decode_frame_func(b)
+        # 줄여서 디코딩 + 분석에 쓰는 해상도 / 색공간 버퍼를 모두 만드는 비용 (요청 1건의 전처리 전체)
+        cases[f"prepare_frame.pyramid.{width}x{height}"] = lambda b=raw: _build_pyramid(prepare_frame(b))
+    return cases
+
+
+def _build_pyramid(frame):
+    # 감정(원본 RGB) / Pose / FaceMesh+Hands / 움직임 비교 썸네일
+    import cv2
+    from app.utils.action_analysis import POSE_INPUT_SIZE, HAND_FACE_INPUT_SIZE
+    from app.utils.motion_gate import MOTION_THUMB_SIZE
+
+    frame.get(color="rgb")
+    frame.get(POSE_INPUT_SIZE, "rgb")
+    frame.get(HAND_FACE_INPUT_SIZE, "rgb")
+    frame.get(MOTION_THUMB_SIZE, "gray", interpolation=cv2.INTER_AREA)
+
+
+#########################################################################################################
+# 동작 분석: MediaPipe 인식 1회 + 감지기별 (합성 랜드마크로 감지기 계산만 따로 측정)
+
+@stage("action")
+def bench_action(args):
+    from app.utils.action_analysis import ActionAnalyzer, FramePerception, model_pool, hand_near_face
+
+    frame = fixtures.synthetic_frame(1280, 720)
+    results = fixtures.synthetic_results(hand_near_eye=True)
+    perception = fixtures.synthetic_perception(hand_near_eye=False)
+    analyzer = ActionAnalyzer()
+    timestamps = itertools.count(1)
+
+    # 히스토리 기록이 2프레임 이상이어야 감지기가 동작
+    analyzer.record(next(timestamps), perception)
+
+    return {
+        "action.perceive": lambda: model_pool.perceive(frame),
+        "action.hand_movement": lambda: analyzer.analyze_hand_movement(perception),
+        "action.side_movement": lambda: analyzer.analyze_side_movement(perception),
+        "action.eye_touch": lambda: analyzer.analyze_eye_touch(perception),
+        "action.hand_near_face": lambda: hand_near_face(perception.pose),
+        "action.from_results": lambda: FramePerception.from_results(*results),
+        "action.record": lambda: analyzer.record(next(timestamps), perception),
+        "action.all_detectors": lambda: _run_detectors(analyzer, perception, next(timestamps)),
+    }
+
+
+def _run_detectors(analyzer, perception, timestamp):
+    # frame_pipeline.analyze_frame_actions 와 같은 순서로 세 감지기를 실행
+    analyzer.analyze_hand_movement_with_priority_queue(None, timestamp, perception)
+    analyzer.analyze_side_movement_with_priority_queue(None, timestamp, perception)
+    analyzer.analyze_eye_touch_with_priority_queue(None, timestamp, perception)
+
+
+#########################################################################################################
+# 감정 분석 (얼굴 검출 + 배치 감정 분류, 배치 대기 시간 포함)
+
+@stage("emotion")
+def bench_emotion(args):
+    import cv2
+    from app.utils.emotion_analysis import analyze_emotion
+    from app.utils.emotion_backends import get_backend
+    from app.utils.face_tracker import FaceTracker
+
+    frame_rgb = cv2.cvtColor(fixtures.synthetic_frame(640, 480), cv2.COLOR_BGR2RGB)
+    tracker = FaceTracker()
+    # SOSWEET_EMOTION_BACKEND 로 고른 백엔드의 분류기만 (배치 대기 없이)
+    backend = get_backend()
+    faces = fixtures.face_inputs(16)
+
+    # analyze_emotion 은 예외를 잡고 "error" 결과를 반환하므로, 그대로 재면 모델 / 백엔드가 깨진 것이 빨라진 것처럼 보인다
+    def checked(op):
+        def run():
+            result = op()
+            if result["dominant_emotion"] == "error":
+                raise RuntimeError("analyze_emotion 이 error 를 반환 (모델 / 백엔드 로드 실패, 로그 참고)")
+            return result
+        return run
+
+    # 의존성이 없으면 측정 전에 단계 전체를 skipped 로 기록
+    checked(lambda: analyze_emotion(frame_rgb))()
+    return {
+        "emotion.analyze_emotion": checked(lambda: analyze_emotion(frame_rgb)),
+        "emotion.analyze_emotion.tracked": checked(lambda: analyze_emotion(frame_rgb, tracker)),
+        f"emotion.predict.{backend.name}.1": lambda: backend.predict(faces[:1]),
+        f"emotion.predict.{backend.name}.{len(faces)}": (lambda: backend.predict(faces), len(faces)),
+    }
+
+
+#########################################################################################################
+# 저장: 기록이 쌓인 세션 로그에 한 줄 추가하는 비용 (기록 크기에 따라 늘어나면 안 됨)
+
+@stage("persist")
+def bench_persist(args):
+    from app.utils import json_utils
+
+    tmp = tempfile.mkdtemp(prefix="sosweet-bench-")
+    args.cleanup.append(tmp)
+
+    cases = {}
+    for size in args.history_sizes:
+        directory = os.path.join(tmp, "actions")
+        filename = f"room_bench_{size}"
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{filename}{json_utils.LOG_EXT}"), "wb") as f:
+            for i in range(size):
+                f.write(json_utils._encode_record(fixtures.action_record(i)))
+
+        counter = itertools.count(size)
+        log_path = os.path.join(directory, f"{filename}{json_utils.LOG_EXT}")
+        # 파일에 실제로 쓰일 때까지의 비용 (write-behind 면 flush_writes 까지 포함) / 직접 파일에 한 줄 쓰는 비용
+        def save_and_flush(d=directory, n=filename, c=counter):
+            json_utils.save_to_json(d, n, fixtures.action_record(next(c)))
+            json_utils.flush_writes()
+
+        cases[f"persist.save_to_json.history_{size}"] = save_and_flush
+        if json_utils.WRITE_BEHIND:
+            # 요청 경로에서 기다리는 비용 (큐에 넣기까지만, 디스크 쓰기는 포함하지 않음)
+            cases[f"persist.save_to_json.enqueue.history_{size}"] = (
+                lambda d=directory, n=filename, c=counter: json_utils.save_to_json(d, n, fixtures.action_record(next(c)))
+            )
+        cases[f"persist.append_record.history_{size}"] = (
+            lambda p=log_path, c=counter: json_utils.append_record(p, fixtures.action_record(next(c)))
+        )
+
+    # 요청 경로에서 실제로 부르는 저장 함수 (로그 + 스냅샷 / 누적값 갱신, write-behind 면 큐에 넣기까지의 지연)
+    records = fixtures.emotion_history(64)
+    record_cycle = itertools.cycle(records)
+    action_counter = itertools.count()
+
+    def save_emotion():
+        with working_directory(tmp):
+            json_utils.save_emotion_data("room_bench", "user_bench", next(record_cycle))
+
+    def save_action():
+        with working_directory(tmp):
+            json_utils.save_action_data("room_bench", "user_bench", fixtures.action_record(next(action_counter)))
+
+    cases["persist.save_emotion_data"] = save_emotion
+    cases["persist.save_action_data"] = save_action
+    return cases
+
+
+#########################################################################################################
+# 피드백 계산
+
+@stage("feedback")
+def bench_feedback(args):
+    from app.utils.feedback_utils import (
+        calculate_emo_result, build_emo_aggregate, calculate_emo_result_from_aggregate,
+    )
+
+    cases = {}
+    for size in args.history_sizes:
+        history = fixtures.emotion_history(size)
+        aggregate = build_emo_aggregate(history)
+        cases[f"feedback.calculate_emo_result.history_{size}"] = lambda h=history: calculate_emo_result(h)
+        cases[f"feedback.from_aggregate.history_{size}"] = (
+            lambda a=aggregate: calculate_emo_result_from_aggregate(a)
+        )
+    return cases
+
+
+#########################################################################################################
+# /api/nlp Kiwi 토크나이즈
+
+@stage("nlp")
+def bench_nlp(args):
+    from app.utils.nlp_utils import tokenize, tokenize_batch, analyze_tokens
+
+    scripts = itertools.cycle(fixtures.SAMPLE_SCRIPTS)
+    batch = [fixtures.SAMPLE_SCRIPTS[i % len(fixtures.SAMPLE_SCRIPTS)] for i in range(args.nlp_batch_size)]
+    return {
+        "nlp.tokenize": lambda: tokenize(next(scripts)),
+        "nlp.analyze": lambda: analyze_tokens(tokenize(next(scripts))),
+        f"nlp.tokenize_batch.{len(batch)}": (lambda: tokenize_batch(batch), len(batch)),
+    }
+
+
+#########################################################################################################
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=fixtures.ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    results = []
+    for name, setup in STAGES:
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+
+        try:
+            cases = setup(args)
+        except Exception as e:
+            # 주로 선택 의존성(mediapipe / deepface / kiwipiepy)이 없는 경우
+            print(f"[bench] {name}: 준비 실패, 건너뜀 ({e})", file=sys.stderr)
+            results.append({"stage": name, "skipped": f"{type(e).__name__}: {e}"})
+            continue
+
+        for case, op in cases.items():
+            items_per_call = 1
+            if isinstance(op, tuple):
+                op, items_per_call = op
+            try:
+                result = measure(op, args.iterations, args.warmup, items_per_call)
+            except Exception as e:
+                print(f"[bench] {case}: 실패 ({e})", file=sys.stderr)
+                results.append({"stage": case, "error": f"{type(e).__name__}: {e}"})
+                continue
+            results.append({"stage": case, **result})
+            print(f"[bench] {case}: p50 {result['p50_ms']}ms p99 {result['p99_ms']}ms "
+                  f"({result['throughput_per_s']}/s)", file=sys.stderr)
+
+    return {
+        "commit": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """이전 결과 대비 p50 / p99 변화율 (양수면 느려짐)"""
+    before = {r["stage"]: r for r in baseline.get("results", []) if "p50_ms" in r}
+    rows = []
+    for r in report["results"]:
+        old = before.get(r["stage"])
+        if old is None or "p50_ms" not in r:
+            continue
+        rows.append({
+            "stage": r["stage"],
+            "p50_ms": [old["p50_ms"], r["p50_ms"]],
+            "p99_ms": [old["p99_ms"], r["p99_ms"]],
+            "p50_change_pct": round((r["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100, 1) if old["p50_ms"] else None,
+            "p99_change_pct": round((r["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100, 1) if old["p99_ms"] else None,
+        })
+    return {"baseline_commit": baseline.get("commit"), "commit": report["commit"], "stages": rows}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SoSweet 단계별 마이크로 벤치마크")
+    parser.add_argument("--only", nargs="*", default=[], help="실행할 단계 이름 접두사 (decode, action, emotion, persist, feedback, nlp)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--history-sizes", type=int, nargs="*", default=[0, 1000, 10000])
+    parser.add_argument("--nlp-batch-size", type=int, default=64)
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (없으면 stdout)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.cleanup = []
+    try:
+        report = run_benchmarks(args)
+    finally:
+        # 백그라운드 writer 가 임시 디렉토리에 쓰던 기록을 마친 뒤 삭제
+        json_utils = sys.modules.get("app.utils.json_utils")
+        if json_utils is not None:
+            json_utils.close_writer()
+        for path in args.cleanup:
+            shutil.rmtree(path, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
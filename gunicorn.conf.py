@@ -0,0 +1,54 @@
+import os
+
+# 운영 서버 실행: gunicorn -c gunicorn.conf.py run:app
+# (python run.py 는 개발용 Flask 서버)
+#
+# preload_app 으로 부모 프로세스가 앱과 모델(Kiwi / DeepFace 가중치)을 한 번만 로드한 뒤 워커를 fork 한다
+# 워커들은 부모의 모델 메모리를 copy-on-write 로 공유하므로 워커 수만큼 메모리가 늘어나지 않는다
+# MediaPipe 그래프는 fork 후 워커마다 만들고, 워밍업 추론이 끝난 워커만 요청을 받는다
+
+bind = os.environ.get("SOSWEET_BIND", "0.0.0.0:5000")
+# 세션 상태(행동 큐 / 카운터, 감정 누적값, 얼굴 추적, 스트림 연결)는 워커 프로세스 메모리에만 있다
+# 같은 (room_id, user_id) 의 요청이 다른 워커로 가면 상태가 나뉘므로 기본은 워커 1개 + 스레드로 확장
+# 워커들은 같은 소켓을 나눠 받으므로 워커 단위 고정은 안 됨 -> 더 늘릴 땐 워커 1개짜리 인스턴스를 여러 개 두고
+# 로드밸런서에서 room_id / user_id 기준 세션 고정 라우팅을 할 것
+workers = int(os.environ.get("SOSWEET_WORKERS", "1"))
+# WebSocket 스트림(/api/human/stream)이 연결 동안 스레드 하나를 쓰므로 스레드 워커 사용
+worker_class = "gthread"
+threads = int(os.environ.get("SOSWEET_THREADS", "8"))
+timeout = int(os.environ.get("SOSWEET_WORKER_TIMEOUT", "120"))
+preload_app = True
+
+# 추론 프로세스 풀은 기본으로 끔 (워커 1개로 여러 코어를 쓰려면 SOSWEET_INFERENCE_WORKERS 를 직접 지정)
+os.environ.setdefault("SOSWEET_INFERENCE_WORKERS", "0")
+
+
+def when_ready(server):
+    # 앱 import 가 끝난 부모 프로세스, 워커 fork 직전
+    if server.cfg.workers > 1:
+        server.log.warning(
+            "SOSWEET_WORKERS=%d: 세션 상태는 워커마다 따로 있어서 같은 세션의 결과가 워커별로 나뉩니다",
+            server.cfg.workers,
+        )
+    from app.utils.serving import preload_models
+    preload_models()
+
+
+def post_fork(server, worker):
+    from app.utils.serving import after_fork
+    after_fork()
+
+
+def post_worker_init(worker):
+    # 요청을 받기 전에 워밍업 (실패해도 워커는 뜨고 첫 요청에서 다시 로드)
+    from app.utils.serving import warmup_worker
+    try:
+        warmup_worker()
+    except Exception as e:
+        worker.log.warning("워밍업 실패: %s", e)
+
+
+def worker_exit(server, worker):
+    # 백그라운드 writer 에 남은 기록을 쓰고 종료 (atexit 보다 먼저, 로그가 살아 있을 때)
+    from app.utils.serving import shutdown_worker
+    shutdown_worker()
@@ -0,0 +1,63 @@
+import os
+import importlib.util
+
+import numpy as np
+import pytest
+
+from benchmarks import fixtures
+from benchmarks.emotion_parity import (
+    FP32_TOLERANCE, INT8_TOLERANCE, MIN_AGREEMENT, compare_scores, load_images, score_rows,
+)
+
+# 내보낸 onnx / tflite 감정 모델이 DeepFace 와 같은 감정 점수를 내는지 확인
+# deepface, 각 런타임, 모델 파일(python -m app.utils.emotion_export)이 없으면 건너뜀
+# SOSWEET_PARITY_IMAGES 에 얼굴 이미지 디렉토리를 주면 벤치마크 합성 프레임 대신 그 이미지로 비교
+PARITY_IMAGES = os.environ.get("SOSWEET_PARITY_IMAGES", "")
+TFLITE_RUNTIMES = ("tflite_runtime", "ai_edge_litert", "tensorflow")
+
+
+def require_runtime(backend_name):
+    if backend_name == "onnx":
+        pytest.importorskip("onnxruntime")
+    elif not any(importlib.util.find_spec(name) for name in TFLITE_RUNTIMES):
+        pytest.skip(f"tflite 런타임 없음 ({', '.join(TFLITE_RUNTIMES)})")
+
+
+@pytest.fixture(scope="module")
+def reference():
+    pytest.importorskip("deepface")
+    from app.utils.emotion_backends import DeepFaceBackend
+
+    return DeepFaceBackend()
+
+
+@pytest.fixture(scope="module")
+def face_batch(reference):
+    """벤치마크 프레임에서 DeepFace 검출기로 자른 얼굴 + 합성 얼굴 크롭 (두 백엔드에 같은 입력)"""
+    import cv2
+    from app.utils.emotion_analysis import preprocess_face
+
+    if PARITY_IMAGES:
+        frames = load_images(PARITY_IMAGES)
+    else:
+        frames = [cv2.cvtColor(fixtures.synthetic_frame(640, 480, seed=i), cv2.COLOR_BGR2RGB) for i in range(8)]
+    detected = [preprocess_face(reference.detect_face(frame)[0]) for frame in frames]
+    return np.concatenate([np.stack(detected), fixtures.face_inputs(32)])
+
+
+@pytest.mark.parametrize("backend_name", ["onnx", "tflite"])
+@pytest.mark.parametrize("int8", [False, True], ids=["fp32", "int8"])
+def test_backend_matches_deepface(reference, face_batch, backend_name, int8):
+    require_runtime(backend_name)
+    from app.utils.emotion_backends import create_backend, default_model_path
+
+    model_path = default_model_path(backend_name, int8)
+    if not os.path.exists(model_path):
+        pytest.skip(f"모델 파일 없음: {model_path}")
+
+    candidate = create_backend(backend_name, model_path=model_path)
+    report = compare_scores(score_rows(reference.predict(face_batch)), score_rows(candidate.predict(face_batch)))
+
+    tolerance = INT8_TOLERANCE if int8 else FP32_TOLERANCE
+    assert report["max_abs_diff"] <= tolerance, report
+    assert report["dominant_agreement"] >= MIN_AGREEMENT, report
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from flask import Flask
+
+from app.routes.frame_analyze import read_frame_request
+
+JPEG = b"\xff\xd8\xff\xe0fake-jpeg"
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def read(app, *args, **kwargs):
+    with app.test_request_context("/api/human/frameInfo", *args, method="POST", **kwargs):
+        frame, meta = read_frame_request()
+        return (bytes(frame) if isinstance(frame, memoryview) else frame), meta
+
+
+def test_json_data_url(app):
+    frame, meta = read(app, json={
+        "frame": "data:image/jpeg;base64,AAAA", "user_id": "ming01", "room_id": "room_1", "timestamp": 3,
+    })
+    assert frame == "data:image/jpeg;base64,AAAA"
+    assert meta == {"user_id": "ming01", "room_id": "room_1", "timestamp": 3}
+
+
+def test_raw_body_with_headers(app):
+    frame, meta = read(app, data=JPEG, content_type="image/jpeg", headers={
+        "X-User-Id": "ming01", "X-Room-Id": "room_1", "X-Timestamp": "42",
+    })
+    assert frame == JPEG
+    assert meta == {"user_id": "ming01", "room_id": "room_1", "timestamp": 42}
+
+
+def test_raw_body_with_query_params(app):
+    frame, meta = read(app, query_string={"user_id": "ming01", "room_id": "room_1", "timestamp": "1.5"},
+                       data=JPEG, content_type="application/octet-stream")
+    assert frame == JPEG
+    assert meta == {"user_id": "ming01", "room_id": "room_1", "timestamp": 1.5}
+
+
+def test_multipart_frame_part(app):
+    frame, meta = read(app, content_type="multipart/form-data", data={
+        "frame": (io.BytesIO(JPEG), "frame.jpg", "image/jpeg"),
+        "user_id": "ming01",
+        "room_id": "room_1",
+        "timestamp": "7",
+    })
+    assert frame == JPEG
+    assert meta == {"user_id": "ming01", "room_id": "room_1", "timestamp": 7}
+
+
+def test_header_takes_precedence_over_form(app):
+    _, meta = read(app, content_type="multipart/form-data", headers={"X-User-Id": "header"}, data={
+        "frame": (io.BytesIO(JPEG), "frame.jpg"), "user_id": "form", "timestamp": "t-1",
+    })
+    assert meta["user_id"] == "header"
+    assert meta["timestamp"] == "t-1"  # 숫자가 아니면 문자열 그대로
+
+
+def test_multipart_without_frame(app):
+    frame, meta = read(app, content_type="multipart/form-data", data={"user_id": "ming01"})
+    assert frame is None
+    assert meta["user_id"] == "ming01"
+
+
+def test_unsupported_content_type(app):
+    assert read(app, data="frame", content_type="text/plain") == (None, {})
@@ -0,0 +1,45 @@
+import json
+import threading
+
+import pytest
+from simple_websocket import Client
+from werkzeug.serving import make_server
+
+from app import create_app
+from app.routes import frame_stream
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # 모델 없이 스트림 경로만 확인: 디코딩 / 분석은 받은 timestamp 를 그대로 돌려주는 가짜로 교체
+    monkeypatch.setattr(frame_stream, "prepare_frame", lambda frame: bytes(frame))
+    monkeypatch.setattr(
+        frame_stream, "process_human_frame",
+        lambda room_id, user_id, timestamp, frame: {"timestamp": timestamp, "room_id": room_id, "size": len(frame)},
+    )
+    app = create_app("stream")
+    httpd = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"ws://127.0.0.1:{httpd.server_port}/api/human/stream"
+    httpd.shutdown()
+    thread.join()
+
+
+def test_websocket_handshake_and_frame(server):
+    ws = Client.connect(f"{server}?room_id=room_1&user_id=ming01")
+    try:
+        ws.send((42).to_bytes(8, "big") + b"\xff\xd8jpeg")
+        payload = json.loads(ws.receive(timeout=5))
+    finally:
+        ws.close()
+
+    assert payload["timestamp"] == 42
+    assert payload["room_id"] == "room_1"
+    assert payload["size"] == 6
+    assert payload["dropped_frames"] == 0
+
+
+def test_websocket_requires_session_ids(server):
+    with pytest.raises(Exception):
+        Client.connect(server)
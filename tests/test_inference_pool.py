@@ -0,0 +1,65 @@
+import os
+import signal
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+from app.utils import inference_pool
+from app.utils.inference_pool import InferencePool, InferenceUnavailable
+
+# 워커는 spawn 으로 뜨므로 모델이 없어도 되는 작업("ai": 감정 분석 실패는 결과로 돌아옴)만 사용
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "SIGSTOP"), reason="SIGSTOP 으로 멈춘 워커를 흉내냄")
+
+SESSION = ("room_pool", "user_pool")
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(inference_pool, "WORKER_HUNG_TIMEOUT", 0.5)
+    monkeypatch.setattr(inference_pool, "SLOT_TIMEOUT", 0.5)
+    pool = InferencePool(1, slots_per_worker=1, max_frame_bytes=FRAME.nbytes)
+    yield pool
+    pool.shutdown()
+
+
+def submit(pool):
+    return pool.submit(SESSION, "ai", SESSION + (1,), FRAME)
+
+
+def test_hung_worker_is_restarted_and_releases_slot(pool):
+    submit(pool).result(timeout=60)  # 워커 기동 완료
+    hung = pool._processes[0]
+    os.kill(hung.pid, signal.SIGSTOP)
+
+    future = submit(pool)
+    with pytest.raises(FutureTimeoutError):
+        future.result(timeout=0.5)
+    # 슬롯이 하나뿐이라 멈춘 워커가 쥐고 있는 동안은 새 요청이 슬롯을 못 받음
+    with pytest.raises(InferenceUnavailable):
+        submit(pool)
+
+    pool.report_timeout(SESSION)
+    with pytest.raises(InferenceUnavailable):
+        future.result(timeout=10)
+    hung.join(timeout=5)
+    assert not hung.is_alive()
+
+    # 새 워커가 슬롯을 돌려받아 다시 처리
+    result, _ = submit(pool).result(timeout=60)
+    assert result["reused"] is False
+    assert pool._processes[0] is not hung
+
+
+def test_slow_worker_is_not_restarted(pool):
+    submit(pool).result(timeout=60)
+    worker = pool._processes[0]
+
+    pool.report_timeout(SESSION)
+    # unhealthy 표시 뒤에 결과가 오면 정상으로 돌아옴
+    submit(pool).result(timeout=10)
+    pool.check_workers()
+    assert pool._processes[0] is worker
+    assert pool._unhealthy_since[0] is None
@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from app.utils import json_utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 다른 프로세스에서 저장하는 쪽: stdin 으로 받은 한 줄마다 저장하고 파일에 쓰일 때까지 기다린 뒤 "ok" 출력
+WRITER_SCRIPT = """
+import sys, json
+from app.utils import json_utils
+for line in sys.stdin:
+    kind, room_id, user_id, data = json.loads(line)
+    getattr(json_utils, f"save_{kind}_data")(room_id, user_id, data)
+    json_utils.flush_writes()
+    print("ok", flush=True)
+"""
+
+
+@pytest.fixture
+def session_dir(tmp_path, monkeypatch):
+    # 저장 경로(analysis_data/...)는 작업 디렉토리 기준
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def writer_process(session_dir):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    process = subprocess.Popen(
+        [sys.executable, "-c", WRITER_SCRIPT], cwd=session_dir, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+
+    def save(kind, room_id, user_id, data):
+        process.stdin.write(json.dumps([kind, room_id, user_id, data]) + "\n")
+        process.stdin.flush()
+        assert process.stdout.readline().strip() == "ok"
+
+    yield save
+    process.stdin.close()
+    process.wait(timeout=10)
+
+
+def test_latest_action_follows_other_process(writer_process):
+    writer_process("action", "room_x", "reader01", {"hand_count": 1})
+    assert json_utils.load_latest_action("room_x", "reader01") == {"hand_count": 1}
+
+    writer_process("action", "room_x", "reader01", {"hand_count": 7})
+    assert json_utils.load_latest_action("room_x", "reader01") == {"hand_count": 7}
+
+
+def test_emotion_summary_follows_other_process(writer_process):
+    record = {"dominant_emotion": "happy", "emotion_scores": {"happy": 90.0, "sad": 10.0}}
+    writer_process("emotion", "room_x", "reader02", record)
+    assert json_utils.load_emotion_summary("room_x", "reader02")["frame_count"] == 1
+
+    writer_process("emotion", "room_x", "reader02", record)
+    summary = json_utils.load_emotion_summary("room_x", "reader02")
+    assert summary["frame_count"] == 2
+    assert summary["score_sums"] == {"happy": 180.0, "sad": 20.0}
+    assert summary["dominant_counts"] == {"happy": 2}
+
+
+def write_lines(path, records, tail=b""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"".join(json_utils._encode_record(r) for r in records) + tail)
+
+
+def write_legacy(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+
+def test_read_jsonl_ignores_partial_last_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_lines(path, [{"n": 1}, {"n": 2}], tail=b'{"n": 3')
+    assert json_utils.read_jsonl(str(path)) == [{"n": 1}, {"n": 2}]
+
+
+def test_read_last_jsonl_record(tmp_path):
+    path = tmp_path / "log.jsonl"
+    assert json_utils.read_last_jsonl_record(str(path)) is None
+
+    path.write_bytes(b"")
+    assert json_utils.read_last_jsonl_record(str(path)) is None
+
+    records = [{"n": i, "pad": "x" * 50} for i in range(20)]
+    write_lines(path, records, tail=b'\n\n{"n": "partial')
+    # 작은 블록으로 여러 번 뒤에서부터 읽어도 마지막 완전한 줄만 반환 (빈 줄 / 쓰다 만 줄 무시)
+    assert json_utils.read_last_jsonl_record(str(path), block_size=16) == records[-1]
+
+    write_lines(path, [{"n": "only"}])
+    assert json_utils.read_last_jsonl_record(str(path), block_size=4) == {"n": "only"}
+
+
+def test_load_records_prepends_legacy_array(session_dir):
+    directory = session_dir / "logs"
+    assert json_utils.load_records(str(directory), "s") is None
+
+    write_legacy(directory / "s.json", [{"n": 1}, {"n": 2}])
+    assert json_utils.load_records(str(directory), "s") == [{"n": 1}, {"n": 2}]
+
+    write_lines(directory / "s.jsonl", [{"n": 3}])
+    assert json_utils.load_records(str(directory), "s") == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def action_file(session_dir, room_id, user_id, ext):
+    return session_dir / json_utils.ACTION_DIRECTORY / f"{room_id}_{user_id}{ext}"
+
+
+def test_latest_action_fallbacks(session_dir):
+    room_id = "room_fallback"
+    assert json_utils.load_latest_action(room_id, "legacy") is None
+
+    # 예전 JSON 배열 로그뿐인 세션
+    write_legacy(action_file(session_dir, room_id, "legacy", json_utils.LEGACY_EXT), [{"n": 1}, {"n": 2}])
+    assert json_utils.load_latest_action(room_id, "legacy") == {"n": 2}
+
+    # JSONL 로그의 마지막 줄
+    write_lines(action_file(session_dir, room_id, "log", json_utils.LOG_EXT), [{"n": 1}, {"n": 3}])
+    assert json_utils.load_latest_action(room_id, "log") == {"n": 3}
+
+    # 스냅샷이 있으면 로그보다 우선
+    write_lines(action_file(session_dir, room_id, "snap", json_utils.LOG_EXT), [{"n": 1}])
+    json_utils.write_snapshot(json_utils.latest_action_path(room_id, "snap"), {"n": 9})
+    assert json_utils.load_latest_action(room_id, "snap") == {"n": 9}
+
+
+def test_latest_action_from_memory_after_save(session_dir):
+    json_utils.save_action_data("room_mem", "u", {"hand_count": 2})
+    assert json_utils.load_latest_action("room_mem", "u") == {"hand_count": 2}
+    json_utils.flush_writes()
+    assert json_utils.read_snapshot(json_utils.latest_action_path("room_mem", "u")) == {"hand_count": 2}
+
+
+EMOTION_RECORDS = [
+    {"dominant_emotion": "happy", "emotion_scores": {"happy": 80.0, "sad": 20.0}},
+    {"dominant_emotion": "sad", "emotion_scores": {"happy": 30.0, "sad": 70.0}},
+]
+
+
+def test_emotion_summary_rebuilt_from_legacy_log(session_dir):
+    room_id, user_id = "room_emotion", "legacy"
+    assert json_utils.load_emotion_summary(room_id, user_id) is None
+
+    write_legacy(session_dir / json_utils.emotion_directory(room_id) / f"{user_id}.json", EMOTION_RECORDS)
+    summary = json_utils.load_emotion_summary(room_id, user_id)
+    assert summary == {
+        "score_sums": {"happy": 110.0, "sad": 90.0},
+        "frame_count": 2,
+        "dominant_counts": {"happy": 1, "sad": 1},
+    }
+    # 한 번 재계산하면 스냅샷으로 남아서 다음부터는 로그를 읽지 않음
+    assert json_utils.read_snapshot(json_utils.emotion_summary_path(room_id, user_id)) == summary
+
+
+def test_save_emotion_continues_from_snapshot(session_dir):
+    room_id, user_id = "room_emotion", "snap"
+    (session_dir / json_utils.emotion_directory(room_id)).mkdir(parents=True)
+    json_utils.write_snapshot(json_utils.emotion_summary_path(room_id, user_id), {
+        "score_sums": {"happy": 50.0}, "frame_count": 5, "dominant_counts": {"happy": 5},
+    })
+    json_utils.save_emotion_data(room_id, user_id, EMOTION_RECORDS[1])
+
+    summary = json_utils.load_emotion_summary(room_id, user_id)
+    assert summary["frame_count"] == 6
+    assert summary["score_sums"] == {"happy": 80.0, "sad": 70.0}
+    assert summary["dominant_counts"] == {"happy": 5, "sad": 1}
+    assert json_utils.load_emotion_data(room_id, user_id) == [EMOTION_RECORDS[1]]
+
+
+def test_convert_json_array_to_jsonl(tmp_path):
+    legacy = tmp_path / "s.json"
+    write_legacy(legacy, [{"n": 1}, {"n": 2}])
+    write_lines(tmp_path / "s.jsonl", [{"n": 3}])
+
+    jsonl_path = json_utils.convert_json_array_to_jsonl(str(legacy))
+    assert not legacy.exists()
+    assert json_utils.read_jsonl(jsonl_path) == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+    # 스냅샷 / 손상된 파일은 변환하지 않음
+    json_utils.write_snapshot(str(tmp_path / "u.summary.snapshot.json"), {"frame_count": 1})
+    (tmp_path / "broken.json").write_text('[{"n": 1}', encoding="utf-8")
+    assert json_utils.convert_directory(str(tmp_path)) == []
+    assert (tmp_path / "broken.json").exists()
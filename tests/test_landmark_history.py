@@ -0,0 +1,72 @@
+import numpy as np
+
+from app.utils.action_analysis import (
+    FACE_POINTS, HAND_POINTS, POSE_POINTS, FramePerception, LandmarkHistory,
+)
+
+
+def perception(value, faces=1, hands=1, pose=True):
+    """모든 좌표가 value 인 인식 결과 (칸마다 구분되도록)"""
+    return FramePerception(
+        pose=np.full((POSE_POINTS, 3), value, dtype=np.float32) if pose else None,
+        faces=np.full((faces, FACE_POINTS, 3), value, dtype=np.float32),
+        hands=np.full((hands, HAND_POINTS, 3), value, dtype=np.float32),
+    )
+
+
+def test_push_stores_landmark_arrays():
+    history = LandmarkHistory(capacity=4)
+    i = history.push(10, perception(0.5, hands=2))
+
+    assert len(history) == 1
+    assert history.latest() == i
+    assert history.has_pose[i] and history.has_face[i]
+    assert np.allclose(history.pose[i], 0.5)
+    assert np.allclose(history.eye_centers[i], 0.5)
+    assert history.hand_count[i] == 2
+    assert np.allclose(history.finger_tips[i], 0.5)
+
+
+def test_missing_pose_face_and_hands():
+    history = LandmarkHistory(capacity=4)
+    i = history.push(1, perception(0.1, faces=0, hands=0, pose=False))
+    assert not history.has_pose[i]
+    assert not history.has_face[i]
+    assert history.hand_count[i] == 0
+
+
+def test_ring_buffer_keeps_latest_in_order():
+    history = LandmarkHistory(capacity=3)
+    for t in range(5):
+        history.push(t, perception(t / 10))
+
+    assert len(history) == 3
+    assert [history.timestamps[i] for i in history.indices()] == [2.0, 3.0, 4.0]
+    assert history.timestamps[history.latest()] == 4.0
+    assert np.allclose(history.pose[history.latest()], 0.4)
+
+
+def test_find_by_timestamp():
+    history = LandmarkHistory(capacity=3)
+    for t in range(5):
+        history.push(t, perception(t / 10))
+
+    assert history.find("3") == history.indices()[1]  # 문자열 timestamp 도 숫자로 비교
+    assert history.find(0) is None  # 덮어쓰인 칸
+    assert history.find("not-a-number") is None
+
+
+def test_invalid_timestamp_is_not_findable():
+    history = LandmarkHistory(capacity=3)
+    i = history.push("bad", perception(0.2))
+    assert np.isnan(history.timestamps[i])
+    assert history.find("bad") is None
+
+
+def test_clear():
+    history = LandmarkHistory(capacity=3)
+    history.push(1, perception(0.2))
+    history.clear()
+    assert len(history) == 0
+    assert history.latest() is None
+    assert history.indices() == []
@@ -0,0 +1,92 @@
+import pytest
+
+from app.utils import nlp_utils
+
+
+@pytest.fixture
+def kiwi_factory(monkeypatch):
+    """주어진 num_workers 로 만든 Kiwi 를 nlp_utils 공용 인스턴스로 사용 (기본 모델, 사용자 사전은 build_kiwi 와 같게)"""
+    kiwipiepy = pytest.importorskip("kiwipiepy")
+    stopwords = nlp_utils.build_stopwords()
+    monkeypatch.setattr(nlp_utils, "_batch_supported", True)
+
+    def install(num_workers):
+        kiwi = kiwipiepy.Kiwi(num_workers=num_workers)
+        kiwi.add_user_word('이건', 'IC')
+        monkeypatch.setattr(nlp_utils, "_kiwi", kiwi)
+        monkeypatch.setattr(nlp_utils, "_stopwords", stopwords)
+        return kiwi
+    return install
+
+
+SCRIPTS = ["음 저는 요즘 영화 보는 걸 좋아해요.", "취미는 독서랑 운동이에요"]
+
+
+def forms(tokens):
+    return [token.form for token in tokens]
+
+
+def test_nlp_workers_is_explicit_thread_count():
+    # num_workers=0 은 kiwipiepy 버전마다 뜻이 달라서 넘기지 않는다
+    assert nlp_utils.NLP_WORKERS >= 1
+
+
+def test_tokenize_batch_matches_per_item(kiwi_factory):
+    kiwi_factory(nlp_utils.NLP_WORKERS)
+    batch = nlp_utils.tokenize_batch(SCRIPTS)
+    assert [forms(tokens) for tokens in batch] == [forms(nlp_utils.tokenize(script)) for script in SCRIPTS]
+    assert nlp_utils._batch_supported
+
+
+def test_tokenize_batch_falls_back_in_single_thread_mode(kiwi_factory):
+    kiwi = kiwi_factory(0)
+    try:
+        list(kiwi.tokenize(SCRIPTS))
+    except Exception:
+        pass
+    else:
+        pytest.skip("이 kiwipiepy 버전은 num_workers=0 에서도 배치 토크나이즈 가능")
+
+    batch = nlp_utils.tokenize_batch(SCRIPTS)
+    assert [forms(tokens) for tokens in batch] == [forms(nlp_utils.tokenize(script)) for script in SCRIPTS]
+    assert not nlp_utils._batch_supported
+
+
+TRANSCRIPT = "음 어 저는 요즘 영화 보는 걸 좋아해요. 근데 진짜 이거 좀 어려웠어요. 프로젝트 경험은 서버 개발이"
+
+
+def test_transcript_chunks_match_whole_transcript(kiwi_factory):
+    kiwi_factory(nlp_utils.NLP_WORKERS)
+    whole = nlp_utils.TranscriptSession().append(TRANSCRIPT, final=True)
+
+    session = nlp_utils.TranscriptSession()
+    chunks = [TRANSCRIPT[i:i + 7] for i in range(0, len(TRANSCRIPT), 7)]
+    for chunk in chunks:
+        session.append(chunk)
+    assert session.append("", final=True) == whole
+    assert whole["keyword_dict"]["영화"] == 1
+    assert whole["noend_flag"]  # 마지막 문장이 끝나지 않음
+
+
+def test_transcript_pending_sentence_is_not_committed(kiwi_factory):
+    kiwi_factory(nlp_utils.NLP_WORKERS)
+    session = nlp_utils.TranscriptSession()
+
+    first = session.append("저는 영화를 좋아해요. 요즘 영화")
+    # 보류 중인 마지막 문장도 결과에는 포함되지만 상태에는 더해지지 않음
+    assert first["keyword_dict"]["영화"] == 2
+    assert session.keyword_dict == {"영화": 1}
+    assert session.snapshot() == first
+
+    second = session.append("는 잘 안 봐요.", final=True)
+    assert second["keyword_dict"]["영화"] == 2
+    assert session.pending == ""
+    assert session.snapshot()["keyword_dict"] == {"영화": 2}
+
+
+def test_transcript_empty_text(kiwi_factory):
+    kiwi_factory(nlp_utils.NLP_WORKERS)
+    session = nlp_utils.TranscriptSession()
+    result = session.append("   ")
+    assert result["keyword_dict"] == {}
+    assert not result["noend_flag"] and not result["nopolite_flag"]
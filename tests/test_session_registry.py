@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from app.utils import session_registry
+from app.utils.session_registry import ActionSession, SessionRegistry
+
+FRAME = np.full((48, 64, 3), 120, dtype=np.uint8)
+EMOTION = {"dominant_emotion": "happy", "percentage": 90, "emotion_scores": {"happy": 90.0}}
+FAILED = {"dominant_emotion": "error", "percentage": 0, "emotion_scores": {}}
+
+
+def test_reuses_last_emotion_for_unchanged_frame():
+    session = ActionSession()
+    assert not session.can_reuse(FRAME)  # 아직 결과 없음 -> 분석
+    session.remember_emotion(EMOTION)
+
+    assert session.can_reuse(FRAME)
+    assert session.last_emotion == EMOTION
+    assert session.motion_gate.skipped == 1
+
+
+def test_no_skip_counted_without_result():
+    session = ActionSession()
+    for _ in range(3):
+        assert not session.can_reuse(FRAME)
+    assert session.motion_gate.skipped == 0
+
+
+def test_failed_emotion_is_not_reused():
+    session = ActionSession()
+    session.can_reuse(FRAME)
+    session.remember_emotion(EMOTION)
+    session.remember_emotion(FAILED)
+
+    # 변화 없는 프레임이어도 실패 결과를 재사용하지 않고 다시 분석
+    assert session.last_emotion is None
+    assert not session.can_reuse(FRAME)
+    assert session.motion_gate.skipped == 0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(session_registry, "time", clock)
+    return clock
+
+
+def test_get_creates_once_and_reuses(clock):
+    registry = SessionRegistry(dict, ttl=60, max_sessions=10)
+    session = registry.get("a")
+    assert registry.get("a") is session
+    assert registry.get("b", lambda: {"custom": True}) == {"custom": True}
+    assert len(registry) == 2
+
+
+def test_expires_after_ttl_without_access(clock):
+    registry = SessionRegistry(dict, ttl=60, max_sessions=10)
+    old = registry.get("old")
+    clock.now += 30
+    kept = registry.get("kept")
+    clock.now += 40  # old: 70초 / kept: 40초 동안 접근 없음
+
+    registry.sweep()
+    assert registry.peek("old") is None
+    assert registry.peek("kept") is kept
+    assert registry.get("old") is not old  # 만료 후엔 새 세션
+
+
+def test_access_refreshes_ttl(clock):
+    registry = SessionRegistry(dict, ttl=60, max_sessions=10)
+    session = registry.get("a")
+    for _ in range(3):
+        clock.now += 50
+        assert registry.get("a") is session
+
+
+def test_peek_does_not_refresh_or_create(clock):
+    registry = SessionRegistry(dict, ttl=60, max_sessions=10)
+    assert registry.peek("a") is None
+    assert len(registry) == 0
+
+    registry.get("a")
+    clock.now += 50
+    registry.peek("a")
+    clock.now += 20
+    registry.sweep()
+    assert registry.peek("a") is None
+
+
+def test_evicts_least_recently_used_over_limit(clock):
+    registry = SessionRegistry(dict, ttl=600, max_sessions=2)
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b 가 가장 오래 안 쓴 세션
+    registry.get("c")
+
+    assert registry.peek("b") is None
+    assert registry.peek("a") is not None and registry.peek("c") is not None
+    assert len(registry) == 2
+
+
+def test_pop_removes_session(clock):
+    registry = SessionRegistry(dict, ttl=60, max_sessions=10)
+    session = registry.get("a")
+    assert registry.pop("a") is session
+    assert registry.pop("a") is None
@@ -0,0 +1,107 @@
+import json
+import threading
+
+import pytest
+
+from app.utils.write_behind import WriteBehindWriter, append_bytes, replace_file
+
+
+@pytest.fixture
+def writer():
+    # 자동 flush 주기를 길게 잡아서 flush / close 가 쓰기를 앞당기는지 확인
+    writer = WriteBehindWriter(flush_interval_ms=60_000)
+    yield writer
+    writer.close(timeout=5)
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_append_and_replace_helpers(tmp_path):
+    log_path = tmp_path / "log.jsonl"
+    append_bytes(str(log_path), b"a\n")
+    append_bytes(str(log_path), b"b\n")
+    assert log_path.read_bytes() == b"a\nb\n"
+
+    snapshot_path = tmp_path / "s.json"
+    replace_file(str(snapshot_path), {"n": 1})
+    replace_file(str(snapshot_path), {"n": 2})
+    assert read_json(snapshot_path) == {"n": 2}
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_flush_writes_pending_appends_in_order(writer, tmp_path):
+    log_path = tmp_path / "nested" / "log.jsonl"
+    for i in range(5):
+        writer.append(str(log_path), f"{i}\n".encode())
+    assert writer.queue_depth() == 5
+
+    assert writer.flush(timeout=5)
+    assert log_path.read_bytes() == b"0\n1\n2\n3\n4\n"
+    assert writer.queue_depth() == 0
+
+
+def test_replace_keeps_only_last_snapshot(writer, tmp_path):
+    snapshot_path = tmp_path / "summary.snapshot.json"
+    for n in range(3):
+        writer.replace(str(snapshot_path), {"frame_count": n})
+    assert writer.flush(timeout=5)
+    assert read_json(snapshot_path) == {"frame_count": 2}
+
+
+def test_flush_with_nothing_pending_returns_immediately(writer):
+    assert writer.flush(timeout=0)
+
+
+def test_close_writes_remaining_and_later_submits_write_directly(tmp_path):
+    writer = WriteBehindWriter(flush_interval_ms=60_000)
+    log_path = tmp_path / "log.jsonl"
+    writer.append(str(log_path), b"queued\n")
+    writer.close(timeout=5)
+    assert log_path.read_bytes() == b"queued\n"
+
+    # 종료 후 저장은 호출 스레드에서 바로 쓴다
+    writer.append(str(log_path), b"after\n")
+    assert log_path.read_bytes() == b"queued\nafter\n"
+
+
+def test_relative_paths_resolve_at_submit_time(writer, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer.append("log.jsonl", b"x\n")
+    monkeypatch.chdir(tmp_path.parent)
+    assert writer.flush(timeout=5)
+    assert (tmp_path / "log.jsonl").read_bytes() == b"x\n"
+
+
+def test_max_pending_blocks_until_writer_catches_up(tmp_path):
+    writer = WriteBehindWriter(flush_interval_ms=60_000, max_pending=2)
+    log_path = tmp_path / "log.jsonl"
+    try:
+        done = threading.Event()
+
+        def submit_many():
+            for i in range(10):
+                writer.append(str(log_path), f"{i}\n".encode())
+            done.set()
+
+        thread = threading.Thread(target=submit_many)
+        thread.start()
+        # 대기 한도에 걸리면 writer 에 flush 를 요청하므로 주기(60초)를 기다리지 않고 끝난다
+        assert done.wait(timeout=5)
+        thread.join()
+        assert writer.flush(timeout=5)
+        assert log_path.read_bytes() == b"".join(f"{i}\n".encode() for i in range(10))
+    finally:
+        writer.close(timeout=5)
+
+
+def test_failed_file_does_not_block_others(writer, tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("file")
+    writer.append(str(blocker / "log.jsonl"), b"lost\n")
+    writer.append(str(tmp_path / "ok.jsonl"), b"kept\n")
+
+    assert writer.flush(timeout=5)
+    assert (tmp_path / "ok.jsonl").read_bytes() == b"kept\n"